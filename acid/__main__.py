@@ -8,32 +8,115 @@ Contributors: myrma
 """
 
 import os
+import sys
 import argparse
 
 from acid.parser import Parser, tokenize
-from acid.compiler import Compiler
-from acid.exception import ParseError
-from acid.repl import REPL
+from acid.compiler import (Compiler, Specializer, execute_with_snapshot,
+						   build, compile_file)
+from acid.server.client import DEFAULT_SOCKET_PATH
+from acid.exception import ParseError, ResourceLimitError
 
 
 class Call(argparse.Action):
+	"""
+	Selects the function called with the action argument and the parsed
+	options, once all the command line arguments are parsed.
+	"""
+
 	def __init__(self, func, *args, **kwds):
 		super().__init__(*args, **kwds)
 		self.func = func
 
 	def __call__(self, parser, namespace, values, option_string=None):
-		setattr(namespace, self.dest, self.func(values))
+		setattr(namespace, self.dest, values)
+		namespace.command = self.func
 
 
-def execute(path):
-	if path.endswith('.acidc'):
+def execute(path, options):
+	if path == '-':
+		Compiler.execute_stream(sys.stdin, '<stdin>')
+	elif any(limit is not None for limit in limits(options)):
+		execute_limited(path, options)
+	elif options.adaptive or options.adaptive_stats:
+		execute_adaptive(path, options)
+	elif options.stream:
+		with open(path) as file:
+			Compiler.execute_stream(file, path)
+	elif path.endswith('.acidc'):
 		Compiler.execute_compiled_file(path)
+	elif options.snapshot:
+		execute_with_snapshot(path)
 	else:
-		compiler = Compiler.from_file(path)
-		compiler.execute()
+		Compiler.execute_code(compile_file(path, jobs=options.jobs))
+
+
+def limits(options):
+	from acid.sandbox import Limits
+
+	memory = options.max_memory
 
+	return Limits(steps=options.max_steps, time=options.max_time,
+				  memory=memory * 2 ** 20 if memory is not None else None,
+				  allocation=options.max_allocation)
+
+
+def execute_limited(path, options):
+	from acid.sandbox import execute_sandboxed
 
-def lex(path):
+	with open(path) as file:
+		code = file.read()
+
+	try:
+		execute_sandboxed(code, path, limits(options))
+	except ResourceLimitError as err:
+		print('{}: {}'.format(type(err).__name__, err), file=sys.stderr)
+		sys.exit(1)
+
+
+def execute_adaptive(path, options):
+	specializer = Specializer()
+
+	try:
+		specializer.execute(Compiler.from_file(path))
+	finally:
+		if options.adaptive_stats:
+			specializer.print_stats(sys.stderr)
+
+
+def profile(path, options):
+	from acid.profiler import Profiler
+
+	compiler = Compiler.from_file(path)
+	profiler = Profiler()
+
+	try:
+		profiler.run(compiler.execute)
+	finally:
+		if options.profile_output is None:
+			write_profile(profiler, sys.stdout, options)
+		else:
+			with open(options.profile_output, 'w') as output:
+				write_profile(profiler, output, options)
+
+
+def write_profile(profiler, output, options):
+	if options.profile_format == 'json':
+		profiler.dump_json(output)
+	elif options.profile_format == 'collapsed':
+		profiler.dump_collapsed(output)
+	else:
+		profiler.print_stats(output, limit=options.profile_limit)
+
+
+def bench(name, options):
+	from acid.bench.runtime import run_benchmarks
+
+	run_benchmarks([name] if name is not None else None,
+				   repeat=options.bench_repeat)
+
+
+def lex(path, options):
 	with open(path) as file:
 		code = file.read()
 
@@ -46,7 +129,7 @@ def lex(path):
 				print(token)
 
 
-def parse(path):
+def parse(path, options):
 	parser = Parser.from_file(path)
 
 	try:
@@ -57,12 +140,17 @@ def parse(path):
 		print(tree)
 
 
-def compile(path):
-	compiler = Compiler.from_file(path)
-	compiler.dump()
+def compile(paths, options):
+	errors = build(paths, jobs=options.jobs, force=options.force)
+
+	if errors:
+		sys.exit(1)
 
 
-def interactive(path=None):
+def interactive(path, options):
+	# imported here, to keep the other commands' startup fast
+	from acid.repl import REPL
+
 	repl = REPL()
 
 	if path is not None:
@@ -71,6 +159,19 @@ def interactive(path=None):
 	repl.run()
 
 
+def serve(path, options):
+	from acid.server import Server
+
+	server = Server(path, workers=options.workers)
+	server.serve_forever()
+
+
+def remote(path, options):
+	from acid.server.client import run_remote
+
+	sys.exit(run_remote(options.socket, path))
+
+
 arg_parser = argparse.ArgumentParser(
 	prog='acid',
 	description="Tokenize, parse, compile or execute the given input file"
@@ -84,7 +185,7 @@ action.add_argument(
 	metavar='PATH',
 	action=Call,
 	func=execute,
-	help='executes the given file')
+	help='executes the given file, or the standard input if PATH is -')
 
 action.add_argument(
 	'--lex', '-l',
@@ -106,9 +207,11 @@ action.add_argument(
 	'--compile', '-c',
 	dest='path',
 	metavar='PATH',
+	nargs='+',
 	action=Call,
 	func=compile,
-	help='compile the given file')
+	help='compile the given files, directories or glob patterns, next to \
+their sources')
 
 action.add_argument(
 	'--repl', '-i',
@@ -121,5 +224,194 @@ action.add_argument(
 	help='starts an interactive interpreter')
 
 
+action.add_argument(
+	'--serve',
+	dest='path',
+	metavar='SOCKET',
+	nargs='?',
+	action=Call,
+	func=serve,
+	const=DEFAULT_SOCKET_PATH,
+	help='starts an execution server listening on the given Unix socket')
+
+action.add_argument(
+	'--remote',
+	dest='path',
+	metavar='PATH',
+	action=Call,
+	func=remote,
+	help='executes the given file on a running execution server')
+
+action.add_argument(
+	'--profile',
+	dest='path',
+	metavar='PATH',
+	action=Call,
+	func=profile,
+	help='executes the given file and profiles its functions')
+
+action.add_argument(
+	'--bench',
+	dest='path',
+	metavar='NAME',
+	nargs='?',
+	action=Call,
+	func=bench,
+	default=None,
+	help='runs the runtime benchmarks (or only the given one), comparing \
+Acid to Python')
+
+arg_parser.add_argument(
+	'--jobs', '-j',
+	type=int,
+	default=None,
+	help='number of processes compiling files with --compile, or the forms \
+of a big file with --exec')
+
+arg_parser.add_argument(
+	'--max-steps',
+	type=int,
+	default=None,
+	help='with --exec, runs the file in a sandbox, stopping it after this \
+number of function calls and loop iterations')
+
+arg_parser.add_argument(
+	'--max-time',
+	type=float,
+	default=None,
+	help='with --exec, runs the file in a sandbox, stopping it after this \
+number of seconds')
+
+arg_parser.add_argument(
+	'--max-memory',
+	type=int,
+	default=None,
+	help='with --exec, runs the file in a sandbox whose memory is limited to \
+this number of megabytes')
+
+arg_parser.add_argument(
+	'--max-allocation',
+	type=int,
+	default=None,
+	help='with --exec, runs the file in a sandbox where builtins cannot build \
+collections of more than this number of elements')
+
+arg_parser.add_argument(
+	'--adaptive',
+	action='store_true',
+	help='with --exec, specializes the hot functions for the types of their \
+arguments')
+
+arg_parser.add_argument(
+	'--adaptive-stats',
+	action='store_true',
+	help='with --exec, runs in adaptive mode and prints the specializations \
+to stderr')
+
+arg_parser.add_argument(
+	'--stream',
+	action='store_true',
+	help='with --exec, parses, compiles and runs the file one top-level form \
+at a time, to bound the memory use (implied when reading from stdin with -)')
+
+arg_parser.add_argument(
+	'--force',
+	action='store_true',
+	help='with --compile, compiles the files which are up to date too')
+
+arg_parser.add_argument(
+	'--bench-repeat',
+	type=int,
+	default=7,
+	help='number of timed runs of each benchmark of --bench')
+
+arg_parser.add_argument(
+	'--profile-format',
+	choices=('text', 'json', 'collapsed'),
+	default='text',
+	help='output format of --profile (collapsed stacks are read by flame \
+graph tools)')
+
+arg_parser.add_argument(
+	'--profile-output',
+	metavar='FILE',
+	default=None,
+	help='file the profile is written to, instead of the standard output')
+
+arg_parser.add_argument(
+	'--profile-limit',
+	type=int,
+	default=None,
+	help='number of functions shown by --profile')
+
+arg_parser.add_argument(
+	'--snapshot',
+	action='store_true',
+	help='with --exec, restores the evaluated top-level declarations from a \
+snapshot file, or writes one')
+
+arg_parser.add_argument(
+	'--socket',
+	default=DEFAULT_SOCKET_PATH,
+	help='socket of the execution server used by --remote')
+
+arg_parser.add_argument(
+	'--workers',
+	type=int,
+	default=None,
+	help='number of worker processes of the execution server')
+
+arg_parser.add_argument(
+	'--timings',
+	action='store_true',
+	help='prints the time spent in each phase of the pipeline on the \
+standard error')
+
+arg_parser.add_argument(
+	'--timings-forms',
+	action='store_true',
+	help='with --timings, also times the parsing and translation of each \
+top-level form')
+
+arg_parser.add_argument(
+	'--timings-memory',
+	action='store_true',
+	help='with --timings, measures the peak memory of each phase with \
+tracemalloc')
+
+arg_parser.add_argument(
+	'--timings-trace',
+	metavar='FILE',
+	default=None,
+	help='writes the phases of the pipeline to a Chrome trace file')
+
+arg_parser.set_defaults(command=None)
+
+
+def run_with_timings(options):
+	from acid.timings import Timings
+
+	timings = Timings(forms=options.timings_forms,
+					  memory=options.timings_memory)
+
+	try:
+		with timings:
+			options.command(options.path, options)
+	finally:
+		if options.timings:
+			timings.print_summary(sys.stderr)
+
+		if options.timings_trace is not None:
+			with open(options.timings_trace, 'w') as trace_file:
+				timings.dump_chrome_trace(trace_file)
+
+
 if __name__ == '__main__':
-	arg_parser.parse_args()
+	options = arg_parser.parse_args()
+
+	if options.command is None:
+		pass
+	elif options.timings or options.timings_trace is not None:
+		run_with_timings(options)
+	else:
+		options.command(options.path, options)
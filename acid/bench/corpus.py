@@ -0,0 +1,141 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Generates synthetic Acid programs for the front-end benchmarks. Programs are
+made of function declarations whose bodies nest calls, conditionals, lambdas,
+literals and collection literals, interleaved with line and block comments.
+
+The same parameters and seed always give the same program. Run with
+`python -m acid.bench.corpus [size]` to print one.
+
+Contributors: myrma
+"""
+
+__all__ = ['generate']
+
+import sys
+import random
+
+
+# operators and builtins called by the generated code
+_FUNCTIONS = ['+', '-', '*', '/', '<', '>', '=', 'map', 'filter', 'foldl',
+			  'length', 'head', 'tail', 'append', 'get', 'print']
+
+_WORDS = ['alpha', 'beta', 'gamma', 'delta', 'omega', 'sigma', 'tau', 'rho']
+
+
+class _Generator:
+	def __init__(self, rng, depth, comment_density):
+		self.rng = rng
+		self.depth = depth
+		self.comment_density = comment_density
+		self.functions = []
+
+	def comment(self, indent):
+		if self.rng.random() < 0.5:
+			return '{}// {}\n'.format(indent, self.sentence())
+
+		return '{}/* {}\n{} * {} */\n'.format(
+			indent, self.sentence(), indent, self.sentence())
+
+	def sentence(self):
+		return ' '.join(self.rng.choice(_WORDS)
+						for _ in range(self.rng.randint(2, 8)))
+
+	def variable(self, scope):
+		if scope and self.rng.random() < 0.7:
+			return self.rng.choice(scope)
+
+		if self.functions and self.rng.random() < 0.5:
+			return self.rng.choice(self.functions)
+
+		return self.rng.choice(_FUNCTIONS)
+
+	def literal(self):
+		kind = self.rng.randrange(4)
+
+		if kind == 0:
+			return str(self.rng.randint(0, 10000))
+		elif kind == 1:
+			return '{:.3f}'.format(self.rng.uniform(0, 1000))
+		elif kind == 2:
+			return '"{}"'.format(self.sentence())
+
+		return "'{}'".format(self.rng.choice('abcdefxyz'))
+
+	def expr(self, depth, scope, indent):
+		if depth <= 0 or self.rng.random() < 0.2:
+			if self.rng.random() < 0.5:
+				return self.variable(scope)
+
+			return self.literal()
+
+		kind = self.rng.random()
+		inner = indent + '\t'
+
+		if kind < 0.55:
+			args = [self.expr(depth - 1, scope, inner)
+					for _ in range(self.rng.randint(1, 3))]
+			return '({} {})'.format(self.variable(scope), ' '.join(args))
+		elif kind < 0.75:
+			parts = [self.expr(depth - 1, scope, inner) for _ in range(3)]
+			return '(if {}\n{}{}\n{}{})'.format(
+				parts[0], inner, parts[1], inner, parts[2])
+		elif kind < 0.85:
+			params = self.params()
+			body = self.expr(depth - 1, scope + params, inner)
+			return '(lambda ({}) {})'.format(' '.join(params), body)
+		elif kind < 0.93:
+			pairs = [(self.literal(), self.expr(depth - 1, scope, inner))
+					 for _ in range(self.rng.randint(1, 3))]
+			return '{{{}}}'.format(
+				' '.join('{} {}'.format(key, value) for key, value in pairs))
+
+		elements = [self.literal() for _ in range(self.rng.randint(1, 4))]
+		return '#{{{}}}'.format(' '.join(elements))
+
+	def params(self):
+		count = self.rng.randint(0, 3)
+		return ['x{}'.format(i) for i in self.rng.sample(range(100), count)]
+
+	def declaration(self):
+		name = 'f{}'.format(len(self.functions))
+		params = self.params() or ['x']
+		lines = []
+
+		if self.rng.random() < self.comment_density:
+			lines.append(self.comment(''))
+
+		body = self.expr(self.depth, params, '\t')
+		lines.append('(define {} (lambda ({})\n\t{}\n))\n\n'.format(
+			name, ' '.join(params), body))
+
+		self.functions.append(name)
+		return ''.join(lines)
+
+
+def generate(size, depth=4, comment_density=0.1, seed=0):
+	"""
+	Returns an Acid program of about `size` characters, whose expressions are
+	nested at most `depth` times, and with a comment before a fraction
+	`comment_density` of the declarations.
+	"""
+
+	generator = _Generator(random.Random(seed), depth, comment_density)
+	chunks = []
+	length = 0
+
+	while length < size:
+		chunk = generator.declaration()
+		chunks.append(chunk)
+		length += len(chunk)
+
+	chunks.append('(define main (lambda () ({} 0)))\n'.format(
+		generator.functions[-1]))
+
+	return ''.join(chunks)
+
+
+if __name__ == '__main__':
+	print(generate(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks the front-end of the compiler (tokenizing, parsing, translation to a
+Python AST and compilation to a code object) on synthetic programs of
+increasing size (see `acid.bench.corpus`).
+
+For each size and phase, the best time is reported along with the throughput
+(MB/s of source, and AST nodes/s) and the peak memory measured by tracemalloc
+in a separate run. The results can be saved as a baseline, and later runs
+compared to it: the script exits with status 1 if a phase became slower than
+the baseline by more than the threshold.
+
+	python -m acid.bench.frontend --save baseline.json
+	python -m acid.bench.frontend --baseline baseline.json --threshold 0.2
+
+Contributors: myrma
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from acid.parser import Parser, tokenize
+from acid.compiler import Compiler
+from acid.bench.corpus import generate
+from acid.timings import _reset_peak
+
+
+PHASES = ('lex', 'parse', 'translate', 'compile')
+
+
+def _run_phases(code):
+	"""
+	Runs each phase of the front-end once on the code, and returns the
+	durations of the phases along with the number of AST nodes.
+	"""
+
+	times = {}
+
+	start = time.perf_counter()
+	list(tokenize(code))
+	times['lex'] = time.perf_counter() - start
+
+	# the tokenizing done by the constructor is not part of the parse phase
+	parser = Parser(code)
+	start = time.perf_counter()
+	program = parser.run()
+	times['parse'] = time.perf_counter() - start
+
+	compiler = Compiler(program)
+	start = time.perf_counter()
+	py_ast = compiler.translate(program)
+	times['translate'] = time.perf_counter() - start
+
+	start = time.perf_counter()
+	compile(py_ast, '<bench>', mode='exec')
+	times['compile'] = time.perf_counter() - start
+
+	nodes = sum(1 for _ in program.walk())
+	return times, nodes
+
+
+def _peak_memory(code):
+	"""
+	Returns the peak memory allocated by each phase, in bytes.
+	"""
+
+	peaks = {}
+	tracemalloc.start()
+
+	try:
+		def measure(name, func, *args):
+			tracemalloc.clear_traces()
+			base = tracemalloc.get_traced_memory()[0]
+			_reset_peak()
+			result = func(*args)
+			peaks[name] = tracemalloc.get_traced_memory()[1] - base
+			return result
+
+		measure('lex', lambda: list(tokenize(code)))
+		parser = Parser(code)
+		program = measure('parse', parser.run)
+		py_ast = measure('translate', Compiler(program).translate, program)
+		measure('compile', compile, py_ast, '<bench>', 'exec')
+	finally:
+		tracemalloc.stop()
+
+	return peaks
+
+
+def bench(sizes, depth, comment_density, seed, repeat):
+	"""
+	Returns the results of the benchmark, as a dictionary which can be saved
+	as a baseline.
+	"""
+
+	results = {}
+
+	print('{:>8} {:<10} {:>10} {:>9} {:>12} {:>11}'.format(
+		'size', 'phase', 'best', 'MB/s', 'nodes/s', 'peak'))
+
+	for size in sizes:
+		code = generate(size, depth, comment_density, seed)
+		runs = [_run_phases(code) for _ in range(repeat)]
+		nodes = runs[0][1]
+		peaks = _peak_memory(code)
+
+		for phase in PHASES:
+			best = min(times[phase] for times, _ in runs)
+			results['{}/{}'.format(size, phase)] = best
+
+			print('{:>8} {:<10} {:>9.6f}s {:>9.3f} {:>12.0f} {:>8.1f} KiB'.format(
+				len(code), phase, best, len(code) / best / 1e6,
+				nodes / best, peaks[phase] / 1024))
+
+	return {
+		'parameters': {
+			'depth': depth,
+			'comment_density': comment_density,
+			'seed': seed,
+		},
+		'results': results,
+	}
+
+
+def compare(report, baseline, threshold):
+	"""
+	Prints the phases slower than in the baseline by more than `threshold`
+	(a fraction of the baseline time), and returns their number.
+	"""
+
+	if report['parameters'] != baseline['parameters']:
+		raise ValueError('The baseline was generated with other parameters')
+
+	regressions = 0
+
+	for key, best in sorted(report['results'].items()):
+		reference = baseline['results'].get(key)
+
+		if reference is None:
+			continue
+
+		ratio = best / reference
+
+		if ratio > 1 + threshold:
+			regressions += 1
+			print('regression: {:<18} {:.6f}s -> {:.6f}s ({:+.1f}%)'.format(
+				key, reference, best, 100 * (ratio - 1)))
+
+	return regressions
+
+
+def main(argv=None):
+	arg_parser = argparse.ArgumentParser(
+		prog='python -m acid.bench.frontend',
+		description='Benchmarks the lexer, parser, translator and compiler')
+
+	arg_parser.add_argument(
+		'--sizes', type=int, nargs='+', default=[1000, 4000, 16000],
+		help='sizes of the generated programs, in characters')
+	arg_parser.add_argument('--depth', type=int, default=4)
+	arg_parser.add_argument('--comments', type=float, default=0.1,
+							help='fraction of declarations with a comment')
+	arg_parser.add_argument('--seed', type=int, default=0)
+	arg_parser.add_argument('--repeat', type=int, default=3)
+	arg_parser.add_argument('--save', metavar='FILE',
+							help='saves the results as a baseline')
+	arg_parser.add_argument('--baseline', metavar='FILE',
+							help='compares the results to a baseline')
+	arg_parser.add_argument('--threshold', type=float, default=0.2,
+							help='tolerated slowdown, as a fraction')
+
+	options = arg_parser.parse_args(argv)
+
+	report = bench(options.sizes, options.depth, options.comments,
+				   options.seed, options.repeat)
+
+	if options.save is not None:
+		with open(options.save, 'w') as file:
+			json.dump(report, file, indent=2)
+
+	if options.baseline is not None:
+		with open(options.baseline) as file:
+			baseline = json.load(file)
+
+		if compare(report, baseline, options.threshold):
+			return 1
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
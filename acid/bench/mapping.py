@@ -0,0 +1,65 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks key lookups in an association list searched with `filter` against
+the native and persistent hash maps. Run with `python -m acid.bench.mapping`.
+
+Contributors: myrma
+"""
+
+import sys
+import timeit
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env
+
+
+ALIST_CODE = """
+(define lookup (lambda (table k)
+	(# (# (filter (lambda (pair) (== (# pair 0) k)) table) 0) 1)
+))
+"""
+
+HASH_CODE = """
+(define lookup (lambda (table k)
+	(get table k)
+))
+"""
+
+RUN_CODE = """
+(define run (lambda (table n)
+	(foldl + (map (lambda (k) (lookup table k)) (range 0 n)))
+))
+"""
+
+
+def load(code):
+	env = default_env.copy()
+	compiler = Compiler(Parser.from_string(code + RUN_CODE))
+	compiler.load(env)
+	return env['run']
+
+
+def bench(sizes, repeat=3):
+	env = default_env
+
+	for n in sizes:
+		pairs = [(k, k * 2) for k in range(n)]
+		flat = [x for pair in pairs for x in pair]
+
+		runs = [
+			('association list', load(ALIST_CODE), pairs),
+			('dict', load(HASH_CODE), env['dict'](*flat)),
+			('pdict', load(HASH_CODE), env['pdict'](*flat)),
+		]
+
+		for name, run, table in runs:
+			timer = lambda: run(table, n)
+			best = min(timeit.repeat(timer, number=1, repeat=repeat))
+			print('{:<20} n={:<10} {:.6f}s'.format(name, n, best))
+
+
+if __name__ == '__main__':
+	bench([int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Measures the overhead of metered execution (see `acid.compiler.metering`): the
+runtime benchmarks are run compiled normally, then compiled with fuel checks
+under a Meter without limits. Run with `python -m acid.bench.metering [name...]`.
+
+Contributors: myrma
+"""
+
+import sys
+import timeit
+import statistics
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.compiler.metering import Meter
+from acid.prelude import default_env
+from acid.bench.runtime import BENCHMARKS, RECURSION_LIMIT
+
+
+def _load(code, metered):
+	env = default_env.copy()
+	compiler = Compiler(Parser.from_string(code))
+
+	if metered:
+		Meter().install(env)
+		compiler.metered = True
+
+	compiler.load(env)
+	return env['run']
+
+
+def bench(names=None, repeat=7, file=None):
+	file = file or sys.stdout
+	selected = [bench for bench in BENCHMARKS
+				if names is None or bench.name in names]
+
+	limit = sys.getrecursionlimit()
+	sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+
+	print('{:<10} {:>8} {:>12} {:>12} {:>9}'.format(
+		'benchmark', 'n', 'unmetered', 'metered', 'overhead'), file=file)
+
+	try:
+		for bench in selected:
+			runs = [_load(bench.code, metered) for metered in (False, True)]
+			times = [[], []]
+
+			for run in runs:
+				if run(bench.n) != bench.python(bench.n):
+					raise AssertionError(
+						'{}: wrong result'.format(bench.name))
+
+			# the runs are interleaved, so that both versions are equally
+			# affected by the load of the machine
+			for _ in range(repeat):
+				for run, run_times in zip(runs, times):
+					run_times.append(
+						timeit.timeit(lambda: run(bench.n), number=1))
+
+			unmetered, metered = map(statistics.median, times)
+
+			print('{:<10} {:>8} {:>11.6f}s {:>11.6f}s {:>8.1f}%'.format(
+				bench.name, bench.n, unmetered, metered,
+				100 * (metered / unmetered - 1)), file=file)
+	finally:
+		sys.setrecursionlimit(limit)
+
+
+if __name__ == '__main__':
+	bench(sys.argv[1:] or None)
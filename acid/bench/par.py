@@ -0,0 +1,56 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Evaluates the `par` special form on a tree-recursive `fib`, for an increasing
+number of worker processes. Run with `python -m acid.bench.par [n]`.
+
+Contributors: myrma
+"""
+
+import os
+import sys
+import timeit
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env, configure
+
+
+FIB_CODE = """
+(define fib (lambda (n)
+	(if (< n 2)
+		n
+		(+ (fib (- n 1)) (fib (- n 2))))
+))
+
+(define pfib (lambda (n)
+	(if (< n 15)
+		(fib n)
+		(foldl + (par (pfib (- n 1)) (pfib (- n 2)))))
+))
+"""
+
+
+def bench(n, repeat=3):
+	env = default_env.copy()
+	Compiler(Parser.from_string(FIB_CODE)).load(env)
+
+	timer = lambda: env['fib'](n)
+	sequential = min(timeit.repeat(timer, number=1, repeat=repeat))
+	print('{:<12} {:.6f}s'.format('sequential', sequential))
+
+	workers = 1
+	while workers <= (os.cpu_count() or 1):
+		configure(workers=workers)
+
+		timer = lambda: env['pfib'](n)
+		best = min(timeit.repeat(timer, number=1, repeat=repeat))
+		print('{:<12} {:.6f}s  speedup {:.2f}x'.format(
+			'{} worker(s)'.format(workers), best, sequential / best))
+
+		workers *= 2
+
+
+if __name__ == '__main__':
+	bench(int(sys.argv[1]) if len(sys.argv) > 1 else 25)
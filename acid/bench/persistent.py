@@ -0,0 +1,55 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks recursive list builders using the persistent `append` against the
+former list-copying implementation. Run with `python -m acid.bench.persistent`.
+
+Contributors: myrma
+"""
+
+import sys
+import timeit
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env
+
+
+BUILD_CODE = """
+(define build (lambda (n)
+	(if (== n 0)
+		(list)
+		(append n (build (- n 1))))
+))
+
+(define run (lambda (n)
+	(# (build n) (- n 1))
+))
+"""
+
+
+def load(code, env):
+	compiler = Compiler(Parser.from_string(code))
+	compiler.load(env)
+	return env['run']
+
+
+def bench(sizes, repeat=5):
+	copying_env = default_env.copy()
+	copying_env['append'] = lambda x, xs: [x] + list(xs)
+
+	runs = [
+		('copying append', load(BUILD_CODE, copying_env)),
+		('persistent append', load(BUILD_CODE, default_env.copy())),
+	]
+
+	for n in sizes:
+		for name, run in runs:
+			best = min(timeit.repeat(lambda: run(n), number=1, repeat=repeat))
+			print('{:<20} n={:<10} {:.6f}s'.format(name, n, best))
+
+
+if __name__ == '__main__':
+	sys.setrecursionlimit(100000)
+	bench([int(arg) for arg in sys.argv[1:]] or [500, 1000, 2000, 4000])
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks a scripted REPL session, where the same expressions are evaluated
+many times, with and without the cache of compiled expressions. Run with
+`python -m acid.bench.repl [rounds]`.
+
+Contributors: myrma
+"""
+
+import sys
+import timeit
+
+from acid.repl import REPL
+
+
+SCRIPT = [
+	'(define square (lambda (x) (* x x)))',
+	'(square 12)',
+	'(foldl + (map square (range 0 100)))',
+	'(if (< (square 3) 10) "small" "large")',
+	'(length (filter (lambda (x) (== (mod x 2) 0)) (range 0 50)))',
+	':prompt "acid> "',
+	'{"a" 1 "b" (square 2)}',
+]
+
+
+def run_session(repl, rounds):
+	for _ in range(rounds):
+		for line in SCRIPT:
+			repl.parse_line(line).execute(repl)
+
+
+def bench(rounds, repeat=3):
+	for name, cache_size in (('without cache', 0), ('with cache', 256)):
+		repl = REPL(cache_size=cache_size)
+		best = min(timeit.repeat(lambda: run_session(repl, rounds),
+								 number=1, repeat=repeat))
+		lines = rounds * len(SCRIPT)
+		print('{:<14} {} lines {:.6f}s ({:.1f} us/line)'.format(
+			name, lines, best, best / lines * 1e6))
+
+
+if __name__ == '__main__':
+	bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
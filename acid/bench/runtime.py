@@ -0,0 +1,176 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks compiled Acid programs against equivalent idiomatic Python code.
+Each benchmark defines a `run` function taking a size `n`, in Acid and in
+Python; both are checked to return the same value, then timed over repeated
+runs. Run with `python -m acid --bench [name]` or
+`python -m acid.bench.runtime [name...]`.
+
+Contributors: myrma
+"""
+
+__all__ = ['Benchmark', 'BENCHMARKS', 'run_benchmarks']
+
+import sys
+import timeit
+import statistics
+from collections import namedtuple
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env
+
+
+Benchmark = namedtuple('Benchmark', 'name code python n')
+
+
+def _fib(n):
+	return n if n < 2 else _fib(n - 1) + _fib(n - 2)
+
+
+def _append_list(n):
+	acc = []
+
+	for i in range(1, n + 1):
+		acc.append(i)
+
+	return len(acc)
+
+
+def _pipeline(n):
+	return sum(x * x for x in range(n) if x % 3 == 0)
+
+
+def _strings(n):
+	acc = ''
+
+	for _ in range(n):
+		acc += 'ab'
+
+	return len(acc)
+
+
+def _depth(n):
+	return 0 if n == 0 else 1 + _depth(n - 1)
+
+
+BENCHMARKS = [
+	Benchmark('fib', """
+(define run (lambda (n)
+	(if (< n 2)
+		n
+		(+ (run (- n 1)) (run (- n 2))))
+))
+""", _fib, 20),
+
+	Benchmark('append', """
+(define build (lambda (i acc)
+	(if (== i 0)
+		acc
+		(build (- i 1) (append i acc)))
+))
+
+(define run (lambda (n) (length (build n (list)))))
+""", _append_list, 800),
+
+	Benchmark('pipeline', """
+(define run (lambda (n)
+	(foldl + (map (lambda (x) (* x x))
+			 (filter (lambda (x) (== (mod x 3) 0)) (range 0 n))))
+))
+""", _pipeline, 100000),
+
+	Benchmark('strings', """
+(define build (lambda (i acc)
+	(if (== i 0)
+		acc
+		(build (- i 1) (+ acc "ab")))
+))
+
+(define run (lambda (n) (length (build n ""))))
+""", _strings, 800),
+
+	Benchmark('recursion', """
+(define run (lambda (n)
+	(if (== n 0)
+		0
+		(+ 1 (run (- n 1))))
+))
+""", _depth, 5000),
+]
+
+
+# the deepest benchmarks recurse `n` times, through a few Python frames per
+# Acid call
+RECURSION_LIMIT = 50000
+
+
+def _load(code):
+	env = default_env.copy()
+	Compiler(Parser.from_string(code)).load(env)
+	return env['run']
+
+
+def _summary(times):
+	return {
+		'min': min(times),
+		'median': statistics.median(times),
+		'mean': statistics.mean(times),
+		'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+	}
+
+
+def run_benchmarks(names=None, repeat=7, file=None):
+	"""
+	Runs the selected benchmarks (all of them by default), prints their
+	timings and returns a dictionary mapping each benchmark name to the
+	statistics of its Acid and Python runs.
+	"""
+
+	file = file or sys.stdout
+	selected = [bench for bench in BENCHMARKS
+				if names is None or bench.name in names]
+
+	if names is not None and len(selected) != len(set(names)):
+		known = ', '.join(bench.name for bench in BENCHMARKS)
+		raise ValueError('Unknown benchmark (available: {})'.format(known))
+
+	limit = sys.getrecursionlimit()
+	sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+
+	print('{:<10} {:>8} {:>12} {:>12} {:>10} {:>10} {:>7}'.format(
+		'benchmark', 'n', 'acid', 'python', 'acid sd', 'python sd', 'ratio'),
+		  file=file)
+
+	results = {}
+
+	try:
+		for bench in selected:
+			run = _load(bench.code)
+
+			if run(bench.n) != bench.python(bench.n):
+				raise AssertionError(
+					'{}: Acid and Python results differ'.format(bench.name))
+
+			acid = _summary(timeit.repeat(
+				lambda: run(bench.n), number=1, repeat=repeat))
+			python = _summary(timeit.repeat(
+				lambda: bench.python(bench.n), number=1, repeat=repeat))
+
+			results[bench.name] = {'acid': acid, 'python': python}
+
+			print('{:<10} {:>8} {:>11.6f}s {:>11.6f}s {:>10.6f} {:>10.6f} '
+				  '{:>6.2f}x'.format(
+					bench.name, bench.n, acid['median'], python['median'],
+					acid['stdev'], python['stdev'],
+					acid['median'] / python['median']), file=file)
+	finally:
+		sys.setrecursionlimit(limit)
+
+	return results
+
+
+if __name__ == '__main__':
+	run_benchmarks(sys.argv[1:] or None)
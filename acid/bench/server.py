@@ -0,0 +1,76 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Compares the latency of cold `--exec` runs with runs through the execution
+server, using either the client script or an in-process client call.
+Run with `python -m acid.bench.server PATH [runs]`.
+
+Contributors: myrma
+"""
+
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+
+import acid.server.client as client
+
+
+def measure(func, runs):
+	times = []
+
+	for _ in range(runs):
+		start = time.perf_counter()
+		func()
+		times.append(time.perf_counter() - start)
+
+	return times
+
+
+def report(name, times):
+	print('{:<20} median {:.2f}ms  min {:.2f}ms'.format(
+		name, statistics.median(times) * 1000, min(times) * 1000))
+
+
+def wait_for(socket_path, timeout=10):
+	deadline = time.time() + timeout
+
+	while not os.path.exists(socket_path):
+		if time.time() > deadline:
+			raise RuntimeError('The server did not start')
+
+		time.sleep(0.05)
+
+
+def bench(path, runs=20):
+	socket_path = os.path.join(tempfile.mkdtemp(), 'acid.sock')
+	devnull = subprocess.DEVNULL
+
+	cold = [sys.executable, '-m', 'acid', '--exec', path]
+	report('cold --exec', measure(
+		lambda: subprocess.check_call(cold, stdout=devnull), runs))
+
+	server = subprocess.Popen(
+		[sys.executable, '-m', 'acid', '--serve', socket_path],
+		stdout=devnull)
+
+	try:
+		wait_for(socket_path)
+
+		script = [sys.executable, client.__file__, socket_path, path]
+		report('client script', measure(
+			lambda: subprocess.check_call(script, stdout=devnull), runs))
+
+		with open(os.devnull, 'w') as sink:
+			report('in-process client', measure(
+				lambda: client.run_remote(socket_path, path, stdout=sink), runs))
+	finally:
+		server.terminate()
+		server.wait()
+
+
+if __name__ == '__main__':
+	bench(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 20)
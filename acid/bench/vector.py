@@ -0,0 +1,53 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Benchmarks the vectorized `map` over a `vrange` against the generic `map` over
+a `range`. Run with `python -m acid.bench.vector [n]`.
+
+Contributors: myrma
+"""
+
+import sys
+import timeit
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env, vector_env
+
+
+SCALAR_CODE = """
+(define run (lambda (n)
+	(foldl + (map (lambda (x) (* x x)) (range 0 n)))
+))
+"""
+
+VECTOR_CODE = """
+(define run (lambda (n)
+	(vsum (map (lambda (x) (* x x)) (vrange 0 n)))
+))
+"""
+
+
+def load(code, env):
+	compiler = Compiler(Parser.from_string(code))
+	compiler.load(env)
+	return env['run']
+
+
+def bench(n, repeat=5):
+	runs = [
+		('map over range', load(SCALAR_CODE, default_env.copy())),
+		('map over vrange', load(VECTOR_CODE, vector_env())),
+	]
+
+	for name, run in runs:
+		best = min(timeit.repeat(lambda: run(n), number=1, repeat=repeat))
+		print('{:<20} n={:<10} {:.6f}s'.format(name, n, best))
+
+
+if __name__ == '__main__':
+	try:
+		bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
+	except ImportError as err:
+		print(err)
@@ -3,3 +3,10 @@
 
 from acid.compiler.compiler import *
 from acid.compiler.translations import *
+from acid.compiler.fusion import *
+from acid.compiler.vectorize import *
+from acid.compiler.specialize import *
+from acid.compiler.metering import *
+from acid.compiler.snapshot import *
+from acid.compiler.parallel import *
+from acid.compiler.build import *
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module compiles many Acid files at once, for `acid --compile`. Sources are
+given as files, directories (searched recursively for `.acid` files) or glob
+patterns, and each one is compiled to a `.acidc` file next to it.
+
+A compiled file starts with a header holding the hash of its source and of the
+compiler (see `runtime_fingerprint`), so that only the stale outputs are
+rebuilt. Files are compiled in a pool of processes, and written atomically.
+
+Contributors: myrma
+"""
+
+__all__ = ['find_sources', 'build']
+
+import os
+import sys
+import glob
+import time
+import marshal
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from acid.compiler.parallel import compile_code
+from acid.compiler.snapshot import runtime_fingerprint
+from acid.exception import ParseError, CompileError
+
+
+SOURCE_EXTENSION, COMPILED_EXTENSION = '.acid', '.acidc'
+
+
+def find_sources(paths):
+	"""
+	Returns the sorted list of the Acid files designated by files, directories
+	and glob patterns.
+	"""
+
+	sources = set()
+
+	for path in paths:
+		if glob.has_magic(path):
+			matches = glob.glob(path, recursive=True)
+		else:
+			matches = [path]
+
+		for match in matches:
+			if os.path.isdir(match):
+				for root, _, names in os.walk(match):
+					sources.update(
+						os.path.join(root, name) for name in names
+						if name.endswith(SOURCE_EXTENSION))
+			else:
+				sources.add(match)
+
+	return sorted(sources)
+
+
+def compiled_path(source):
+	return os.path.splitext(source)[0] + COMPILED_EXTENSION
+
+
+def _header(source_code):
+	return {
+		'source': hashlib.sha256(source_code.encode()).hexdigest(),
+		'runtime': runtime_fingerprint(),
+	}
+
+
+def _read_header(target):
+	try:
+		with open(target, 'rb') as file:
+			header = marshal.load(file)
+	except (OSError, EOFError, ValueError, TypeError):
+		return None
+
+	return header if isinstance(header, dict) else None
+
+
+def _umask():
+	# the umask can only be read by setting it
+	umask = os.umask(0)
+	os.umask(umask)
+	return umask
+
+
+def _compile_file(source, target):
+	"""
+	Compiles a file, and returns None or the description of the error.
+	"""
+
+	try:
+		with open(source) as file:
+			code = file.read()
+
+		# the files are already compiled in parallel with each other
+		code_object = compile_code(code, source, jobs=1)
+	except (ParseError, CompileError) as err:
+		return '{}:{}:{}: {}'.format(
+			source, err.pos.line, err.pos.column, err.msg)
+	except (OSError, SyntaxError, ValueError) as err:
+		return '{}: {}: {}'.format(source, type(err).__name__, err)
+
+	# written to a temporary file first, so that a concurrent run never reads
+	# a partial output
+	fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target) or '.',
+									suffix='.tmp')
+
+	try:
+		with os.fdopen(fd, 'wb') as tmp_file:
+			# created readable by the owner only, unlike a file opened with
+			# open()
+			os.fchmod(tmp_file.fileno(), 0o666 & ~_umask())
+
+			marshal.dump(_header(code), tmp_file)
+			marshal.dump(code_object, tmp_file)
+
+		os.replace(tmp_path, target)
+	except OSError as err:
+		os.unlink(tmp_path)
+		return '{}: {}'.format(target, err)
+
+	return None
+
+
+def _is_stale(source, target):
+	try:
+		with open(source) as file:
+			code = file.read()
+	except OSError:
+		# reported by the compilation
+		return True
+
+	return _read_header(target) != _header(code)
+
+
+def build(paths, jobs=None, force=False, file=None):
+	"""
+	Compiles the stale Acid files among `paths` with `jobs` processes, prints
+	a summary, and returns the list of the errors.
+	"""
+
+	file = file or sys.stdout
+	start = time.perf_counter()
+
+	sources = find_sources(paths)
+	stale = [source for source in sources
+			 if force or _is_stale(source, compiled_path(source))]
+
+	jobs = jobs or os.cpu_count() or 1
+
+	if jobs == 1 or len(stale) <= 1:
+		results = [_compile_file(source, compiled_path(source))
+				   for source in stale]
+	else:
+		with ProcessPoolExecutor(max_workers=jobs) as executor:
+			results = list(executor.map(
+				_compile_file, stale, map(compiled_path, stale),
+				chunksize=max(1, len(stale) // (jobs * 4))))
+
+	errors = [error for error in results if error is not None]
+	compiled = len(stale) - len(errors)
+	elapsed = time.perf_counter() - start
+
+	for error in errors:
+		print(error, file=file)
+
+	print('{} file(s) compiled, {} up to date, {} failed in {:.2f}s '
+		  '({:.1f} files/s)'.format(
+			compiled, len(sources) - len(stale), len(errors),
+			elapsed, compiled / elapsed if elapsed else 0), file=file)
+
+	return errors
@@ -13,10 +13,14 @@ import sys
 import ast
 import marshal
 import inspect
+import asyncio
 from functools import wraps
 
-from acid.parser import Parser
+from acid.parser import Parser, Declaration, Lambda
+from acid.parser.forms import read_forms, parse_form
 from acid.prelude import default_env
+from acid.compiler.functions import name_functions
+from acid.timings import phase
 
 
 class Compiler:
@@ -29,6 +33,28 @@ class Compiler:
 	def __init__(self, ast, path=None):
 		self.ast = ast
 		self.path = path
+		self.name_count = 0
+
+		# whether the node being translated is in the body of a coroutine
+		self.in_coroutine = False
+
+		# builtin names that are rebound by the program or its environment,
+		# which optimizations must not assume to be the prelude values
+		self.redefined = set()
+
+		# top-level declaration being translated, which names its functions
+		self.declaration = None
+
+		# Specializer instrumenting the top-level functions in adaptive mode
+		# (see `acid.compiler.specialize`)
+		self.adaptive = None
+
+		# types of the variables of a function being specialized
+		self.types = {}
+
+		# whether fuel checks are inserted in functions and loops (see
+		# `acid.compiler.metering`)
+		self.metered = False
 
 	@classmethod
 	def from_file(cls, path):
@@ -46,17 +72,51 @@ class Compiler:
 		Executes a Python code object stored in a file.
 		"""
 
+		with open(path, 'rb') as compiled_file:
+			code = marshal.load(compiled_file)
+
+			# the files written by `acid.compiler.build` start with a header
+			if isinstance(code, dict):
+				code = marshal.load(compiled_file)
+
+		cls.execute_code(code, prelude, mute_env)
+
+	@classmethod
+	def execute_code(cls, code, prelude=default_env, mute_env=False):
+		"""
+		Executes a compiled Python code object, then its main function.
+		"""
+
 		if mute_env:
 			env = prelude
 		else:
 			env = prelude.copy()
 
-		with open(path, 'rb') as compiled_file:
-			code = marshal.load(compiled_file)
-			exec(code, znv, env)
+		_exec_module(code, env)
+
+		_run_main_function(env)
+
+	@classmethod
+	def execute_stream(cls, stream, path=None, prelude=default_env,
+					   mute_env=False):
+		"""
+		Executes Acid code read from a stream of lines, then its main function.
+		Each top-level form is parsed, compiled and run as soon as it is read,
+		so that only one form is in memory at a time.
+
+		Unlike a whole module, a form is compiled knowing only the builtins
+		rebound by the forms before it, like in the REPL.
+		"""
 
-			_run_main_function(env)
+		if mute_env:
+			env = prelude
+		else:
+			env = prelude.copy()
 
+		for form in read_forms(stream):
+			cls(parse_form(form, path), path).load(env)
+
+		_run_main_function(env)
 
 	@classmethod
 	def register(cls, *node_types):
@@ -71,6 +131,9 @@ class Compiler:
 
 				if node.pos is not None:
 					py_node.lineno = node.pos.line
+					py_node.end_lineno = node.span.end.line
+					py_node.col_offset = node.pos.column - 1
+					py_node.end_col_offset = node.span.end.column - 1
 
 				return py_node
 
@@ -81,6 +144,15 @@ class Compiler:
 
 		return _decorator_wrapper
 
+	def fresh_name(self, prefix='tmp'):
+		"""
+		Returns a new Python identifier which cannot clash with an Acid name,
+		since Acid atoms cannot contain spaces.
+		"""
+
+		self.name_count += 1
+		return '{} {}'.format(prefix, self.name_count)
+
 	def translate(self, node):
 		"""
 		Translates an Acid AST node into a Python AST node.
@@ -89,15 +161,35 @@ class Compiler:
 		py_ast = self.translations[type(node)](self, node)
 		return ast.fix_missing_locations(py_ast)
 
-	def compile(self):
+	def compile(self, env=None):
+		"""
+		Compiles the Acid AST to a Python code object. `env` is the environment
+		the code will be run in, if it is already known.
+		"""
+
+		self.redefined = redefined_names(self.ast, env)
+
+		with phase('translate', path=self.path):
+			py_ast = self.translate(self.ast)
+
+		with phase('compile', path=self.path):
+			code = compile(py_ast, self.path or '<string>', mode='exec')
+			return name_functions(code, py_ast)
+
+	def compile_expr(self, env=None):
 		"""
-		Compiles the Acid AST to a Python code object.
+		Compiles the Acid AST, which must be an expression, to a Python code
+		object evaluating it with `eval`.
 		"""
 
-		py_ast = self.translate(self.ast)
+		self.redefined = redefined_names(self.ast, env)
 
-		code = compile(py_ast, self.path or '<string>', mode='exec')
-		return code
+		with phase('translate', path=self.path):
+			py_ast = ast.Expression(body=self.translate(self.ast))
+
+		with phase('compile', path=self.path):
+			code = compile(py_ast, self.path or '<string>', mode='eval')
+			return name_functions(code, py_ast)
 
 	def dump(self, target=None):
 		"""
@@ -118,9 +210,9 @@ class Compiler:
 		Runs the code in the given environment.
 		"""
 
-		code = self.compile()
+		code = self.compile(env)
 
-		exec(code, env, env)
+		_exec_module(code, env)
 
 	def execute(self, prelude=default_env, mute_env=False):
 		"""
@@ -137,6 +229,49 @@ class Compiler:
 		_run_main_function(env)
 
 
+def _exec_module(code, env):
+	with phase('execute', path=code.co_filename):
+		exec(code, env, env)
+
+
+def redefined_names(node, env=None):
+	"""
+	Returns the builtin names which the AST rebinds, or whose value in `env`
+	is not the prelude one, and which optimizations must not assume.
+	"""
+
+	names = _bound_names(node)
+
+	# only the builtins matter: the environment can be much bigger than the
+	# prelude, and is compiled against once per form when streaming
+	if env is not None:
+		names.update(
+			name for name, value in default_env.items()
+			if not _is_prelude_value(env.get(name), value)
+		)
+
+	return names
+
+
+def _is_prelude_value(value, prelude_value):
+	# the builtins of the prelude extensions (see `acid.prelude.vector`) name
+	# the prelude builtin they extend, which they behave like on scalars
+	return (value is prelude_value
+			or getattr(value, 'extends', None) is prelude_value)
+
+
+def _bound_names(node):
+	names = set()
+
+	for sub_node in node.walk():
+		if isinstance(sub_node, Declaration):
+			names.add(sub_node.name)
+		elif isinstance(sub_node, Lambda):
+			names.update(sub_node.params)
+
+	return names
+
+
 def _run_main_function(env):
 	try:
 		main = env['main']
@@ -146,9 +281,20 @@ def _run_main_function(env):
 		sig = inspect.signature(main)
 		params = sig.parameters
 
-		if len(params) == 0:
-			main()
-		elif len(params) == 1:
-			main(sys.argv)
-		else:
+		if len(params) > 1:
 			raise RuntimeError("Function main expects more than one argument")
+
+		with phase('main'):
+			if len(params) == 0:
+				result = main()
+			else:
+				result = main(sys.argv)
+
+			if inspect.iscoroutine(result):
+				# asynchronous main: drive it on an event loop
+				loop = asyncio.new_event_loop()
+
+				try:
+					loop.run_until_complete(result)
+				finally:
+					loop.close()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module maps the code objects of compiled Acid functions back to their Acid
+name and source span, so that they can be reported in Acid terms (see
+`acid.profiler`).
+
+Python names the code of every lambda `<lambda>`: once a module is compiled,
+the code objects of its lambdas are renamed after the declaration which binds
+them, or `<declaration>.<lambda>` for nested anonymous functions.
+
+Contributors: myrma
+"""
+
+__all__ = ['FunctionInfo', 'function_info', 'name_functions']
+
+import ast
+import types
+import weakref
+from collections import namedtuple
+
+
+FunctionInfo = namedtuple('FunctionInfo', 'name path span')
+
+
+# code object -> FunctionInfo, for the Acid functions compiled so far
+_functions = weakref.WeakKeyDictionary()
+
+
+def function_info(code):
+	"""
+	Returns the FunctionInfo of a code object, or None if it was not compiled
+	from an Acid function.
+	"""
+
+	return _functions.get(code)
+
+
+def name_functions(code, py_ast):
+	"""
+	Renames and registers the code objects of the Acid functions nested in the
+	code compiled from the Python AST `py_ast`. Returns the new module code.
+	"""
+
+	return _link(code, [py_ast])
+
+
+def _link(code, nodes):
+	scopes = [scope for node in nodes for scope in _nested_scopes(node)]
+	children = [const for const in code.co_consts
+				if isinstance(const, types.CodeType)]
+
+	# nested code objects are paired with the AST nodes they are compiled from:
+	# give up if they do not match, rather than misnaming functions
+	if len(scopes) != len(children) or any(
+			child.co_firstlineno != scope.lineno
+			for scope, child in zip(scopes, children)):
+		return code
+
+	renamed = {}
+
+	for scope, child in zip(scopes, children):
+		new_child = _link(child, _scope_body(scope))
+		info = getattr(scope, 'acid_function', None)
+
+		if info is not None:
+			new_child = _rename(new_child, info.name)
+			_functions[new_child] = info
+
+		renamed[id(child)] = new_child
+
+	if not hasattr(code, 'replace'):
+		# code objects are immutable before Python 3.8
+		return code
+
+	consts = tuple(renamed.get(id(const), const) for const in code.co_consts)
+	return code.replace(co_consts=consts)
+
+
+def _rename(code, name):
+	if not hasattr(code, 'replace'):
+		return code
+
+	if hasattr(code, 'co_qualname'):
+		return code.replace(co_name=name, co_qualname=name)
+
+	return code.replace(co_name=name)
+
+
+def _nested_scopes(node):
+	"""
+	Yields the nodes in `node` which are compiled to nested code objects, in
+	the order CPython adds them to the constants of the enclosing code.
+	"""
+
+	if isinstance(node, ast.GeneratorExp):
+		yield node
+
+		# the outermost iterable is evaluated in the enclosing scope, once the
+		# generator code is built
+		yield from _nested_scopes(node.generators[0].iter)
+		return
+
+	if isinstance(node, (ast.Lambda, ast.FunctionDef, ast.AsyncFunctionDef)):
+		yield node
+		return
+
+	if isinstance(node, ast.Dict):
+		children = [elt for pair in zip(node.keys, node.values) for elt in pair]
+	elif isinstance(node, ast.Assign):
+		children = [node.value] + node.targets
+	else:
+		children = ast.iter_child_nodes(node)
+
+	for child in children:
+		yield from _nested_scopes(child)
+
+
+def _scope_body(scope):
+	# the nodes compiled in the code object of a scope
+	if isinstance(scope, ast.Lambda):
+		return [scope.body]
+
+	if isinstance(scope, ast.GeneratorExp):
+		first, *others = scope.generators
+		return [first.target] + first.ifs + others + [scope.elt]
+
+	return scope.body
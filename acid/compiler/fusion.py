@@ -0,0 +1,152 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines a recognition pass which fuses `foldl` pipelines made of
+`map` and `filter` over a `range` into a single Python generator expression,
+so that no intermediate sequence is built.
+
+ex: `(foldl + (map (lambda (x) (* x x)) (filter even (range 0 n))))` compiles
+to the equivalent of:
+
+	foldl(+, (v2 for v1 in range(0, n) if even(v1) for v2 in (*(v1, v1),)))
+
+Contributors: myrma
+"""
+
+__all__ = ['fuse_pipeline']
+
+import copy
+import ast as python_ast
+
+from acid.parser.ast import *
+from acid.compiler.metering import meter_loop
+
+
+def fuse_pipeline(compiler, call):
+	"""
+	Translates a `foldl`/`map`/`filter`/`range` pipeline into a fused Python
+	node. Returns None when the call is not a fusable pipeline.
+	"""
+
+	if not _is_builtin_call(compiler, call, 'foldl'):
+		return None
+
+	func, seq = call.args
+	stages = []
+
+	while (_is_builtin_call(compiler, seq, 'map')
+			or _is_builtin_call(compiler, seq, 'filter')):
+		stages.append((seq.func.name, seq.args[0]))
+		seq = seq.args[1]
+
+	if not stages or not _is_builtin_call(compiler, seq, 'range'):
+		return None
+
+	# only variables and unary lambdas can be inlined without changing the
+	# evaluation order of the program
+	for _, stage_func in stages:
+		if isinstance(stage_func, Lambda):
+			if len(stage_func.params) != 1:
+				return None
+
+			# an inlined body would make the generator asynchronous
+			if any(isinstance(node, Await) for node in stage_func.walk()):
+				return None
+		elif not isinstance(stage_func, Variable):
+			return None
+
+	var = compiler.fresh_name('fused')
+	generators = [_comprehension(var, compiler.translate(seq))]
+
+	# the inlined stages do not check their fuel when metered
+	meter_loop(compiler, generators[0])
+
+	# the innermost stage is applied first
+	for name, stage_func in reversed(stages):
+		value = _apply(compiler, stage_func, var)
+
+		if name == 'filter':
+			generators[-1].ifs.append(value)
+		else:
+			var = compiler.fresh_name('fused')
+			item = python_ast.Tuple(elts=[value], ctx=python_ast.Load())
+			generators.append(_comprehension(var, item))
+
+	return python_ast.Call(
+		func=compiler.translate(call.func),
+		args=[
+			compiler.translate(func),
+			python_ast.GeneratorExp(
+				elt=python_ast.Name(var, python_ast.Load()),
+				generators=generators
+			)
+		],
+		keywords=[]
+	)
+
+
+def _is_builtin_call(compiler, node, name):
+	return (isinstance(node, Call)
+			and isinstance(node.func, Variable)
+			and node.func.name == name
+			and name not in compiler.redefined
+			and len(node.args) == 2)
+
+
+def _comprehension(var, iter):
+	return python_ast.comprehension(
+		target=python_ast.Name(var, python_ast.Store()),
+		iter=iter,
+		ifs=[],
+		is_async=0
+	)
+
+
+def _apply(compiler, func, var):
+	"""
+	Translates the application of a stage function to the variable `var`.
+	Lambdas are inlined by renaming their parameter.
+	"""
+
+	if isinstance(func, Lambda):
+		body = _rename(func.body, func.params[0], var)
+		return compiler.translate(body)
+
+	return python_ast.Call(
+		func=compiler.translate(func),
+		args=[python_ast.Name(var, python_ast.Load())],
+		keywords=[]
+	)
+
+
+def _rename(node, old, new):
+	"""
+	Returns a copy of the node where free occurrences of the variable `old` are
+	renamed to `new`.
+	"""
+
+	if isinstance(node, Variable):
+		if node.name != old:
+			return node
+
+		var = Variable(new)
+		var.span = node.span
+		return var
+
+	if isinstance(node, Lambda) and old in node.params:
+		# `old` is shadowed in the lambda body
+		return node
+
+	renamed = copy.copy(node)
+
+	for attr, value in vars(node).items():
+		if isinstance(value, Node):
+			setattr(renamed, attr, _rename(value, old, new))
+		elif isinstance(value, list):
+			setattr(renamed, attr, [
+				_rename(elt, old, new) if isinstance(elt, Node) else elt
+				for elt in value
+			])
+
+	return renamed
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines the metered execution of Acid code, which limits the number
+of steps it runs, its duration and the size of the collections built by its
+builtins.
+
+When compiling in metered mode, the compiler inserts a fuel check at the entry
+of every function and in every loop of a fused pipeline. A check costs a single
+call to `next` on an `itertools.repeat` iterator, which yields True as long as
+fuel remains:
+
+	lambda x: (next(fuel, False) or refuel()) and <body>
+
+Once the fuel is exhausted, `Meter.refuel` counts the steps, checks the limits
+and gives more fuel, so that the limits are only examined every
+`check_interval` steps.
+
+ex:
+	meter = Meter(max_steps=10 ** 6, max_time=2.0, max_allocation=10 ** 6)
+	meter.execute(Compiler.from_file(path))
+
+Builtins running a loop in C (`foldl` over a `range`, for example) are not
+metered step by step: `max_allocation` bounds their size, and the worker of
+`acid.sandbox` bounds their CPU time.
+
+Metered code cannot bind the names reserved to the runtime (`__acid_fuel__`,
+`__builtins__`...), which would disable the checks. It only sees a restricted
+set of Python builtins, which give no access to the environment nor to the
+modules, and runs without the Acid builtins reaching the file system or the
+network (`read-file`, `tcp-request`...).
+
+Contributors: myrma
+"""
+
+__all__ = ['Meter', 'FUEL', 'REFUEL', 'SAFE_BUILTINS', 'UNSAFE_BUILTINS']
+
+import ast as python_ast
+import time
+import builtins
+import operator as op
+from itertools import repeat, islice
+from functools import reduce
+
+from acid.prelude import default_env, Seq
+from acid.prelude.rope import concat
+from acid.exception import (CompileError, StepLimitExceeded,
+							TimeLimitExceeded, AllocationLimitExceeded)
+
+
+# names of the fuel iterator, of the refuel function and of `next` in the
+# environment, which metered code cannot rebind (see `check_binding`)
+FUEL = '__acid_fuel__'
+REFUEL = '__acid_refuel__'
+NEXT = '__acid_next__'
+
+# number of steps between two checks of the limits
+CHECK_INTERVAL = 10000
+
+# Python builtins visible to metered code: the ones reaching the environment,
+# the attributes of objects or the modules (`globals`, `getattr`,
+# `__import__`...) are left out
+SAFE_BUILTINS = {
+	name: getattr(builtins, name) for name in (
+		'abs', 'all', 'any', 'bool', 'chr', 'dict', 'divmod', 'enumerate',
+		'float', 'frozenset', 'hash', 'int', 'len', 'list', 'max', 'min',
+		'ord', 'pow', 'repr', 'reversed', 'round', 'set', 'sorted', 'str',
+		'sum', 'tuple',
+	)
+}
+
+# Acid builtins reaching the file system or the network, which are removed
+# from the environment of metered code
+UNSAFE_BUILTINS = (
+	'read-file', 'write-file', 'open-lines', 'read-chunks', 'write-lines',
+	'tcp-request',
+)
+
+
+def fuel_check():
+	"""
+	Returns a Python expression consuming a step, which is always true unless
+	it raises a limit exception.
+	"""
+
+	def load(name):
+		return python_ast.Name(name, python_ast.Load())
+
+	return python_ast.BoolOp(python_ast.Or(), [
+		python_ast.Call(load(NEXT), [load(FUEL), python_ast.Constant(False)],
+						[]),
+		python_ast.Call(load(REFUEL), [], []),
+	])
+
+
+def check_binding(compiler, name, node):
+	"""
+	Raises a CompileError if a declaration or a parameter binds a name
+	reserved to the runtime, when compiling in metered or adaptive mode.
+	"""
+
+	if not name.startswith('__') or not name.endswith('__'):
+		return
+
+	for mode in ('metered', 'adaptive'):
+		if getattr(compiler, mode):
+			msg = 'Cannot bind the reserved name {!r} in {} mode'.format(
+				name, mode)
+			raise CompileError(node.pos, msg, compiler.path)
+
+
+def meter_body(compiler, body):
+	"""
+	Prepends a fuel check to the translated body of a function, when
+	compiling in metered mode.
+	"""
+
+	if not compiler.metered:
+		return body
+
+	return python_ast.BoolOp(python_ast.And(), [fuel_check(), body])
+
+
+def meter_loop(compiler, comprehension):
+	"""
+	Adds a fuel check to each iteration of a comprehension, when compiling in
+	metered mode.
+	"""
+
+	if compiler.metered:
+		comprehension.ifs.insert(0, fuel_check())
+
+
+class Meter:
+	"""
+	Runs metered code within limits. A limit of None is not enforced.
+	"""
+
+	def __init__(self, max_steps=None, max_time=None, max_allocation=None,
+				 check_interval=CHECK_INTERVAL):
+		self.max_steps = max_steps
+		self.max_time = max_time
+		self.max_allocation = max_allocation
+		self.check_interval = check_interval
+
+		self.env = None
+		self.steps = 0
+		self.granted = 0
+		self.deadline = None
+
+	def install(self, env):
+		"""
+		Makes the environment run metered code, without the builtins reaching
+		the file system or the network, and starts counting its steps and its
+		time.
+		"""
+
+		self.env = env
+		env['__builtins__'] = dict(SAFE_BUILTINS)
+
+		for name in UNSAFE_BUILTINS:
+			env.pop(name, None)
+
+		env[NEXT] = next
+		env[REFUEL] = self.refuel
+
+		if self.max_allocation is not None:
+			env.update(self._capped_builtins(env))
+
+		self.steps = 0
+		self.granted = 0
+
+		if self.max_time is not None:
+			self.deadline = time.perf_counter() + self.max_time
+
+		self._grant()
+		return env
+
+	@property
+	def steps_used(self):
+		"""
+		Number of steps run so far.
+		"""
+
+		fuel = self.env.get(FUEL) if self.env is not None else None
+		remaining = op.length_hint(fuel) if fuel is not None else 0
+		return self.steps + self.granted - remaining
+
+	def _grant(self):
+		self.granted = self.check_interval
+
+		if self.max_steps is not None:
+			self.granted = min(self.granted, self.max_steps - self.steps)
+
+		self.env[FUEL] = repeat(True, self.granted)
+
+	def refuel(self):
+		"""
+		Called by the metered code when its fuel is exhausted: raises a limit
+		exception, or gives more fuel and returns True.
+		"""
+
+		self.steps += self.granted
+
+		if self.max_steps is not None and self.steps >= self.max_steps:
+			raise StepLimitExceeded(
+				'step limit of {} exceeded'.format(self.max_steps))
+
+		if self.deadline is not None and time.perf_counter() >= self.deadline:
+			raise TimeLimitExceeded(
+				'time limit of {}s exceeded'.format(self.max_time))
+
+		self._grant()
+		return True
+
+	def _check_allocation(self, size, name):
+		if size > self.max_allocation:
+			raise AllocationLimitExceeded(
+				'{} of {} elements exceeds the allocation limit of {}'.format(
+					name, size, self.max_allocation))
+
+	def _capped_builtins(self, env):
+		"""
+		Returns the builtins which can build big collections, checking their
+		size beforehand.
+		"""
+
+		max_allocation = self.max_allocation
+		check = self._check_allocation
+		range_, add = env['range'], env['+']
+
+		def capped_range(start, end):
+			check(end - start, 'range')
+			return range_(start, end)
+
+		def capped_force(xs):
+			elements = list(islice(xs, max_allocation + 1))
+			check(len(elements), 'force')
+			return elements
+
+		def capped_add(*xs):
+			if not isinstance(xs[0], (int, float)):
+				# lazy sequences are chained without being computed
+				check(sum(len(x) for x in xs
+						  if hasattr(x, '__len__') and not isinstance(x, Seq)),
+					  '+')
+
+			return add(*xs)
+
+		def capped_mul(*xs):
+			# repetition of a sequence
+			if not all(isinstance(x, (int, float)) for x in xs):
+				size = 1
+
+				for x in xs:
+					size *= len(x) if hasattr(x, '__len__') else x
+
+				check(size, '*')
+
+			return reduce(op.mul, xs)
+
+		capped = {
+			'range': capped_range,
+			'force': capped_force,
+			'*': capped_mul,
+		}
+
+		# only the prelude concatenation is known to allocate its result
+		if add is concat:
+			capped['+'] = capped_add
+
+		return capped
+
+	def execute(self, compiler, prelude=default_env):
+		"""
+		Compiles an Acid program in metered mode, then executes it and its main
+		function within the limits.
+		"""
+
+		compiler.metered = True
+		self.execute_code(compiler.compile(), prelude)
+
+	def execute_code(self, code, prelude=default_env):
+		"""
+		Executes code compiled in metered mode, then its main function, within
+		the limits.
+		"""
+
+		from acid.compiler.compiler import _exec_module, _run_main_function
+
+		env = self.install(prelude.copy())
+		_exec_module(code, env)
+		_run_main_function(env)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module parses and translates a huge Acid file in parallel. The code is cut
+at its top-level forms by the pre-scan of `acid.parser.forms`, and the forms are
+grouped into chunks which are lexed, parsed and translated by a pool of worker
+processes. The Python statements of the chunks are then put back together, in
+their original order, into a single module.
+
+Since the chunks are parsed with the positions they have in the whole file, the
+error positions and the line numbers of the compiled code are the same as with
+a sequential compilation.
+
+Contributors: myrma
+"""
+
+__all__ = ['translate_parallel', 'compile_parallel', 'compile_code',
+		   'compile_file']
+
+import os
+import ast
+from concurrent.futures import ProcessPoolExecutor
+
+from acid.parser import Parser
+from acid.parser.ast import Program
+from acid.parser.forms import scan_forms, parse_form
+from acid.prelude import default_env
+from acid.compiler.compiler import Compiler, redefined_names
+from acid.compiler.functions import name_functions
+from acid.exception import ParseError, CompileError
+from acid.timings import phase
+
+
+# files smaller than this are compiled sequentially, the pool not being worth
+# its startup cost
+PARALLEL_THRESHOLD = 1 << 18
+
+# number of chunks per worker, so that the workers stay busy when the chunks
+# do not take the same time
+CHUNKS_PER_JOB = 4
+
+
+def _make_chunks(code, forms, count):
+	"""
+	Groups consecutive forms into about `count` chunks of similar sizes.
+	"""
+
+	chunks, chunk = [], []
+	size = max(1, len(code) // count)
+	start = 0
+
+	for form in forms:
+		chunk.append(form)
+		end = form.offset + len(form.text)
+
+		if end - start >= size:
+			chunks.append(chunk)
+			chunk, start = [], end
+
+	if chunk:
+		chunks.append(chunk)
+
+	return chunks
+
+
+def _translate_chunk(chunk, path, redefined):
+	"""
+	Parses and translates a chunk in a worker process. `redefined` are the
+	builtin names rebound in the other chunks, if they are known.
+
+	Returns the Python statements and the builtin names the chunk rebinds, or
+	the error: the exceptions are not sent back as is, since they cannot be
+	pickled.
+	"""
+
+	try:
+		# each form is parsed on its own, which is much faster than parsing
+		# their whole token list at once
+		instructions = [instr for form in chunk
+						for instr in parse_form(form, path).instructions]
+		program = Program(instructions, path)
+
+		compiler = Compiler(program, path)
+		rebound = redefined_names(program)
+		compiler.redefined = rebound | (redefined or set())
+
+		module = compiler.translate(program)
+	except ParseError as err:
+		return 'parse', err.pos, err.msg
+	except CompileError as err:
+		return 'compile', err.pos, err.msg
+
+	return 'ok', module.body, rebound & default_env.keys()
+
+
+def translate_parallel(code, path=None, jobs=None):
+	"""
+	Translates Acid code into a Python module with `jobs` worker processes, or
+	in this process if `jobs` is 1. Raises the ParseError or CompileError of
+	the first invalid form.
+	"""
+
+	jobs = jobs or os.cpu_count() or 1
+
+	with phase('scan', path=path):
+		forms, _ = scan_forms(code)
+
+	chunks = _make_chunks(code, forms, jobs * CHUNKS_PER_JOB)
+
+	with phase('translate', path=path), _executor(jobs) as executor:
+		results = list(executor.map(
+			_translate_chunk, chunks, [path] * len(chunks),
+			[None] * len(chunks)))
+
+		# each chunk assumed that the builtins rebound in the other chunks
+		# were not: the ones for which it was wrong are translated again
+		results = _check_results(code, path, results)
+		rebound = set().union(*(result[2] for result in results))
+
+		retranslated = [index for index, result in enumerate(results)
+						if not rebound <= result[2]]
+
+		for index, result in zip(retranslated, executor.map(
+				_translate_chunk, [chunks[index] for index in retranslated],
+				[path] * len(retranslated), [rebound] * len(retranslated))):
+			results[index] = result
+
+		results = _check_results(code, path, results)
+
+	body = [stmt for _, stmts, _ in results for stmt in stmts]
+	return ast.Module(body=body, type_ignores=[])
+
+
+class _InlineExecutor:
+	"""
+	Stands for a pool of a single worker, running the calls in this process.
+	"""
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		pass
+
+	def map(self, func, *iterables):
+		return map(func, *iterables)
+
+
+def _executor(jobs):
+	if jobs == 1:
+		return _InlineExecutor()
+
+	return ProcessPoolExecutor(max_workers=jobs)
+
+
+def _check_results(code, path, results):
+	# the first error in the file is raised, as a sequential parse would
+	for result in results:
+		if result[0] == 'parse':
+			raise ParseError(code, result[1], result[2])
+		elif result[0] == 'compile':
+			raise CompileError(result[1], result[2], path)
+
+	return results
+
+
+def compile_parallel(code, path=None, jobs=None):
+	"""
+	Compiles Acid code to a Python code object, translating it in parallel.
+	"""
+
+	py_ast = translate_parallel(code, path, jobs)
+
+	with phase('compile', path=path):
+		module_code = compile(py_ast, path or '<string>', mode='exec')
+		return name_functions(module_code, py_ast)
+
+
+def compile_code(code, path=None, jobs=None):
+	"""
+	Compiles Acid code to a Python code object, in parallel if it is big
+	enough.
+	"""
+
+	# big codes are parsed form by form, even with a single job
+	if len(code) >= PARALLEL_THRESHOLD:
+		return compile_parallel(code, path, jobs)
+
+	return Compiler(Parser(code, path).run(), path).compile()
+
+
+def compile_file(path, jobs=None):
+	"""
+	Compiles an Acid file, in parallel if it is big enough.
+	"""
+
+	with open(path) as file:
+		code = file.read()
+
+	return compile_code(code, path, jobs)
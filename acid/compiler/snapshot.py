@@ -0,0 +1,216 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines snapshots of evaluated Acid modules. A snapshot stores the
+environment obtained after running the top-level declarations of a program, so
+that later runs can restore it and call `main` directly, without parsing,
+compiling or evaluating the declarations again.
+
+Functions are stored as their marshalled code object and closure, and are
+rebuilt in the restored environment; builtins are stored by name. A snapshot is
+stale, and ignored, when the program source, the prelude, the parser or the
+compiler have changed since it was written, or when it cannot be read back.
+Programs whose environment holds values that cannot be pickled (such as the
+lazy sequences of `read-chunks`, or structures too deep for the pickler) are
+run without a snapshot.
+
+Contributors: myrma
+"""
+
+__all__ = ['save_snapshot', 'load_snapshot', 'execute_with_snapshot']
+
+import io
+import os
+import sys
+import types
+import pickle
+import marshal
+import hashlib
+
+import acid.parser
+import acid.prelude
+import acid.compiler
+from acid.compiler.compiler import Compiler, _run_main_function
+from acid.prelude import default_env
+
+
+_runtime_fingerprint = None
+
+
+def runtime_fingerprint():
+	"""
+	Hashes the sources of the parser, of the prelude and of the compiler,
+	along with the Python version, since they determine the content of an
+	environment.
+	"""
+
+	global _runtime_fingerprint
+
+	if _runtime_fingerprint is None:
+		digest = hashlib.sha256(sys.implementation.cache_tag.encode())
+
+		for package in (acid.parser, acid.prelude, acid.compiler):
+			directory = os.path.dirname(package.__file__)
+
+			for name in sorted(os.listdir(directory)):
+				if name.endswith('.py'):
+					with open(os.path.join(directory, name), 'rb') as file:
+						digest.update(file.read())
+
+		_runtime_fingerprint = digest.hexdigest()
+
+	return _runtime_fingerprint
+
+
+def _source_hash(source):
+	return hashlib.sha256(source.encode()).hexdigest()
+
+
+class _EnvPickler(pickle.Pickler):
+	"""
+	Pickles the values of an environment, replacing code objects, functions
+	defined in the environment and builtins with persistent references.
+	"""
+
+	def __init__(self, file, env, prelude):
+		super().__init__(file, pickle.HIGHEST_PROTOCOL)
+		self.env = env
+		self.builtins = {id(value): name for name, value in prelude.items()}
+		self.prelude = prelude
+
+	def persistent_id(self, obj):
+		if isinstance(obj, types.CodeType):
+			return ('code', marshal.dumps(obj))
+
+		if isinstance(obj, types.FunctionType) and obj.__globals__ is self.env:
+			closure = tuple(cell.cell_contents for cell in obj.__closure__ or ())
+			return ('function', marshal.dumps(obj.__code__), obj.__name__, closure)
+
+		name = self.builtins.get(id(obj))
+
+		if name is not None and self.prelude[name] is obj:
+			return ('builtin', name)
+
+		return None
+
+
+class _EnvUnpickler(pickle.Unpickler):
+	"""
+	Restores the persistent references of `_EnvPickler` in a given
+	environment.
+	"""
+
+	def __init__(self, file, env, prelude):
+		super().__init__(file)
+		self.env = env
+		self.prelude = prelude
+
+	def persistent_load(self, pid):
+		kind = pid[0]
+
+		if kind == 'code':
+			return marshal.loads(pid[1])
+
+		if kind == 'function':
+			_, code, name, closure = pid
+			cells = tuple(_make_cell(value) for value in closure)
+			return types.FunctionType(
+				marshal.loads(code), self.env, name, None, cells or None)
+
+		if kind == 'builtin':
+			return self.prelude[pid[1]]
+
+		raise pickle.UnpicklingError('Unknown reference {!r}'.format(kind))
+
+
+def _make_cell(value):
+	return (lambda: value).__closure__[0]
+
+
+def save_snapshot(env, path, source, prelude=default_env):
+	"""
+	Writes the values of `env` that are not builtins to a snapshot file.
+	`source` is the code of the program which produced the environment.
+	Returns False, without writing anything, if a value cannot be pickled.
+	"""
+
+	values = {
+		name: value for name, value in env.items()
+		if not (name in prelude and prelude[name] is value)
+		and name != '__builtins__'
+	}
+
+	header = {'source': _source_hash(source), 'runtime': runtime_fingerprint()}
+	buffer = io.BytesIO()
+
+	pickle.dump(header, buffer)
+
+	try:
+		_EnvPickler(buffer, env, prelude).dump(values)
+	except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+		# unpicklable objects raise a TypeError, local functions and classes
+		# an AttributeError, and deeply nested values a RecursionError
+		return False
+
+	# written atomically, since a concurrent run may be reading it
+	tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+
+	with open(tmp_path, 'wb') as file:
+		file.write(buffer.getvalue())
+
+	os.replace(tmp_path, path)
+	return True
+
+
+def load_snapshot(path, source, prelude=default_env):
+	"""
+	Restores an environment from a snapshot file. Returns None if the file
+	does not exist, if the snapshot is stale or if it is corrupt.
+	"""
+
+	try:
+		file = open(path, 'rb')
+	except FileNotFoundError:
+		return None
+
+	with file:
+		try:
+			header = pickle.load(file)
+
+			if header != {'source': _source_hash(source),
+						  'runtime': runtime_fingerprint()}:
+				return None
+
+			env = prelude.copy()
+			env.update(_EnvUnpickler(file, env, prelude).load())
+		except (pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+			# truncated or corrupt file, the program is evaluated again
+			return None
+
+	return env
+
+
+def execute_with_snapshot(path, snapshot_path=None, prelude=default_env):
+	"""
+	Executes an Acid file, restoring its evaluated environment from a snapshot
+	when possible, and writing a new snapshot otherwise.
+	"""
+
+	if snapshot_path is None:
+		snapshot_path = os.path.splitext(path)[0] + '.acidsnap'
+
+	with open(path) as file:
+		source = file.read()
+
+	env = load_snapshot(snapshot_path, source, prelude)
+
+	if env is None:
+		env = prelude.copy()
+		compiler = Compiler.from_file(path)
+		compiler.load(env)
+
+		# the program still runs when its environment cannot be saved
+		save_snapshot(env, snapshot_path, source, prelude)
+
+	_run_main_function(env)
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines the adaptive execution mode, which specializes the hot
+Acid functions for the types of their arguments.
+
+In adaptive mode, the top-level functions are compiled as usual, but are first
+called through an instrumented wrapper recording the types of their
+arguments. Once a function has been called `threshold` times with always the
+same numeric types, it is compiled again from its Acid AST, its arithmetic and
+comparison builtin calls on these types being translated into native Python
+operators:
+
+	(define fib (lambda (n)
+		(if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+
+is then specialized for `int` into the equivalent of:
+
+	fib = lambda n: ((n if n < 2 else +(fib(n - 1), fib(n - 2)))
+					 if type(n) is int else generic_fib(n))
+
+The guard falls back to the generic version for other types, and too many
+fallbacks revert the function to its generic version. A function whose types
+are not stable is bound to its generic version, so that only the hot functions
+pay for the instrumentation, during their first calls.
+
+ex:
+	specializer = Specializer()
+	specializer.execute(Compiler.from_file(path))
+	specializer.print_stats()
+
+Contributors: myrma
+"""
+
+__all__ = ['Specializer', 'SpecializationEvent', 'ADAPTIVE']
+
+import sys
+import ast as python_ast
+import time
+from collections import namedtuple
+
+from acid.parser.ast import *
+from acid.prelude import default_env
+
+
+# name of the specializer in the environment, which Acid code cannot rebind in
+# adaptive mode (see `metering.check_binding`)
+ADAPTIVE = '__acid_adaptive__'
+
+# number of calls after which the types of a function are examined
+HOT_THRESHOLD = 1000
+
+# number of fallbacks after which a specialization is dropped
+MAX_FALLBACKS = 1000
+
+# signatures recorded before a function is known not to be stable
+MAX_SIGNATURES = 4
+
+# types of the arguments that specializations are compiled for
+SPECIALIZABLE_TYPES = (int, float)
+
+INSTRUMENTED, SPECIALIZED, GENERIC, DEOPTIMIZED = (
+	'instrumented', 'specialized', 'generic', 'deoptimized')
+
+
+# `kind` is the new state of the function, and `detail` gives the signature it
+# was specialized for, or why it was not
+SpecializationEvent = namedtuple('SpecializationEvent',
+								 'time name kind detail')
+
+
+# native operators of the builtins, and whether they take any number of
+# arguments
+_ARITHMETIC = {
+	'+': (python_ast.Add, True),
+	'*': (python_ast.Mult, True),
+	'-': (python_ast.Sub, False),
+	'/': (python_ast.Div, False),
+	'div': (python_ast.FloorDiv, False),
+	'mod': (python_ast.Mod, False),
+}
+
+_COMPARISONS = {
+	'==': python_ast.Eq,
+	'!=': python_ast.NotEq,
+	'<': python_ast.Lt,
+	'<=': python_ast.LtE,
+	'>': python_ast.Gt,
+	'>=': python_ast.GtE,
+}
+
+
+class FunctionRecord:
+	"""
+	Runtime information about an instrumented function.
+	"""
+
+	def __init__(self, name, declaration, path, redefined):
+		self.name = name
+		self.declaration = declaration
+		self.path = path
+		self.redefined = redefined
+
+		self.state = INSTRUMENTED
+		self.calls = 0
+		self.signatures = {}
+		self.signature = None
+		self.fallbacks = 0
+
+		self.generic = None
+		self.wrapper = None
+
+		# function the name of the function is bound to by the specializer
+		self.bound = None
+
+		# function called by the wrapper once the types are examined
+		self.target = None
+
+	def __repr__(self):
+		return 'FunctionRecord(name={0.name!r}, state={0.state!r})'.format(
+			self)
+
+
+class Specializer:
+	"""
+	Instruments and specializes the top-level functions of the code it runs.
+	"""
+
+	def __init__(self, threshold=HOT_THRESHOLD, max_fallbacks=MAX_FALLBACKS):
+		self.threshold = threshold
+		self.max_fallbacks = max_fallbacks
+		self.records = []
+		self.events = []
+		self.env = None
+
+	def install(self, env):
+		"""
+		Makes the environment run code compiled in adaptive mode.
+		"""
+
+		self.env = env
+		env[ADAPTIVE] = self
+		return env
+
+	def execute(self, compiler, prelude=default_env):
+		"""
+		Compiles and executes an Acid program in adaptive mode, then calls its
+		main function.
+		"""
+
+		from acid.compiler.compiler import _run_main_function
+
+		env = self.install(prelude.copy())
+		compiler.adaptive = self
+
+		# every instrumented call adds the frame of its wrapper, which would
+		# halve the recursion depth of the program
+		recursion_limit = sys.getrecursionlimit()
+		sys.setrecursionlimit(2 * recursion_limit)
+
+		try:
+			compiler.load(env)
+			_run_main_function(env)
+		finally:
+			sys.setrecursionlimit(recursion_limit)
+
+	def retain(self, compiler, declaration):
+		"""
+		Keeps the AST of a top-level function while it is compiled, and
+		returns its key in the compiled code.
+		"""
+
+		self.records.append(FunctionRecord(
+			declaration.name, declaration, compiler.path, compiler.redefined))
+
+		return len(self.records) - 1
+
+	def instrument(self, generic, key):
+		"""
+		Called by the compiled code, with the generic version of a function:
+		returns the function to bind its name to.
+		"""
+
+		record = self.records[key]
+		record.generic = record.target = generic
+
+		threshold = self.threshold
+		signatures = record.signatures
+
+		def wrapper(*args):
+			if record.state == INSTRUMENTED:
+				record.calls += 1
+				signature = tuple(map(type, args))
+				signatures[signature] = signatures.get(signature, 0) + 1
+
+				if (record.calls >= threshold
+						or len(signatures) > MAX_SIGNATURES):
+					self._examine(record)
+
+			return record.target(*args)
+
+		record.wrapper = record.bound = wrapper
+		return wrapper
+
+	def _examine(self, record):
+		# the function is hot, or its types are not stable
+		if len(record.signatures) != 1:
+			self._set_generic(record, GENERIC, 'unstable types')
+			return
+
+		signature, = record.signatures
+		record.signature = signature
+
+		if not all(type_ in SPECIALIZABLE_TYPES for type_ in signature):
+			self._set_generic(record, GENERIC, 'unsupported types {}'.format(
+				_signature_name(signature)))
+			return
+
+		record.target = self._compile(record, signature)
+		record.state = SPECIALIZED
+		self._bind(record, record.target)
+		self._event(record, SPECIALIZED, _signature_name(signature))
+
+	def _set_generic(self, record, state, reason):
+		record.target = record.generic
+		record.state = state
+		self._bind(record, record.generic)
+		self._event(record, state, reason)
+
+	def _bind(self, record, func):
+		# the calls through the global name skip the wrapper from now on,
+		# unless the name was bound to something else in the meantime
+		if self.env is not None and self.env.get(record.name) is record.bound:
+			self.env[record.name] = record.bound = func
+
+	def _event(self, record, kind, detail):
+		self.events.append(
+			SpecializationEvent(time.time(), record.name, kind, detail))
+
+	def _fallback(self, record):
+		generic = record.generic
+
+		def fallback(*args):
+			record.fallbacks += 1
+
+			if (record.fallbacks >= self.max_fallbacks
+					and record.state == SPECIALIZED):
+				self._set_generic(record, DEOPTIMIZED, 'too many fallbacks')
+
+			return generic(*args)
+
+		return fallback
+
+	def _compile(self, record, signature):
+		"""
+		Compiles the specialized version of a function, guarded by the types
+		of its arguments.
+		"""
+
+		from acid.compiler.compiler import Compiler
+		from acid.compiler.functions import name_functions
+
+		declaration = record.declaration
+		lambda_ = declaration.value
+
+		compiler = Compiler(declaration, record.path)
+		compiler.redefined = record.redefined
+		compiler.declaration = declaration
+		compiler.types = dict(zip(lambda_.params, signature))
+
+		specialized = compiler.translate(lambda_)
+
+		# the guard and the fallback are free variables of the function,
+		# which are faster to load than globals
+		type_name = compiler.fresh_name('guard type')
+		fallback_name = compiler.fresh_name('fallback')
+		type_names = [compiler.fresh_name('guard') for _ in signature]
+
+		def load(name):
+			return python_ast.Name(name, python_ast.Load())
+
+		guards = [
+			python_ast.Compare(
+				left=python_ast.Call(load(type_name), [load(param)], []),
+				ops=[python_ast.Is()],
+				comparators=[load(name)])
+			for param, name in zip(lambda_.params, type_names)
+		]
+
+		specialized.body = python_ast.IfExp(
+			test=(guards[0] if len(guards) == 1
+				  else python_ast.BoolOp(python_ast.And(), guards)),
+			body=specialized.body,
+			orelse=python_ast.Call(
+				load(fallback_name), list(map(load, lambda_.params)), []))
+
+		factory = python_ast.Lambda(
+			args=_arguments([type_name, fallback_name] + type_names),
+			body=specialized)
+
+		py_ast = python_ast.Expression(body=factory)
+		python_ast.fix_missing_locations(py_ast)
+
+		code = compile(py_ast, record.path or '<string>', mode='eval')
+		code = name_functions(code, py_ast)
+
+		make = eval(code, self.env)
+		return make(type, self._fallback(record), *signature)
+
+	def stats(self):
+		"""
+		Returns the records of the instrumented functions.
+		"""
+
+		return list(self.records)
+
+	def print_stats(self, file=None):
+		"""
+		Prints the state of the instrumented functions, and the specialization
+		events.
+		"""
+
+		file = file or sys.stderr
+
+		print('{:<24} {:<13} {:>8} {:>10}  {}'.format(
+			'function', 'state', 'calls', 'fallbacks', 'signature'), file=file)
+
+		for record in self.records:
+			print('{:<24} {:<13} {:>8} {:>10}  {}'.format(
+				record.name, record.state, record.calls, record.fallbacks,
+				_signature_name(record.signature)
+				if record.signature is not None else '-'), file=file)
+
+		if self.events:
+			print(file=file)
+
+			start = self.events[0].time
+
+			for event in self.events:
+				print('{:>9.3f}s  {:<24} {:<13} {}'.format(
+					event.time - start, event.name, event.kind, event.detail),
+					file=file)
+
+
+def _signature_name(signature):
+	return '({})'.format(', '.join(type_.__name__ for type_ in signature))
+
+
+def _arguments(params):
+	return python_ast.arguments(
+		posonlyargs=[],
+		args=[python_ast.arg(arg=param, annotation=None) for param in params],
+		vararg=None,
+		kwonlyargs=[],
+		kw_defaults=[],
+		kwarg=None,
+		defaults=[]
+	)
+
+
+def instrument_declaration(compiler, declaration, value):
+	"""
+	Wraps the translated value of a top-level function in its instrumented
+	version, when compiling in adaptive mode. Returns the value unchanged
+	otherwise.
+	"""
+
+	lambda_ = declaration.value
+
+	if (compiler.adaptive is None
+			or not isinstance(lambda_, Lambda)
+			or not lambda_.params):
+		return value
+
+	key = compiler.adaptive.retain(compiler, declaration)
+
+	return python_ast.Call(
+		func=python_ast.Attribute(
+			value=python_ast.Name(ADAPTIVE, python_ast.Load()),
+			attr='instrument',
+			ctx=python_ast.Load()),
+		args=[value, python_ast.Constant(key)],
+		keywords=[])
+
+
+def specialize_call(compiler, call):
+	"""
+	Translates an arithmetic or comparison builtin call into a native operator
+	when the types of its arguments are known, in a specialized function.
+	Returns None otherwise.
+	"""
+
+	if not compiler.types or _infer_type(compiler, call) is None:
+		return None
+
+	name = call.func.name
+	args = list(map(compiler.translate, call.args))
+
+	if name in _COMPARISONS:
+		return python_ast.Compare(
+			left=args[0], ops=[_COMPARISONS[name]()], comparators=[args[1]])
+
+	operator, _ = _ARITHMETIC[name]
+	node = args[0]
+
+	for arg in args[1:]:
+		node = python_ast.BinOp(left=node, op=operator(), right=arg)
+
+	return node
+
+
+def _infer_type(compiler, node):
+	"""
+	Returns the type of the value of an expression in a specialized function,
+	or None if it is not known. Comparisons have the type `bool`.
+	"""
+
+	if isinstance(node, IntLiteral):
+		return int
+
+	if isinstance(node, FloatLiteral):
+		return float
+
+	if isinstance(node, Variable):
+		return compiler.types.get(node.name)
+
+	if isinstance(node, If):
+		consequence = _infer_type(compiler, node.consequence)
+
+		if consequence is _infer_type(compiler, node.alternative):
+			return consequence
+
+		return None
+
+	if not (isinstance(node, Call)
+			and isinstance(node.func, Variable)
+			and node.func.name not in compiler.types
+			and node.func.name not in compiler.redefined):
+		return None
+
+	name = node.func.name
+
+	if name in _COMPARISONS:
+		arity_ok = len(node.args) == 2
+	elif name in _ARITHMETIC:
+		_, variadic = _ARITHMETIC[name]
+		arity_ok = len(node.args) >= 2 if variadic else len(node.args) == 2
+	else:
+		return None
+
+	arg_types = [_infer_type(compiler, arg) for arg in node.args]
+
+	if not arity_ok or not all(type_ in SPECIALIZABLE_TYPES
+							   for type_ in arg_types):
+		return None
+
+	if name in _COMPARISONS:
+		return bool
+
+	if name == '/' or float in arg_types:
+		return float
+
+	return int
@@ -10,28 +10,59 @@ Contributors: myrma
 import ast as python_ast
 
 from acid.compiler.compiler import Compiler
+from acid.compiler.functions import FunctionInfo
+from acid.compiler.fusion import fuse_pipeline
+from acid.compiler.vectorize import vectorize_map
+from acid.compiler.specialize import specialize_call, instrument_declaration
+from acid.compiler.metering import meter_body, check_binding
+from acid.prelude.parallel import PAR_BUILTIN
 from acid.parser.ast import *
+from acid.exception import CompileError
+from acid.timings import phase
 
 
 @Compiler.register(Program)
 def translate_program(compiler, program):
-	instrs = map(compiler.translate, program.instructions)
-	module = python_ast.Module(body=list(instrs))
+	instrs = []
+
+	for instr in program.instructions:
+		with phase('translate form', form=True,
+				   line=getattr(instr.pos, 'line', None)):
+			instrs.append(compiler.translate(instr))
+
+	module = python_ast.Module(body=instrs, type_ignores=[])
 	return module
 
 
 @Compiler.register(Declaration)
 def translate_declaration(compiler, declaration):
-	assign = python_ast.Assign()
-	assign.targets = [
-		python_ast.Name(id=declaration.name, ctx=python_ast.Store())
-	]
-	assign.value = compiler.translate(declaration.value)
-	return assign
+	check_binding(compiler, declaration.name, declaration)
+	compiler.declaration = declaration
+
+	try:
+		if _is_coroutine(declaration.value):
+			return _translate_coroutine(compiler, declaration)
+
+		assign = python_ast.Assign()
+		assign.targets = [
+			python_ast.Name(id=declaration.name, ctx=python_ast.Store())
+		]
+		value = compiler.translate(declaration.value)
+		assign.value = instrument_declaration(compiler, declaration, value)
+		return assign
+	finally:
+		compiler.declaration = None
 
 
 @Compiler.register(Call)
 def translate_call(compiler, call):
+	# recognition passes rewriting some builtin calls
+	for rewrite in (specialize_call, fuse_pipeline, vectorize_map):
+		py_node = rewrite(compiler, call)
+
+		if py_node is not None:
+			return py_node
+
 	return python_ast.Call(
 		func=compiler.translate(call.func),
 		args=list(map(compiler.translate, call.args)),
@@ -39,18 +70,109 @@ def translate_call(compiler, call):
 	)
 
 
+def _is_coroutine(value):
+	# a lambda whose own body (not a nested lambda) awaits
+	if not isinstance(value, Lambda):
+		return False
+
+	nodes = [value.body]
+
+	while nodes:
+		node = nodes.pop()
+
+		if isinstance(node, Await):
+			return True
+		elif not isinstance(node, (Lambda, Par)):
+			nodes.extend(node.children())
+
+	return False
+
+
+def _translate_coroutine(compiler, declaration):
+	# coroutines cannot be Python lambdas: use an `async def` statement
+	lambda_ = declaration.value
+
+	for param in lambda_.params:
+		check_binding(compiler, param, lambda_)
+
+	compiler.in_coroutine = True
+
+	try:
+		body = meter_body(compiler, compiler.translate(lambda_.body))
+	finally:
+		compiler.in_coroutine = False
+
+	func = python_ast.AsyncFunctionDef(
+		name=declaration.name,
+		args=_arguments(lambda_.params),
+		body=[python_ast.Return(value=body)],
+		decorator_list=[],
+		returns=None,
+		type_comment=None,
+		type_params=[]
+	)
+
+	func.acid_function = FunctionInfo(declaration.name, compiler.path,
+									  lambda_.span)
+	return func
+
+
 @Compiler.register(Lambda)
 def translate_lambda(compiler, lambda_):
-	return python_ast.Lambda(
-		args=python_ast.arguments(
-			args=list(map(lambda n: python_ast.arg(arg=n, annotation=None), lambda_.params)),
-			vararg=None,
-			kwonlyargs=[],
-			kw_defaults=[],
-			kwarg=None,
-			defaults=[]
-		),
-		body=compiler.translate(lambda_.body)
+	for param in lambda_.params:
+		check_binding(compiler, param, lambda_)
+
+	# the parameters of a nested function shadow the variables of known
+	# types, which are the parameters of the function being specialized
+	types = compiler.types
+	declaration = compiler.declaration
+
+	if declaration is None or lambda_ is not declaration.value:
+		compiler.types = {name: type_ for name, type_ in types.items()
+						  if name not in lambda_.params}
+
+	try:
+		py_lambda = python_ast.Lambda(
+			args=_arguments(lambda_.params),
+			body=meter_body(compiler,
+							_translate_outside_coroutine(compiler, lambda_.body))
+		)
+	finally:
+		compiler.types = types
+
+	# read by `name_functions` once the module is compiled
+	py_lambda.acid_function = FunctionInfo(_function_name(compiler, lambda_),
+										   compiler.path, lambda_.span)
+	return py_lambda
+
+
+def _function_name(compiler, lambda_):
+	declaration = compiler.declaration
+
+	if declaration is None:
+		return '<lambda>'
+
+	if declaration.value is lambda_:
+		return declaration.name
+
+	return declaration.name + '.<lambda>'
+
+
+@Compiler.register(Par)
+def translate_par(compiler, par):
+	# each expression is wrapped in a thunk passed to the `par` builtin
+	thunks = [
+		python_ast.Lambda(
+			args=_arguments([]),
+			body=_translate_outside_coroutine(compiler, expr)
+		)
+		for expr in par.exprs
+	]
+
+	return python_ast.Call(
+		func=python_ast.Name(PAR_BUILTIN, python_ast.Load()),
+		args=thunks,
+		keywords=[]
 	)
 
 
@@ -63,11 +185,33 @@ def translate_if(compiler, if_):
 	)
 
 
+@Compiler.register(Await)
+def translate_await(compiler, await_):
+	if not compiler.in_coroutine:
+		msg = '`await` is only allowed in the body of a top-level function'
+		raise CompileError(await_.pos, msg, compiler.path)
+
+	return python_ast.Await(value=compiler.translate(await_.expr))
+
+
 @Compiler.register(Variable)
 def translate_variable(compiler, var):
 	return python_ast.Name(var.name, python_ast.Load())
 
 
+@Compiler.register(DictLiteral)
+def translate_dict(compiler, dict_):
+	return python_ast.Dict(
+		keys=list(map(compiler.translate, dict_.keys)),
+		values=list(map(compiler.translate, dict_.values))
+	)
+
+
+@Compiler.register(SetLiteral)
+def translate_set(compiler, set_):
+	return python_ast.Set(elts=list(map(compiler.translate, set_.elements)))
+
+
 @Compiler.register(IntLiteral, FloatLiteral)
 def translate_num(compiler, num):
 	return python_ast.Num(num.value)
@@ -76,3 +220,26 @@ def translate_num(compiler, num):
 @Compiler.register(CharLiteral, StringLiteral)
 def translate_string_or_char(compiler, string_or_char):
 	return python_ast.Str(string_or_char.value)
+
+
+def _translate_outside_coroutine(compiler, node):
+	# nested functions are never coroutines
+	in_coroutine = compiler.in_coroutine
+	compiler.in_coroutine = False
+
+	try:
+		return compiler.translate(node)
+	finally:
+		compiler.in_coroutine = in_coroutine
+
+
+def _arguments(params):
+	return python_ast.arguments(
+		posonlyargs=[],
+		args=list(map(lambda n: python_ast.arg(arg=n, annotation=None), params)),
+		vararg=None,
+		kwonlyargs=[],
+		kw_defaults=[],
+		kwarg=None,
+		defaults=[]
+	)
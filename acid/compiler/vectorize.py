@@ -0,0 +1,93 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines a recognition pass which vectorizes a `map` over a
+`vrange` when the mapped function is only made of elementwise builtins. The
+function is then applied once to the whole vector instead of once per element.
+
+ex: `(map (lambda (x) (* x x)) (vrange 0 n))` compiles to the equivalent of:
+
+	(lambda x: *(x, x))(vrange(0, n))
+
+which performs a single `numpy.multiply` call when run in the vector prelude
+(see `acid.prelude.vector`).
+
+Contributors: myrma
+"""
+
+__all__ = ['vectorize_map']
+
+from acid.parser.ast import *
+from acid.prelude.vector import ELEMENTWISE_NAMES
+
+
+def vectorize_map(compiler, call):
+	"""
+	Translates a vectorizable `map` call into a Python node. Returns None when
+	the call cannot be vectorized.
+	"""
+
+	if not (_is_builtin_call(compiler, call, 'map', 2)
+			and _is_builtin_call(compiler, call.args[1], 'vrange', 2)):
+		return None
+
+	func, seq = call.args
+
+	if isinstance(func, Variable):
+		if not _is_elementwise(compiler, func.name):
+			return None
+
+	elif isinstance(func, Lambda):
+		if len(func.params) != 1:
+			return None
+
+		param = func.params[0]
+
+		if not _is_elementwise_expr(compiler, func.body, param):
+			return None
+
+		# a constant function would not build a vector
+		if not any(isinstance(node, Variable) and node.name == param
+				   for node in func.body.walk()):
+			return None
+
+	else:
+		return None
+
+	applied = Call(func, [seq])
+	applied.span = call.span
+	return compiler.translate(applied)
+
+
+def _is_builtin_call(compiler, node, name, arity):
+	return (isinstance(node, Call)
+			and isinstance(node.func, Variable)
+			and node.func.name == name
+			and name not in compiler.redefined
+			and len(node.args) == arity)
+
+
+def _is_elementwise(compiler, name):
+	return name in ELEMENTWISE_NAMES and name not in compiler.redefined
+
+
+def _is_elementwise_expr(compiler, expr, param):
+	"""
+	Checks that an expression only applies elementwise builtins to the
+	parameter and to numeric literals.
+	"""
+
+	if isinstance(expr, (IntLiteral, FloatLiteral)):
+		return True
+
+	if isinstance(expr, Variable):
+		return expr.name == param
+
+	if isinstance(expr, Call):
+		return (isinstance(expr.func, Variable)
+				and _is_elementwise(compiler, expr.func.name)
+				and all(_is_elementwise_expr(compiler, arg, param)
+						for arg in expr.args))
+
+	return False
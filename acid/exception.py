@@ -31,3 +31,50 @@ class ParseError(ValueError):
 Parser failed to parse the code at {err.pos}:
 {err.msg}
 """.format(err=self, cursor_margin=' ' * self.pos.column)
+
+
+class CompileError(ValueError):
+	"""
+	Raised when the compiler fails to translate a valid Acid AST.
+	"""
+
+	def __init__(self, pos, msg, path=None):
+		self.pos = pos
+		self.msg = msg
+		self.path = path
+
+	def __str__(self):
+		return 'Compiler failed to compile {err.path} at {err.pos}:\n{err.msg}'.format(
+			err=self)
+
+
+class ResourceLimitError(RuntimeError):
+	"""
+	Raised when metered Acid code exceeds one of its resource limits (see
+	`acid.compiler.metering` and `acid.sandbox`).
+	"""
+
+
+class StepLimitExceeded(ResourceLimitError):
+	"""
+	Raised when metered code runs more steps (function calls and loop
+	iterations) than allowed.
+	"""
+
+
+class TimeLimitExceeded(ResourceLimitError):
+	"""
+	Raised when metered code runs longer than allowed.
+	"""
+
+
+class MemoryLimitExceeded(ResourceLimitError):
+	"""
+	Raised when sandboxed code uses more memory than allowed.
+	"""
+
+
+class AllocationLimitExceeded(ResourceLimitError):
+	"""
+	Raised when a builtin is asked to build a bigger collection than allowed.
+	"""
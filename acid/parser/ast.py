@@ -12,8 +12,10 @@ __all__ = [
 	'Program',                         # program AST
 	'Stmt', 'Expr', 'Literal',         # abstract AST nodes
 	'Declaration', 'TypeDeclaration',  # assignment (value or type)
-	'Call', 'Lambda', 'If',            # calls
+	'Call', 'Lambda', 'If', 'Par',     # calls
+	'Await',                           # asynchronous call
 	'Variable',                        # atom
+	'DictLiteral', 'SetLiteral',       # collection literals
 	'IntLiteral', 'FloatLiteral',      # numeric literal
 	'CharLiteral', 'StringLiteral'     # string-related literals
 ]
@@ -32,6 +34,27 @@ class Node:
 		if self.span is not None:
 			return self.span.start
 
+	def children(self):
+		"""
+		Iterates over the direct sub-nodes of this node.
+		"""
+
+		for value in vars(self).values():
+			if isinstance(value, Node):
+				yield value
+			elif isinstance(value, list):
+				yield from (elt for elt in value if isinstance(elt, Node))
+
+	def walk(self):
+		"""
+		Iterates over this node and all of its descendants, in pre-order.
+		"""
+
+		yield self
+
+		for child in self.children():
+			yield from child.walk()
+
 	@classmethod
 	def sub_types(cls):
 		for sub_type in cls.__subclasses__():
@@ -141,6 +164,36 @@ class If(Expr):
 		return 'If(condition={0.condition!r}, consequence={0.consequence!r}, alternative={0.alternative!r})'.format(self)
 
 
+class Par(Expr):
+	"""
+	Concurrent evaluation of independent expressions, returning the list of
+	their values.
+	ex: `(par (fib (- n 1)) (fib (- n 2)))`
+	"""
+
+	def __init__(self, exprs):
+		super().__init__()
+		self.exprs = exprs
+
+	def __repr__(self):
+		return 'Par(exprs={0.exprs!r})'.format(self)
+
+
+class Await(Expr):
+	"""
+	Waits for the result of a coroutine. Only allowed in the body of a lambda
+	directly bound by a top-level declaration, which becomes a coroutine.
+	ex: `(await (sleep 1))`
+	"""
+
+	def __init__(self, expr):
+		super().__init__()
+		self.expr = expr
+
+	def __repr__(self):
+		return 'Await(expr={0.expr!r})'.format(self)
+
+
 class Variable(Expr):
 	"""
 	Variable name.
@@ -155,6 +208,35 @@ class Variable(Expr):
 		return 'Variable(name={0.name!r})'.format(self)
 
 
+class DictLiteral(Expr):
+	"""
+	Hash map literal, made of key-value pairs.
+	ex: `{"one" 1 "two" 2}`
+	"""
+
+	def __init__(self, keys, values):
+		super().__init__()
+		self.keys = keys
+		self.values = values
+
+	def __repr__(self):
+		return 'DictLiteral(keys={0.keys!r}, values={0.values!r})'.format(self)
+
+
+class SetLiteral(Expr):
+	"""
+	Hash set literal.
+	ex: `#{1 2 3}`
+	"""
+
+	def __init__(self, elements):
+		super().__init__()
+		self.elements = elements
+
+	def __repr__(self):
+		return 'SetLiteral(elements={0.elements!r})'.format(self)
+
+
 class Literal(Expr):
 	"""
 	Abstract literal expression.
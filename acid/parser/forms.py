@@ -0,0 +1,228 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines a fast pre-scan which splits Acid code into its top-level forms by
+balancing parentheses and braces, without tokenizing nor parsing it. Strings,
+characters and comments are skipped the same way as the lexer does. A token
+outside of parentheses, such as a stray string, is a form of its own, so that
+parsing it fails like parsing the whole code would.
+
+Each form can then be parsed on its own with `parse_form`, which keeps the
+source positions relative to the whole code.
+
+Contributors: myrma
+"""
+
+__all__ = ['Form', 'split_forms', 'scan_forms', 'read_forms', 'parse_form']
+
+import re
+from collections import namedtuple
+
+from acid.parser.parser import Parser
+from acid.parser.types import SourcePos
+from acid.exception import ParseError
+
+
+# `offset` is the index of the first character of the form in the code, and
+# `pos` its source position
+Form = namedtuple('Form', 'text offset pos')
+
+
+# the alternatives are tried in the order of the lexer token types, so that
+# `//` in the middle of an atom is not taken for a comment
+_SCANNER = re.compile(r"""
+	(?P<skip>
+		//[^\n]*
+		| /\*.*?\*/
+	)
+	| (?P<literal>
+		"(?:[^"\\]|\\.)*"
+		| '(?:[^'\\]|\\.)'
+	)
+	| (?P<open>[({]|\#\{)
+	| (?P<close>[)}])
+	| (?P<atom>[\w+\-*/:,$<>=~#&|@ç^_%!?.]+|\S)
+""", re.VERBOSE | re.DOTALL)
+
+
+def split_forms(code):
+	"""
+	Returns the list of the top-level forms of the code. Unbalanced code
+	gives forms which do not parse, rather than an error.
+	"""
+
+	forms, _ = scan_forms(code)
+	return forms
+
+
+def scan_forms(code):
+	"""
+	Returns the list of the top-level forms of the code, and the nesting depth
+	at its end, which is not null if the last form is unterminated.
+	"""
+
+	forms = []
+	depth = 0
+	start = None
+
+	# line count up to `line_offset`, updated incrementally
+	line, line_offset = 1, 0
+
+	def make_form(start, end):
+		nonlocal line, line_offset
+
+		line += code.count('\n', line_offset, start)
+		line_offset = start
+		column = start - code.rfind('\n', 0, start)
+
+		return Form(code[start:end], start, SourcePos(line, column))
+
+	for match in _SCANNER.finditer(code):
+		kind = match.lastgroup
+
+		if kind == 'skip':
+			continue
+
+		if depth == 0:
+			start = match.start()
+
+		if kind == 'open':
+			depth += 1
+		elif kind == 'close' and depth > 0:
+			depth -= 1
+
+		if depth == 0:
+			forms.append(make_form(start, match.end()))
+
+	if depth > 0:
+		# unterminated last form
+		forms.append(make_form(start, len(code)))
+
+	return forms, depth
+
+
+def read_forms(stream):
+	"""
+	Yields the top-level forms read from a stream of lines (a text file,
+	`sys.stdin`...), as soon as they are complete. Only the lines of the form
+	being read are kept in memory.
+	"""
+
+	# text read but not yielded yet, and its offset and position in the stream
+	pending, offset, pos = '', 0, SourcePos(1, 1)
+
+	# state of the scan of the pending text, which is resumed at `scan_from`
+	# when a line is read
+	depth, start, scan_from = 0, None, 0
+
+	for line in stream:
+		pending += line
+		bounds = []
+
+		for match in _SCANNER.finditer(pending, scan_from):
+			kind = match.lastgroup
+
+			# a string, character or comment which is not terminated yet is
+			# not matched by its group: its opening quote or slash is
+			# scanned as an atom, so it is scanned again with the next lines
+			if kind == 'atom' and match.group().startswith(('"', "'", '/*')):
+				break
+
+			scan_from = match.end()
+
+			if kind == 'skip':
+				continue
+
+			if depth == 0:
+				start = match.start()
+
+			if kind == 'open':
+				depth += 1
+			elif kind == 'close' and depth > 0:
+				depth -= 1
+
+			if depth == 0:
+				bounds.append((start, match.end()))
+
+		if not bounds:
+			continue
+
+		for form in _make_forms(pending, bounds):
+			yield _translate_form(form, offset, pos)
+
+		consumed = bounds[-1][1]
+		pos.feed(pending[:consumed])
+		pending, offset = pending[consumed:], offset + consumed
+		scan_from -= consumed
+
+		if start is not None:
+			start -= consumed
+
+	# the end of the stream is scanned the same way as a whole code would be
+	for form in split_forms(pending):
+		yield _translate_form(form, offset, pos)
+
+
+def _make_forms(code, bounds):
+	line, line_offset = 1, 0
+
+	for start, end in bounds:
+		line += code.count('\n', line_offset, start)
+		line_offset = start
+		column = start - code.rfind('\n', 0, start)
+
+		yield Form(code[start:end], start, SourcePos(line, column))
+
+
+def _translate_form(form, offset, start):
+	# from a position in the pending text to a position in the whole stream
+	pos = form.pos.copy()
+	_shift_pos(pos, start)
+
+	return Form(form.text, offset + form.offset, pos)
+
+
+def parse_form(form, path=None):
+	"""
+	Parses a single top-level form into a Program, whose source positions are
+	those of the form in the whole code.
+	"""
+
+	_, program = _parse_form(form, path)
+	return program
+
+
+def _parse_form(form, path=None):
+	# parsed without padding the text up to the position of the form, which
+	# would make parsing each form of a file linear in the size of the file:
+	# the positions are shifted afterwards instead
+	try:
+		parser = Parser(form.text, path)
+		tokens = list(parser.token_queue)
+		program = parser.run()
+	except ParseError as err:
+		padding = '\n' * (form.pos.line - 1) + ' ' * (form.pos.column - 1)
+		pos = err.pos.copy()
+		_shift_pos(pos, form.pos)
+
+		raise ParseError(padding + form.text, pos, err.msg) from None
+
+	# the nodes share the positions of their tokens
+	shifted = set()
+
+	for token in tokens:
+		for pos in (token.span.start, token.span.end):
+			if id(pos) not in shifted:
+				shifted.add(id(pos))
+				_shift_pos(pos, form.pos)
+
+	return tokens, program
+
+
+def _shift_pos(pos, start):
+	# from a position in the form to a position in the whole code
+	if pos.line == 1:
+		pos.column += start.column - 1
+
+	pos.line += start.line - 1
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the incremental parsing of edited Acid code. The code is kept as a
+sequence of top-level forms (see `acid.parser.forms`), each with its tokens and
+AST nodes. After an edit, only the forms touched by the edit are lexed and
+parsed again; the other forms keep their tokens and nodes, and the positions of
+the forms following the edit are shifted in place.
+
+ex:
+	source = ParsedSource.parse(code, path)
+	source = source.edit(offset=120, removed=3, inserted='(+ x 1)')
+	program = source.program
+
+Since the positions of the unchanged nodes are shifted in place, a source must
+not be used anymore once it has been edited.
+
+Contributors: myrma
+"""
+
+__all__ = ['ParsedSource']
+
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+from acid.parser.ast import Program
+from acid.parser.types import SourcePos, SourceSpan
+from acid.parser.forms import Form, scan_forms, _parse_form
+
+
+class _Entry:
+	"""
+	A parsed top-level form.
+	"""
+
+	__slots__ = ('form', 'tokens', 'instructions')
+
+	def __init__(self, form, tokens, instructions):
+		self.form = form
+		self.tokens = tokens
+		self.instructions = instructions
+
+	@property
+	def offset(self):
+		return self.form.offset
+
+	@property
+	def end(self):
+		return self.form.offset + len(self.form.text)
+
+
+def _parse_entry(form, path):
+	tokens, program = _parse_form(form, path)
+	return _Entry(form, tokens, program.instructions)
+
+
+class ParsedSource:
+	"""
+	Acid code along with its tokens and its AST, which can be updated after an
+	edit.
+	"""
+
+	def __init__(self, code, entries, path=None):
+		self.code = code
+		self.entries = entries
+		self.path = path
+
+		# bounds of the forms, for bisection
+		self.offsets = [entry.offset for entry in entries]
+		self.ends = [entry.end for entry in entries]
+
+	@classmethod
+	def parse(cls, code, path=None):
+		"""
+		Parses the whole code.
+		"""
+
+		forms, _ = scan_forms(code)
+		return cls(code, [_parse_entry(form, path) for form in forms], path)
+
+	@property
+	def tokens(self):
+		return list(chain.from_iterable(entry.tokens for entry in self.entries))
+
+	@property
+	def program(self):
+		instructions = list(chain.from_iterable(
+			entry.instructions for entry in self.entries))
+
+		program = Program(instructions, self.path)
+
+		if instructions:
+			program.span = SourceSpan.between(instructions[0], instructions[-1])
+
+		return program
+
+	def edit(self, offset, removed, inserted):
+		"""
+		Returns the source obtained by replacing `removed` characters at
+		`offset` with the `inserted` text. Raises a ParseError if a re-parsed
+		form is invalid, in which case this source is left unchanged.
+		"""
+
+		entries, code = self.entries, self.code
+		end = offset + removed
+
+		# forms touched by the edit, including the ones it is adjacent to
+		first = bisect_left(self.ends, offset)
+		last = bisect_right(self.offsets, end) - 1
+
+		while True:
+			region_start = entries[first - 1].end if first > 0 else 0
+			region_end = (entries[last + 1].offset if last + 1 < len(entries)
+						  else len(code))
+
+			region = (code[region_start:offset] + inserted
+					  + code[end:region_end])
+			forms, depth = scan_forms(region)
+
+			if depth == 0 or last + 1 >= len(entries):
+				break
+
+			# an unterminated form swallows the following ones
+			last += 1
+
+		# the position of the region start is the end of the previous form
+		if first > 0:
+			start_pos = entries[first - 1].tokens[-1].span.end.copy()
+		else:
+			start_pos = SourcePos(1, 1)
+
+		new_entries = [
+			_parse_entry(_translate_form(form, region_start, start_pos),
+						 self.path)
+			for form in forms
+		]
+
+		following = entries[last + 1:]
+
+		if following:
+			old_end = following[0].form.pos.copy()
+			new_end = start_pos.copy()
+			new_end.feed(region)
+
+			_shift(following, old_end, new_end,
+				   len(inserted) - removed)
+
+		new_code = code[:offset] + inserted + code[end:]
+		all_entries = entries[:first] + new_entries + following
+
+		return ParsedSource(new_code, all_entries, self.path)
+
+
+def _translate_form(form, offset, start_pos):
+	# from a position in the region to a position in the whole code
+	if form.pos.line == 1:
+		column = start_pos.column + form.pos.column - 1
+	else:
+		column = form.pos.column
+
+	pos = SourcePos(start_pos.line + form.pos.line - 1, column)
+	return Form(form.text, offset + form.offset, pos)
+
+
+def _shift(entries, old_end, new_end, delta):
+	"""
+	Moves the forms following an edited region from `old_end` to `new_end`.
+	"""
+
+	line_delta = new_end.line - old_end.line
+	column_delta = new_end.column - old_end.column
+
+	def shift_pos(pos):
+		if pos.line == old_end.line:
+			pos.column += column_delta
+
+		pos.line += line_delta
+
+	for entry in entries:
+		form = entry.form
+
+		if line_delta or column_delta:
+			# the nodes share the positions of their tokens
+			for token in entry.tokens:
+				shift_pos(token.span.start)
+				shift_pos(token.span.end)
+
+			pos = form.pos.copy()
+			shift_pos(pos)
+		else:
+			pos = form.pos
+
+		entry.form = Form(form.text, form.offset + delta, pos)
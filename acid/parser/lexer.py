@@ -34,6 +34,8 @@ class TokenType(Enum):
 	LINE_COMMENT = r'//'
 	COMMENT_START, COMMENT_END = r'/\*', r'\*/'
 	LPAREN, RPAREN = r'\(', r'\)'
+	LBRACE, RBRACE = r'\{', r'\}'
+	SET_START = r'\#\{'
 	CHAR_LITERAL = r"'([^'\\]|\\.)'"
 	STRING_LITERAL = r'"([^"\\]|\\.)*"'
 	FLOAT_LITERAL = r'\d+\.\d+'
@@ -14,6 +14,7 @@ from acid.parser.ast import *
 from acid.parser.lexer import TokenType, tokenize
 from acid.parser.types import SourcePos
 from acid.exception import ParseError
+from acid.timings import phase
 
 
 # todo: refactor consume_stmt and consume_expr, register_stmt and register_expr
@@ -28,7 +29,9 @@ class Parser:
 	def __init__(self, code, path=None):
 		self.path = path
 		self.code = code
-		self.token_queue = list(tokenize(self.code))  # the tokenized string
+
+		with phase('tokenize', path=path):
+			self.token_queue = list(tokenize(self.code))  # the tokenized string
 
 		if self.token_queue:
 			self.end_pos = self.token_queue[-1].pos
@@ -189,6 +192,21 @@ class Parser:
 
 		return token
 
+	def expect_keyword(self, keyword):
+		"""
+		Consumes an atom used as a keyword at the head of a special form, such
+		as `par` or `await`, which remains a valid name anywhere else. Raises a ParseError
+		if the next token is not this atom.
+		"""
+
+		token = self.expect(TokenType.ATOM)
+
+		if token.value != keyword:
+			msg = 'Expected {}, got {}'.format(keyword, token.value)
+			raise ParseError(self.code, token.pos, msg)
+
+		return token
+
 	def many(self, node_type):
 		"""
 		Consumes zero or more occurences of a node of a given type.
@@ -211,5 +229,7 @@ class Parser:
 		Parses a given string into a Program object.
 		"""
 
-		program = self.parse(Program)
+		with phase('parse', path=self.path):
+			program = self.parse(Program)
+
 		return program
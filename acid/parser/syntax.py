@@ -24,6 +24,7 @@ from acid.parser.lexer import *
 from acid.parser.ast import *
 from acid.parser.types import SourceSpan
 from acid.exception import *
+from acid.timings import phase
 
 
 @Parser.register(Program, priority=1)
@@ -34,7 +35,9 @@ def consume_program(self):
 	while self.token_queue:
 		try:
 			# tries to parse an expression from the token queue
-			instr = self.consume(Stmt)
+			with phase('parse form', form=True,
+					   line=self.token_queue[0].pos.line):
+				instr = self.consume(Stmt)
 		except ParseError:
 			raise  # when no expression could be parsed
 		else:
@@ -118,6 +121,35 @@ def consume_if(self):
 	if_.span = SourceSpan.between(first, last)
 	return if_
 
+
+@Parser.register(Par, priority=1)
+def consume_par(self):
+	first = self.expect(TokenType.LPAREN)
+	self.expect_keyword('par')
+
+	exprs = []
+	while self.token_queue[0].type != TokenType.RPAREN:
+		exprs.append(self.consume(Expr))
+
+	last = self.expect(TokenType.RPAREN)
+
+	par = Par(exprs)
+	par.span = SourceSpan.between(first, last)
+	return par
+
+
+@Parser.register(Await, priority=1)
+def consume_await(self):
+	first = self.expect(TokenType.LPAREN)
+	self.expect_keyword('await')
+	expr = self.consume(Expr)
+	last = self.expect(TokenType.RPAREN)
+
+	await_ = Await(expr)
+	await_.span = SourceSpan.between(first, last)
+	return await_
+
+
 @Parser.register(Variable, priority=1)
 def consume_variable(self):
 	atom = self.expect(TokenType.ATOM)
@@ -127,6 +159,37 @@ def consume_variable(self):
 	return var
 
 
+@Parser.register(DictLiteral, priority=1)
+def consume_dict_literal(self):
+	first = self.expect(TokenType.LBRACE)
+
+	keys, values = [], []
+	while self.token_queue[0].type != TokenType.RBRACE:
+		keys.append(self.consume(Expr))
+		values.append(self.consume(Expr))
+
+	last = self.expect(TokenType.RBRACE)
+
+	dict_ = DictLiteral(keys, values)
+	dict_.span = SourceSpan.between(first, last)
+	return dict_
+
+
+@Parser.register(SetLiteral, priority=1)
+def consume_set_literal(self):
+	first = self.expect(TokenType.SET_START)
+
+	elements = []
+	while self.token_queue[0].type != TokenType.RBRACE:
+		elements.append(self.consume(Expr))
+
+	last = self.expect(TokenType.RBRACE)
+
+	set_ = SetLiteral(elements)
+	set_.span = SourceSpan.between(first, last)
+	return set_
+
+
 @Parser.register(IntLiteral, priority=1)
 def consume_int_literal(self):
 	token = self.expect(TokenType.INT_LITERAL)
@@ -29,12 +29,14 @@ class SourcePos:
 		Note: This code assumes that the string contains UNIX line terminators.
 		"""
 
-		for char in string:
-			if char == '\n':
-				self.line += 1   # increment line
-				self.column = 1  # reset column index
-			else:
-				self.column += 1
+		newlines = string.count('\n')
+
+		if newlines:
+			self.line += newlines  # increment line
+			# reset column index, then count the characters of the last line
+			self.column = len(string) - string.rfind('\n')
+		else:
+			self.column += len(string)
 
 	def copy(self):
 		"""
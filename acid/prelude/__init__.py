@@ -0,0 +1,12 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+from acid.prelude.builtins import *
+from acid.prelude.sequence import *
+from acid.prelude.vector import *
+from acid.prelude.persistent import *
+from acid.prelude.rope import *
+from acid.prelude.hamt import *
+from acid.prelude.parallel import *
+from acid.prelude.aio import *
+from acid.prelude.files import *
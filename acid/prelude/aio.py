@@ -0,0 +1,85 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the asynchronous builtins of Acid. They return awaitables, meant to be
+used with the `await` special form in the body of a coroutine:
+
+	(define main (lambda ()
+		(print (await (gather (read-file "a.txt") (read-file "b.txt"))))
+	))
+
+Contributors: myrma
+"""
+
+__all__ = ['sleep', 'gather', 'read_file', 'write_file', 'tcp_request']
+
+import asyncio
+
+
+def sleep(seconds):
+	"""
+	Waits for the given number of seconds without blocking the event loop.
+	"""
+
+	return asyncio.sleep(seconds)
+
+
+async def gather(*awaitables):
+	"""
+	Runs the given awaitables concurrently, and returns the list of their
+	results.
+	"""
+
+	return list(await asyncio.gather(*awaitables))
+
+
+def _read(path):
+	with open(path) as file:
+		return file.read()
+
+
+def _write(path, content):
+	with open(path, 'w') as file:
+		file.write(content)
+
+
+async def read_file(path):
+	"""
+	Reads a text file in a thread of the default executor, since asyncio has
+	no asynchronous file API.
+	"""
+
+	loop = asyncio.get_event_loop()
+	return await loop.run_in_executor(None, _read, path)
+
+
+async def write_file(path, content):
+	"""
+	Writes a text file in a thread of the default executor.
+	"""
+
+	loop = asyncio.get_event_loop()
+	await loop.run_in_executor(None, _write, path, content)
+
+
+async def tcp_request(host, port, data):
+	"""
+	Sends a string to a TCP server, and returns its whole response once the
+	server closes the connection.
+	"""
+
+	reader, writer = await asyncio.open_connection(host, port)
+
+	try:
+		writer.write(data.encode())
+		await writer.drain()
+
+		if writer.can_write_eof():
+			writer.write_eof()
+
+		response = await reader.read()
+	finally:
+		writer.close()
+
+	return response.decode()
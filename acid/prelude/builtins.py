@@ -0,0 +1,129 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module defines the builtin values of Acid.
+
+Contributors: myrma
+"""
+
+__all__ = ['default_env']
+
+import operator as op
+from functools import reduce
+from itertools import islice
+
+from acid.prelude.sequence import Seq
+from acid.prelude.persistent import Cons, NIL, PVector, cons_list
+from acid.prelude.rope import Rope, concat
+from acid.prelude.hamt import PDict, PSet
+from acid.prelude.parallel import (ACID_ENV, PAR_BUILTIN, pmap, pfilter,
+								   preduce, par)
+from acid.prelude.aio import sleep, gather, read_file, write_file, tcp_request
+from acid.prelude.files import open_lines, read_chunks, write_lines
+
+
+default_env = {
+	'+': concat,
+	'-': op.sub,
+	'*': lambda *xs: reduce(op.mul, xs),
+	'/': op.truediv,
+	'**': op.pow,
+	'div': op.floordiv,
+	'mod': op.mod,
+	'==': op.eq,
+	'!=': op.ne,
+	'<': op.lt,
+	'<=': op.le,
+	'>': op.gt,
+	'>=': op.ge,
+	'and': op.and_,
+	'xor': op.xor,
+	'or': op.or_,
+	'not': op.not_,
+	'<<': op.lshift,
+	'>>': op.rshift,
+	'~': op.invert,
+	'#': op.getitem,
+	'#=': op.setitem,
+	'#~': op.delitem,
+	'negate': op.neg,
+	'print': print,
+	'sleep': sleep,
+	'gather': gather,
+	'read-file': read_file,
+	'write-file': write_file,
+	'tcp-request': tcp_request,
+	'open-lines': open_lines,
+	'read-chunks': read_chunks,
+	'write-lines': write_lines,
+	'rope': lambda *parts: Rope.of(parts),
+	'list': lambda *elts: list(elts),
+	'tuple': lambda *elts: tuple(elts),
+	'dict': lambda *kvs: dict(zip(kvs[::2], kvs[1::2])),
+	'set': lambda *elts: set(elts),
+	'pdict': lambda *kvs: PDict.from_pairs(zip(kvs[::2], kvs[1::2])),
+	'pset': lambda *elts: PSet.from_iterable(elts),
+	'get': lambda m, k, default=None: m.get(k, default),
+	'contains': lambda xs, x: x in xs,
+	'insert': lambda xs, *args: _insert(xs, *args),
+	'remove': lambda xs, x: _remove(xs, x),
+	'append': lambda x, xs: Cons(x, cons_list(xs)),
+	'head': lambda xs: xs[0],
+	'tail': lambda xs: _tail(xs),
+	'pvector': lambda *elts: PVector.from_iterable(elts),
+	'push': lambda xs, x: xs.push(x),
+	'assoc': lambda xs, i, x: xs.assoc(i, x),
+	'foldl': lambda f, xs: reduce(f, xs),
+	'pmap': pmap,
+	'pfilter': pfilter,
+	'preduce': preduce,
+	'par': par,
+	PAR_BUILTIN: par,
+	'map': lambda f, xs: Seq.lazy(map, f, xs),
+	'filter': lambda f, xs: Seq.lazy(filter, f, xs),
+	'range': lambda start, end: Seq(range(start, end)),
+	'take': lambda n, xs: Seq.lazy(islice, xs, n),
+	'zip': lambda *xss: Seq.lazy(zip, *xss),
+	'force': lambda xs: list(xs),
+	'length': len,
+	ACID_ENV: True
+}
+
+
+def _tail(xs):
+	if isinstance(xs, Cons):
+		if xs is NIL:
+			raise IndexError('tail of empty list')
+
+		return xs.tail
+
+	return xs[1:]
+
+
+def _insert(xs, *args):
+	# native collections are updated on a copy, persistent ones share their
+	# structure with the original
+	if isinstance(xs, dict):
+		key, value = args
+		updated = xs.copy()
+		updated[key] = value
+		return updated
+
+	if isinstance(xs, set):
+		elt, = args
+		return xs | {elt}
+
+	return xs.insert(*args)
+
+
+def _remove(xs, x):
+	if isinstance(xs, dict):
+		updated = xs.copy()
+		updated.pop(x, None)
+		return updated
+
+	if isinstance(xs, set):
+		return xs - {x}
+
+	return xs.remove(x)
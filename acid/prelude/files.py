@@ -0,0 +1,113 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the streaming file builtins of Acid. Files are read through `mmap`, and
+returned as lazy sequences (see `acid.prelude.sequence`), so that they can be
+processed by `map`, `filter` and `foldl` in constant memory whatever their
+size.
+
+Contributors: myrma
+"""
+
+__all__ = ['open_lines', 'read_chunks', 'write_lines']
+
+import os
+import mmap
+from itertools import islice
+
+from acid.prelude.sequence import Seq
+
+
+# number of lines written at once by `write_lines`
+WRITE_BATCH_SIZE = 4096
+
+
+def _map_file(path):
+	"""
+	Maps a file in memory, or returns None if it is empty (empty files cannot
+	be mapped).
+	"""
+
+	with open(path, 'rb') as file:
+		if os.fstat(file.fileno()).st_size == 0:
+			return None
+
+		# the mapping stays valid once the file is closed
+		return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _iter_lines(path, encoding):
+	mapped = _map_file(path)
+
+	if mapped is None:
+		return
+
+	try:
+		with memoryview(mapped) as view:
+			start, size = 0, len(mapped)
+
+			while start < size:
+				end = mapped.find(b'\n', start)
+
+				if end < 0:
+					end = size
+
+				# decodes straight from the mapping, without copying the line
+				line = str(view[start:end], encoding)
+				start = end + 1
+
+				yield line[:-1] if line.endswith('\r') else line
+	finally:
+		mapped.close()
+
+
+def _iter_chunks(mapped, size):
+	if mapped is None:
+		return
+
+	view = memoryview(mapped)
+
+	for start in range(0, len(view), size):
+		yield view[start:start + size]
+
+
+def open_lines(path, encoding='utf-8'):
+	"""
+	Returns the lazy sequence of the lines of a text file, without their line
+	terminators.
+	"""
+
+	return Seq.lazy(_iter_lines, path, encoding)
+
+
+def read_chunks(path, size):
+	"""
+	Returns the lazy sequence of the chunks of a binary file. Chunks are
+	`memoryview` slices of the mapped file, so no data is copied; the mapping
+	is released once no chunk refers to it anymore.
+	"""
+
+	return Seq.lazy(lambda: _iter_chunks(_map_file(path), size))
+
+
+def write_lines(path, lines, encoding='utf-8'):
+	"""
+	Writes a sequence of lines to a text file, by batches of
+	`WRITE_BATCH_SIZE` lines, and returns the number of lines written.
+	"""
+
+	count = 0
+	lines = iter(lines)
+
+	with open(path, 'w', encoding=encoding) as file:
+		while True:
+			batch = [str(line) + '\n' for line in islice(lines, WRITE_BATCH_SIZE)]
+
+			if not batch:
+				break
+
+			file.writelines(batch)
+			count += len(batch)
+
+	return count
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the persistent hash map (`PDict`) and hash set (`PSet`) of Acid, based
+on a hash array mapped trie. Inserting or removing a key returns a new
+collection which shares all the untouched branches with the original one.
+
+Contributors: myrma
+"""
+
+__all__ = ['PDict', 'PSet']
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+
+# marks a missing key, since None is a valid Acid value
+_MISSING = object()
+
+
+def _hash(key):
+	return hash(key) & _HASH_MASK
+
+
+def _popcount(n):
+	return bin(n).count('1')
+
+
+class _BitmapNode:
+	"""
+	Trie node holding up to 32 entries. An entry is either a (key, value)
+	tuple or a sub-node.
+	"""
+
+	__slots__ = ('bitmap', 'array')
+
+	def __init__(self, bitmap, array):
+		self.bitmap = bitmap
+		self.array = array
+
+	def find(self, h, shift, key):
+		bit = 1 << ((h >> shift) & _MASK)
+
+		if not self.bitmap & bit:
+			return _MISSING
+
+		entry = self.array[_popcount(self.bitmap & (bit - 1))]
+
+		if isinstance(entry, tuple):
+			return entry[1] if entry[0] == key else _MISSING
+
+		return entry.find(h, shift + _BITS, key)
+
+	def assoc(self, h, shift, key, value):
+		"""
+		Returns the updated node, and whether a new key was added.
+		"""
+
+		bit = 1 << ((h >> shift) & _MASK)
+		index = _popcount(self.bitmap & (bit - 1))
+
+		if not self.bitmap & bit:
+			array = self.array[:index] + ((key, value),) + self.array[index:]
+			return _BitmapNode(self.bitmap | bit, array), True
+
+		entry = self.array[index]
+
+		if isinstance(entry, tuple):
+			if entry[0] == key:
+				if entry[1] is value:
+					return self, False
+
+				new_entry = (key, value)
+				added = False
+			else:
+				new_entry = _merge(entry, _hash(entry[0]), (key, value), h,
+								   shift + _BITS)
+				added = True
+		else:
+			new_entry, added = entry.assoc(h, shift + _BITS, key, value)
+
+			if new_entry is entry:
+				return self, False
+
+		array = self.array[:index] + (new_entry,) + self.array[index + 1:]
+		return _BitmapNode(self.bitmap, array), added
+
+	def dissoc(self, h, shift, key):
+		"""
+		Returns the updated node, or None if it became empty.
+		"""
+
+		bit = 1 << ((h >> shift) & _MASK)
+
+		if not self.bitmap & bit:
+			return self
+
+		index = _popcount(self.bitmap & (bit - 1))
+		entry = self.array[index]
+
+		if isinstance(entry, tuple):
+			if entry[0] != key:
+				return self
+
+			new_entry = None
+		else:
+			new_entry = entry.dissoc(h, shift + _BITS, key)
+
+			if new_entry is entry:
+				return self
+
+		if new_entry is None:
+			if self.bitmap == bit:
+				return None
+
+			array = self.array[:index] + self.array[index + 1:]
+			return _BitmapNode(self.bitmap ^ bit, array)
+
+		array = self.array[:index] + (new_entry,) + self.array[index + 1:]
+		return _BitmapNode(self.bitmap, array)
+
+	def items(self):
+		for entry in self.array:
+			if isinstance(entry, tuple):
+				yield entry
+			else:
+				yield from entry.items()
+
+
+class _CollisionNode:
+	"""
+	Leaf node holding the entries whose keys have the same hash.
+	"""
+
+	__slots__ = ('hash', 'entries')
+
+	def __init__(self, hash, entries):
+		self.hash = hash
+		self.entries = entries
+
+	def find(self, h, shift, key):
+		for k, v in self.entries:
+			if k == key:
+				return v
+
+		return _MISSING
+
+	def assoc(self, h, shift, key, value):
+		if h != self.hash:
+			# different hash on the same path: split with a bitmap node
+			bit = 1 << ((self.hash >> shift) & _MASK)
+			node = _BitmapNode(bit, (self,))
+			return node.assoc(h, shift, key, value)
+
+		for i, (k, v) in enumerate(self.entries):
+			if k == key:
+				entries = self.entries[:i] + ((key, value),) + self.entries[i + 1:]
+				return _CollisionNode(h, entries), False
+
+		return _CollisionNode(h, self.entries + ((key, value),)), True
+
+	def dissoc(self, h, shift, key):
+		entries = tuple(entry for entry in self.entries if entry[0] != key)
+
+		if len(entries) == len(self.entries):
+			return self
+		elif not entries:
+			return None
+
+		return _CollisionNode(h, entries)
+
+	def items(self):
+		return iter(self.entries)
+
+
+def _merge(entry1, h1, entry2, h2, shift):
+	"""
+	Builds the node holding two entries whose hashes share their first bits.
+	"""
+
+	if h1 == h2 or shift >= 64:
+		return _CollisionNode(h1, (entry1, entry2))
+
+	index1 = (h1 >> shift) & _MASK
+	index2 = (h2 >> shift) & _MASK
+
+	if index1 == index2:
+		child = _merge(entry1, h1, entry2, h2, shift + _BITS)
+		return _BitmapNode(1 << index1, (child,))
+
+	if index1 > index2:
+		entry1, entry2 = entry2, entry1
+
+	return _BitmapNode((1 << index1) | (1 << index2), (entry1, entry2))
+
+
+_EMPTY_NODE = _BitmapNode(0, ())
+
+
+class PDict:
+	"""
+	Persistent hash map.
+	"""
+
+	__slots__ = ('count', 'root')
+
+	def __init__(self, count=0, root=_EMPTY_NODE):
+		self.count = count
+		self.root = root
+
+	@classmethod
+	def from_pairs(cls, pairs):
+		pdict = cls()
+
+		for key, value in pairs:
+			pdict = pdict.insert(key, value)
+
+		return pdict
+
+	def get(self, key, default=None):
+		value = self.root.find(_hash(key), 0, key)
+		return default if value is _MISSING else value
+
+	def insert(self, key, value):
+		"""
+		Returns a new map where `key` is bound to `value`.
+		"""
+
+		root, added = self.root.assoc(_hash(key), 0, key, value)
+
+		if root is self.root:
+			return self
+
+		return PDict(self.count + added, root)
+
+	def remove(self, key):
+		"""
+		Returns a new map without `key`.
+		"""
+
+		root = self.root.dissoc(_hash(key), 0, key)
+
+		if root is self.root:
+			return self
+
+		return PDict(self.count - 1, root or _EMPTY_NODE)
+
+	def items(self):
+		return self.root.items()
+
+	def keys(self):
+		return (key for key, _ in self.items())
+
+	def values(self):
+		return (value for _, value in self.items())
+
+	def __getitem__(self, key):
+		value = self.root.find(_hash(key), 0, key)
+
+		if value is _MISSING:
+			raise KeyError(key)
+
+		return value
+
+	def __contains__(self, key):
+		return self.root.find(_hash(key), 0, key) is not _MISSING
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		return self.keys()
+
+	def __eq__(self, other):
+		if isinstance(other, (PDict, dict)):
+			return len(self) == len(other) and all(
+				key in other and other[key] == value
+				for key, value in self.items())
+
+		return NotImplemented
+
+	def __repr__(self):
+		return 'pdict{!r}'.format(dict(self.items()))
+
+
+class PSet:
+	"""
+	Persistent hash set, stored as the keys of a `PDict`.
+	"""
+
+	__slots__ = ('elements',)
+
+	def __init__(self, elements=PDict()):
+		self.elements = elements
+
+	@classmethod
+	def from_iterable(cls, iterable):
+		pset = cls()
+
+		for elt in iterable:
+			pset = pset.insert(elt)
+
+		return pset
+
+	def insert(self, elt):
+		"""
+		Returns a new set containing `elt`.
+		"""
+
+		return PSet(self.elements.insert(elt, True))
+
+	def remove(self, elt):
+		"""
+		Returns a new set without `elt`.
+		"""
+
+		return PSet(self.elements.remove(elt))
+
+	def __contains__(self, elt):
+		return elt in self.elements
+
+	def __len__(self):
+		return len(self.elements)
+
+	def __iter__(self):
+		return self.elements.keys()
+
+	def __eq__(self, other):
+		if isinstance(other, (PSet, set, frozenset)):
+			return len(self) == len(other) and all(elt in other for elt in self)
+
+		return NotImplemented
+
+	def __repr__(self):
+		return 'pset{!r}'.format(set(self))
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the data-parallel builtins of Acid (`pmap`, `pfilter` and `preduce`),
+which split a sequence in chunks processed by a reusable process pool.
+
+Compiled Acid functions cannot be pickled, so they are shipped to the workers
+as their marshalled code object, along with the values of their closure and of
+the globals they use. The Acid functions among those globals are shipped the
+same way, so that a worker recreates only the functions the shipped one may
+call, without running the module again.
+
+The `par` builtin, targeted by the `(par e1 e2 ...)` special form, uses the
+same pool for fork-join task parallelism.
+
+Contributors: myrma
+"""
+
+__all__ = ['ACID_ENV', 'PAR_BUILTIN', 'configure', 'pmap', 'pfilter', 'preduce', 'par']
+
+import os
+import types
+import marshal
+import threading
+from functools import reduce
+from concurrent.futures import ProcessPoolExecutor
+
+from acid.prelude.sequence import Seq
+
+
+# key of the prelude marking the environments of Acid code, whose functions
+# are shipped to the workers
+ACID_ENV = '__acid_env__'
+
+# name of the `par` builtin called by the `(par ...)` form, which Acid code
+# cannot rebind since atoms cannot contain spaces
+PAR_BUILTIN = 'par form'
+
+# default number of chunks per worker when the chunk size is not fixed
+CHUNKS_PER_WORKER = 4
+
+# default number of `par` tasks waiting in the pool per worker
+PENDING_PER_WORKER = 2
+
+# default number of nested `par` levels forking tasks, beyond those needed to
+# give a task to every worker
+EXTRA_DEPTH = 2
+
+_settings = {
+	'workers': None,
+	'chunk_size': None,
+	'max_pending': None,
+	'max_depth': None
+}
+_executor = None
+
+# process which owns the pool: `par` runs sequentially in the workers
+_owner_pid = None
+
+_pending = 0
+_pending_lock = threading.Lock()
+
+# number of `par` calls being evaluated by the current thread
+_nesting = threading.local()
+
+
+def configure(workers=None, chunk_size=None, max_pending=None, max_depth=None):
+	"""
+	Sets the number of worker processes (defaults to the number of CPUs), the
+	number of elements sent to a worker at once (computed from the input size
+	by default), the maximum number of `par` tasks waiting for a worker and
+	the maximum nesting depth of the `par` calls which fork tasks, beyond
+	which `par` falls back to sequential evaluation. Restarts the pool if it
+	was running.
+	"""
+
+	global _executor
+
+	_settings.update(
+		workers=workers,
+		chunk_size=chunk_size,
+		max_pending=max_pending,
+		max_depth=max_depth
+	)
+
+	if _executor is not None:
+		_executor.shutdown()
+		_executor = None
+
+
+def _get_executor():
+	global _executor, _owner_pid
+
+	if _executor is None:
+		_executor = ProcessPoolExecutor(max_workers=_worker_count())
+		_owner_pid = os.getpid()
+
+	return _executor
+
+
+def _worker_count():
+	return _settings['workers'] or os.cpu_count() or 1
+
+
+def _chunks(xs):
+	size = _settings['chunk_size']
+
+	if size is None:
+		size = -(-len(xs) // (_worker_count() * CHUNKS_PER_WORKER)) or 1
+
+	return [xs[i:i + size] for i in range(0, len(xs), size)]
+
+
+# Function shipping
+
+class _PreludeValue:
+	"""
+	Picklable reference to a builtin value, looked up by name in the worker.
+	"""
+
+	def __init__(self, name):
+		self.name = name
+
+	def unship(self):
+		return _prelude()[self.name]
+
+
+class _Function:
+	"""
+	Picklable description of a compiled Acid function, recreated in a given
+	environment.
+	"""
+
+	def __init__(self, func):
+		self.code = marshal.dumps(func.__code__)
+		self.name = func.__name__
+		self.closure = tuple(
+			_ship(cell.cell_contents) for cell in func.__closure__ or ())
+
+	def build(self, env):
+		closure = tuple(_make_cell(_unship(value)) for value in self.closure)
+		code = marshal.loads(self.code)
+		return types.FunctionType(code, env, self.name, None, closure or None)
+
+
+class _RemoteFunction:
+	"""
+	Picklable stand-in for a compiled Acid function.
+	"""
+
+	def __init__(self, func):
+		self.function = _Function(func)
+		self.globals = _ship_globals(func)
+
+	def unship(self):
+		env = _prelude().copy()
+
+		for name, value in self.globals.items():
+			if isinstance(value, _Function):
+				env[name] = value.build(env)
+			else:
+				env[name] = _unship(value)
+
+		return self.function.build(env)
+
+
+def _ship_globals(func):
+	"""
+	Returns the shipped values of the globals used by a function, and by the
+	Acid functions of its environment that it uses, transitively.
+	"""
+
+	env = func.__globals__
+	prelude = _prelude()
+	shipped = {}
+	functions = [func]
+
+	while functions:
+		for name in _global_names(functions.pop().__code__):
+			if name in shipped or name not in env:
+				continue
+
+			value = env[name]
+
+			if name in prelude and value is prelude[name]:
+				continue
+
+			if isinstance(value, types.FunctionType) and value.__globals__ is env:
+				# recreated in the same environment, which handles recursion
+				shipped[name] = _Function(value)
+				functions.append(value)
+			else:
+				shipped[name] = _ship(value)
+
+	return shipped
+
+
+def _global_names(code):
+	names = set(code.co_names)
+
+	for const in code.co_consts:
+		if isinstance(const, types.CodeType):
+			names.update(_global_names(const))
+
+	return names
+
+
+def _prelude():
+	# imported lazily, since the prelude itself includes this module
+	from acid.prelude.builtins import default_env
+	return default_env
+
+
+def _ship(value):
+	if isinstance(value, types.FunctionType):
+		if value.__globals__.get(ACID_ENV):
+			return _RemoteFunction(value)
+
+		for name, builtin in _prelude().items():
+			if builtin is value:
+				return _PreludeValue(name)
+
+	if isinstance(value, Seq):
+		# a lazy sequence can hold Acid functions: its elements are sent
+		return Seq(list(value))
+
+	return value
+
+
+def _unship(value):
+	if isinstance(value, (_RemoteFunction, _PreludeValue)):
+		return value.unship()
+
+	return value
+
+
+def _make_cell(value):
+	return (lambda: value).__closure__[0]
+
+
+# Worker tasks
+
+def _map_chunk(func, chunk):
+	func = _unship(func)
+	return [func(x) for x in chunk]
+
+
+def _filter_chunk(func, chunk):
+	func = _unship(func)
+	return [x for x in chunk if func(x)]
+
+
+def _reduce_chunk(func, chunk):
+	return reduce(_unship(func), chunk)
+
+
+def _run(task, func, xs):
+	xs = list(xs)
+	chunks = _chunks(xs)
+
+	if len(chunks) <= 1 or _worker_count() == 1:
+		# not worth the inter-process communication
+		return [task(func, chunk) for chunk in chunks]
+
+	shipped = _ship(func)
+	executor = _get_executor()
+	return list(executor.map(task, [shipped] * len(chunks), chunks))
+
+
+def pmap(func, xs):
+	"""
+	Maps a function over a sequence in parallel, keeping the result order.
+	"""
+
+	return [y for chunk in _run(_map_chunk, func, xs) for y in chunk]
+
+
+def pfilter(func, xs):
+	"""
+	Filters a sequence in parallel, keeping the result order.
+	"""
+
+	return [y for chunk in _run(_filter_chunk, func, xs) for y in chunk]
+
+
+def preduce(func, xs):
+	"""
+	Reduces a sequence in parallel. The function must be associative, since
+	the chunks are reduced independently before their results are combined.
+	"""
+
+	return reduce(func, _run(_reduce_chunk, func, xs))
+
+
+def _call(thunk):
+	return _unship(thunk)()
+
+
+def _max_depth():
+	max_depth = _settings['max_depth']
+
+	if max_depth is None:
+		# a binary fork-join gives a task to every worker after log2(workers)
+		# levels, the deeper tasks are too small to pay for their shipping
+		max_depth = (_worker_count() - 1).bit_length() + EXTRA_DEPTH
+
+	return max_depth
+
+
+def _can_fork(count, depth):
+	if _owner_pid not in (None, os.getpid()) or _worker_count() == 1:
+		return False
+
+	if depth >= _max_depth():
+		return False
+
+	max_pending = _settings['max_pending']
+
+	if max_pending is None:
+		max_pending = _worker_count() * PENDING_PER_WORKER
+
+	return _pending + count <= max_pending
+
+
+def _task_done(future):
+	global _pending
+
+	with _pending_lock:
+		_pending -= 1
+
+
+def par(*thunks):
+	"""
+	Calls the given functions concurrently and returns the list of their
+	results. The first one is called in the current process while the others
+	wait in the pool queue for an idle worker. When too many tasks are already
+	pending, when nested in too many `par` calls, or when called from a
+	worker, the functions are called sequentially instead.
+	"""
+
+	depth = getattr(_nesting, 'depth', 0)
+	_nesting.depth = depth + 1
+
+	try:
+		if len(thunks) < 2 or not _can_fork(len(thunks) - 1, depth):
+			return [thunk() for thunk in thunks]
+
+		return _fork(thunks)
+	finally:
+		_nesting.depth = depth
+
+
+def _fork(thunks):
+	global _pending
+
+	executor = _get_executor()
+	futures = []
+
+	for thunk in thunks[1:]:
+		with _pending_lock:
+			_pending += 1
+
+		future = executor.submit(_call, _ship(thunk))
+		future.add_done_callback(_task_done)
+		futures.append(future)
+
+	first = thunks[0]()
+	return [first] + [future.result() for future in futures]
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the persistent (immutable) sequences of Acid:
+
+- `Cons`, a singly linked list with O(1) prepend, used by `append`,
+- `PVector`, a 32-way bit-partitioned trie with O(log32 n) indexed access,
+  push and update.
+
+Updating a persistent sequence returns a new one that shares its structure with
+the original. Both types can be converted to Python lists with `list(seq)`.
+
+Contributors: myrma
+"""
+
+__all__ = ['Cons', 'NIL', 'cons_list', 'PVector']
+
+from itertools import islice
+
+
+class Cons:
+	"""
+	Persistent linked list cell. The empty list is the `NIL` singleton.
+	"""
+
+	__slots__ = ('head', 'tail', 'length')
+
+	def __init__(self, head, tail):
+		self.head = head
+		self.tail = tail
+		self.length = tail.length + 1
+
+	def __len__(self):
+		return self.length
+
+	def __bool__(self):
+		return self.length > 0
+
+	def __iter__(self):
+		cell = self
+
+		while cell is not NIL:
+			yield cell.head
+			cell = cell.tail
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			bounds = (index.start, index.stop, index.step)
+
+			if all(bound is None or bound >= 0 for bound in bounds):
+				return cons_list(islice(self, *bounds))
+
+			# negative bounds and steps are relative to the end
+			return cons_list(list(self)[index])
+
+		if index < 0:
+			index += self.length
+
+		if not 0 <= index < self.length:
+			raise IndexError('list index out of range')
+
+		cell = self
+
+		for _ in range(index):
+			cell = cell.tail
+
+		return cell.head
+
+	def __add__(self, other):
+		if not isinstance(other, _CONCATENABLE):
+			return NotImplemented
+
+		# only the cells of the left list are copied
+		return _prepend(self, cons_list(other))
+
+	def __radd__(self, other):
+		if not isinstance(other, _CONCATENABLE):
+			return NotImplemented
+
+		return _prepend(other, self)
+
+	def __eq__(self, other):
+		if isinstance(other, (Cons, PVector, list, tuple)):
+			return len(self) == len(other) and all(
+				x == y for x, y in zip(self, other))
+
+		return NotImplemented
+
+	def __repr__(self):
+		return repr(list(self))
+
+
+class _Nil(Cons):
+	"""
+	The empty persistent list.
+	"""
+
+	__slots__ = ()
+
+	def __init__(self):
+		self.head = None
+		self.tail = self
+		self.length = 0
+
+	def __reduce__(self):
+		# unpickled as the singleton, which is compared by identity
+		return 'NIL'
+
+
+NIL = _Nil()
+
+
+def cons_list(iterable):
+	"""
+	Builds a persistent list from a Python iterable.
+	"""
+
+	if isinstance(iterable, Cons):
+		return iterable
+
+	result = NIL
+
+	for elt in reversed(list(iterable)):
+		result = Cons(elt, result)
+
+	return result
+
+
+def _prepend(elements, cons):
+	for elt in reversed(list(elements)):
+		cons = Cons(elt, cons)
+
+	return cons
+
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+
+class PVector:
+	"""
+	Persistent vector implemented as a 32-way trie of tuples whose last leaf
+	(the tail) is kept apart to make `push` cheap.
+	"""
+
+	__slots__ = ('count', 'shift', 'root', 'tail')
+
+	def __init__(self, count=0, shift=_BITS, root=(), tail=()):
+		self.count = count
+		self.shift = shift
+		self.root = root
+		self.tail = tail
+
+	@classmethod
+	def from_iterable(cls, iterable):
+		vec = cls()
+
+		for elt in iterable:
+			vec = vec.push(elt)
+
+		return vec
+
+	def _tail_offset(self):
+		if self.count < _WIDTH:
+			return 0
+
+		return ((self.count - 1) >> _BITS) << _BITS
+
+	def _leaf_for(self, index):
+		if index >= self._tail_offset():
+			return self.tail
+
+		node = self.root
+
+		for level in range(self.shift, 0, -_BITS):
+			node = node[(index >> level) & _MASK]
+
+		return node
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		for start in range(0, self.count, _WIDTH):
+			yield from self._leaf_for(start)
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return PVector.from_iterable(
+				self[i] for i in range(*index.indices(self.count)))
+
+		if index < 0:
+			index += self.count
+
+		if not 0 <= index < self.count:
+			raise IndexError('vector index out of range')
+
+		return self._leaf_for(index)[index & _MASK]
+
+	def push(self, value):
+		"""
+		Returns a new vector with the value appended at the end.
+		"""
+
+		if self.count - self._tail_offset() < _WIDTH:
+			tail = self.tail + (value,)
+			return PVector(self.count + 1, self.shift, self.root, tail)
+
+		# the tail is full: insert it in the trie
+		shift = self.shift
+
+		if (self.count >> _BITS) > (1 << self.shift):
+			# root overflow
+			root = (self.root, _new_path(self.shift, self.tail))
+			shift += _BITS
+		else:
+			root = self._push_tail(self.shift, self.root, self.tail)
+
+		return PVector(self.count + 1, shift, root, (value,))
+
+	def _push_tail(self, level, parent, tail):
+		index = ((self.count - 1) >> level) & _MASK
+
+		if level == _BITS:
+			child = tail
+		elif index < len(parent):
+			child = self._push_tail(level - _BITS, parent[index], tail)
+		else:
+			child = _new_path(level - _BITS, tail)
+
+		return parent[:index] + (child,) + parent[index + 1:]
+
+	def assoc(self, index, value):
+		"""
+		Returns a new vector where the value at the given index is replaced.
+		"""
+
+		if index < 0:
+			index += self.count
+
+		if not 0 <= index < self.count:
+			raise IndexError('vector index out of range')
+
+		if index >= self._tail_offset():
+			i = index & _MASK
+			tail = self.tail[:i] + (value,) + self.tail[i + 1:]
+			return PVector(self.count, self.shift, self.root, tail)
+
+		root = _assoc(self.shift, self.root, index, value)
+		return PVector(self.count, self.shift, root, self.tail)
+
+	def __add__(self, other):
+		if not isinstance(other, _CONCATENABLE):
+			return NotImplemented
+
+		vec = self
+
+		for elt in other:
+			vec = vec.push(elt)
+
+		return vec
+
+	def __radd__(self, other):
+		if not isinstance(other, _CONCATENABLE):
+			return NotImplemented
+
+		return PVector.from_iterable(other) + self
+
+	def __eq__(self, other):
+		if isinstance(other, (Cons, PVector, list, tuple)):
+			return len(self) == len(other) and all(
+				x == y for x, y in zip(self, other))
+
+		return NotImplemented
+
+	def __repr__(self):
+		return 'pvector{!r}'.format(list(self))
+
+
+def _new_path(level, node):
+	while level > 0:
+		node = (node,)
+		level -= _BITS
+
+	return node
+
+
+def _assoc(level, node, index, value):
+	i = (index >> level) & _MASK
+
+	if level == 0:
+		return node[:i] + (value,) + node[i + 1:]
+
+	child = _assoc(level - _BITS, node[i], index, value)
+	return node[:i] + (child,) + node[i + 1:]
+
+
+# sequences which can be concatenated to a persistent sequence, giving a
+# sequence of the same type
+_CONCATENABLE = (Cons, PVector, list, tuple)
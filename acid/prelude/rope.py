@@ -0,0 +1,146 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the rope string type of Acid, and the type-aware n-ary concatenation
+used by the `+` builtin.
+
+Contributors: myrma
+"""
+
+__all__ = ['Rope', 'concat']
+
+import operator as op
+from functools import reduce
+from itertools import chain
+
+from acid.prelude.sequence import Seq, CHAINABLE
+from acid.prelude.persistent import Cons
+
+
+class Rope:
+	"""
+	Immutable string built from a tree of concatenations. Concatenating to a
+	rope takes constant time; the string is only flattened (once) when it is
+	printed, indexed, compared or iterated over.
+	"""
+
+	__slots__ = ('left', 'right', 'length', '_flat')
+
+	def __init__(self, left='', right=''):
+		self.left = left
+		self.right = right
+		self.length = len(left) + len(right)
+		self._flat = None
+
+	@classmethod
+	def of(cls, parts):
+		"""
+		Builds a rope from a sequence of strings or ropes.
+		"""
+
+		rope = cls()
+
+		for part in parts:
+			rope = rope + part
+
+		return rope
+
+	def flatten(self):
+		"""
+		Returns the Python string represented by the rope.
+		"""
+
+		if self._flat is None:
+			pieces = []
+			stack = [self]
+
+			# iterative traversal, since accumulated ropes are deep trees
+			while stack:
+				node = stack.pop()
+
+				if isinstance(node, str):
+					pieces.append(node)
+				elif node._flat is not None:
+					pieces.append(node._flat)
+				else:
+					stack.append(node.right)
+					stack.append(node.left)
+
+			self._flat = ''.join(pieces)
+
+		return self._flat
+
+	def __add__(self, other):
+		if isinstance(other, (str, Rope)):
+			return Rope(self, other)
+
+		return NotImplemented
+
+	def __radd__(self, other):
+		if isinstance(other, str):
+			return Rope(other, self)
+
+		return NotImplemented
+
+	def __len__(self):
+		return self.length
+
+	def __iter__(self):
+		return iter(self.flatten())
+
+	def __getitem__(self, index):
+		return self.flatten()[index]
+
+	def __eq__(self, other):
+		if isinstance(other, (str, Rope)):
+			return str(self) == str(other)
+
+		return NotImplemented
+
+	def __hash__(self):
+		return hash(self.flatten())
+
+	def __str__(self):
+		return self.flatten()
+
+	def __repr__(self):
+		return repr(self.flatten())
+
+
+def concat(*xs):
+	"""
+	Adds or concatenates the given values. Strings, lists and tuples are joined
+	in a single pass instead of building n-1 intermediate objects, and lazy
+	sequences are chained without being computed.
+	"""
+
+	first = xs[0]
+
+	if isinstance(first, (int, float)):
+		# fast path for arithmetic
+		return reduce(op.add, xs)
+
+	elif isinstance(first, str):
+		if all(isinstance(x, str) for x in xs):
+			return ''.join(xs)
+
+	elif isinstance(first, list):
+		if all(isinstance(x, list) for x in xs):
+			return list(chain.from_iterable(xs))
+
+	elif isinstance(first, tuple):
+		if all(isinstance(x, tuple) for x in xs):
+			return tuple(chain.from_iterable(xs))
+
+	elif isinstance(first, Cons):
+		if not any(isinstance(x, Seq) for x in xs):
+			# folded from the right, so that each list is copied once and the
+			# last one is shared
+			return reduce(lambda right, left: left + right, reversed(xs))
+
+	if any(isinstance(x, Seq) for x in xs):
+		if all(isinstance(x, CHAINABLE) for x in xs):
+			return Seq.lazy(chain, *xs)
+
+	return reduce(op.add, xs)
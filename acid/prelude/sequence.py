@@ -0,0 +1,101 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the lazy sequence type used by the sequence builtins of Acid.
+
+Contributors: myrma
+"""
+
+__all__ = ['Seq']
+
+from itertools import islice, chain
+
+from acid.prelude.persistent import Cons, PVector
+
+
+class _Reiterable:
+	"""
+	Calls a function each time it is iterated over, so that a lazy pipeline
+	can be traversed more than once.
+	"""
+
+	def __init__(self, func, args):
+		self.func = func
+		self.args = args
+
+	def __iter__(self):
+		return iter(self.func(*self.args))
+
+
+class Seq:
+	"""
+	Lazy sequence of values. Elements are only computed when the sequence is
+	iterated over, so chaining `map`, `filter` or `take` on a `range` never
+	allocates intermediate lists.
+	"""
+
+	def __init__(self, source):
+		# any re-iterable object (range, list, _Reiterable...)
+		self.source = source
+
+	@classmethod
+	def lazy(cls, func, *args):
+		"""
+		Builds a sequence whose elements are produced by `func(*args)`,
+		re-evaluated on every traversal.
+		"""
+
+		return cls(_Reiterable(func, args))
+
+	def __iter__(self):
+		return iter(self.source)
+
+	def __len__(self):
+		try:
+			return len(self.source)
+		except TypeError:
+			return sum(1 for _ in self)
+
+	def __getitem__(self, index):
+		try:
+			# fast path for indexable sources such as ranges
+			return self.source[index]
+		except TypeError:
+			pass
+
+		if isinstance(index, slice):
+			return Seq.lazy(islice, self, index.start, index.stop, index.step)
+
+		if index < 0:
+			return list(self)[index]
+
+		try:
+			return next(islice(self, index, None))
+		except StopIteration:
+			raise IndexError('sequence index out of range') from None
+
+	def __add__(self, other):
+		if isinstance(other, CHAINABLE):
+			return Seq.lazy(chain, self, other)
+
+		return NotImplemented
+
+	def __radd__(self, other):
+		if isinstance(other, CHAINABLE):
+			return Seq.lazy(chain, other, self)
+
+		return NotImplemented
+
+	def __eq__(self, other):
+		if isinstance(other, (Seq, list, tuple, range)):
+			return list(self) == list(other)
+
+		return NotImplemented
+
+	def __repr__(self):
+		return repr(list(self))
+
+
+# sequences which can be concatenated to a Seq, giving a lazy Seq
+CHAINABLE = (Seq, list, tuple, range, Cons, PVector)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines an optional prelude extension providing a `vector` type backed by
+`numpy.ndarray`. The arithmetic builtins of the extended environment apply
+NumPy ufuncs elementwise when one of their arguments is a vector.
+
+This module can be imported without NumPy, but `vector_env` then raises an
+ImportError.
+
+Contributors: myrma
+"""
+
+__all__ = ['vector_env', 'ELEMENTWISE_NAMES']
+
+from functools import reduce
+
+from acid.prelude.builtins import default_env
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+# Acid builtin names and the attribute name of their NumPy ufunc, which must
+# compute the same values as the scalar builtins (`and` is bitwise, like
+# `operator.and_`)
+_UFUNCS = {
+	'+': 'add',
+	'-': 'subtract',
+	'*': 'multiply',
+	'/': 'true_divide',
+	'**': 'power',
+	'div': 'floor_divide',
+	'mod': 'mod',
+	'==': 'equal',
+	'!=': 'not_equal',
+	'<': 'less',
+	'<=': 'less_equal',
+	'>': 'greater',
+	'>=': 'greater_equal',
+	'and': 'bitwise_and',
+	'or': 'bitwise_or',
+	'xor': 'bitwise_xor',
+	'not': 'logical_not',
+	'negate': 'negative',
+	'<<': 'left_shift',
+	'>>': 'right_shift',
+	'~': 'invert',
+}
+
+# n-ary builtins, reduced over their arguments
+_VARIADIC = {'+', '*'}
+
+# names whose application to vectors is a single elementwise operation
+ELEMENTWISE_NAMES = frozenset(_UFUNCS)
+
+
+def _elementwise(name, scalar_func):
+	ufunc = getattr(numpy, _UFUNCS[name])
+
+	if name in _VARIADIC:
+		def _dispatch(*args):
+			if any(isinstance(arg, numpy.ndarray) for arg in args):
+				return reduce(ufunc, args)
+
+			return scalar_func(*args)
+	else:
+		def _dispatch(*args):
+			if any(isinstance(arg, numpy.ndarray) for arg in args):
+				return ufunc(*args)
+
+			return scalar_func(*args)
+
+	_dispatch.__name__ = scalar_func.__name__
+
+	# not a redefinition of the builtin for the optimizations of the compiler
+	_dispatch.extends = scalar_func
+	return _dispatch
+
+
+def _vmap(func, xs):
+	"""
+	Maps a function over a vector. The function is first applied to the whole
+	vector, which succeeds when it is only made of elementwise operations, and
+	falls back to a call per element otherwise.
+	"""
+
+	xs = numpy.asarray(xs)
+
+	try:
+		result = func(xs)
+	except (TypeError, ValueError):
+		# conditionals on a vector raise a ValueError (ambiguous truth value)
+		result = None
+
+	if isinstance(result, numpy.ndarray) and result.shape == xs.shape:
+		return result
+
+	return numpy.array([func(x) for x in xs])
+
+
+def vector_env(prelude=default_env):
+	"""
+	Returns a copy of the given prelude extended with vector builtins.
+	"""
+
+	if numpy is None:
+		raise ImportError('The vector extension requires NumPy')
+
+	env = prelude.copy()
+
+	for name in _UFUNCS:
+		env[name] = _elementwise(name, prelude[name])
+
+	env.update({
+		'vector': lambda *elts: numpy.array(elts),
+		'vrange': lambda start, end: numpy.arange(start, end),
+		'vsum': lambda xs: numpy.sum(xs),
+		'vmap': _vmap,
+	})
+
+	return env
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines a deterministic profiler of Acid programs. Calls are attributed to the
+Acid functions they run, identified by their declaration name and source span
+(see `acid.compiler.functions`), rather than to anonymous Python lambdas.
+
+For each function, the profiler counts the calls, the inclusive time (spent in
+the function and its callees), the exclusive time (spent in the function
+itself, including the builtins it calls) and the net number of memory blocks it
+allocated. Results are written as a text table, as JSON, or as collapsed stacks
+for flame graph tools.
+
+Contributors: myrma
+"""
+
+__all__ = ['Profiler']
+
+import sys
+import json
+import time
+
+from acid.compiler.functions import function_info
+
+
+class FunctionStats:
+	"""
+	Counters of a profiled Acid function.
+	"""
+
+	__slots__ = ('calls', 'inclusive', 'exclusive', 'blocks')
+
+	def __init__(self):
+		self.calls = 0
+		self.inclusive = 0.0
+		self.exclusive = 0.0
+		self.blocks = 0
+
+
+class Profiler:
+	"""
+	Profiles the Acid functions called while it is enabled.
+
+	ex:
+		with Profiler() as profiler:
+			compiler.execute()
+
+		profiler.print_stats()
+	"""
+
+	def __init__(self, timer=time.perf_counter):
+		self.timer = timer
+
+		# FunctionInfo -> FunctionStats
+		self.stats = {}
+
+		# tuple of FunctionInfo (outermost first) -> exclusive time
+		self.stacks = {}
+
+		# id(code) -> (code, FunctionInfo or None), so that code objects are
+		# looked up only once (their hash is costly)
+		self._codes = {}
+
+		# [info, frame, start time, children time, allocated blocks]
+		self._calls = []
+
+		# FunctionInfo -> number of active calls, to count the inclusive time
+		# of recursive functions once
+		self._active = {}
+
+	def __enter__(self):
+		self.enable()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.disable()
+
+	def enable(self):
+		sys.setprofile(self._dispatch)
+
+	def disable(self):
+		sys.setprofile(None)
+
+	def run(self, func, *args):
+		"""
+		Calls the function with the profiler enabled, and returns its result.
+		"""
+
+		with self:
+			return func(*args)
+
+	def _info(self, code):
+		try:
+			return self._codes[id(code)][1]
+		except KeyError:
+			info = function_info(code)
+			self._codes[id(code)] = code, info
+			return info
+
+	def _dispatch(self, frame, event, arg):
+		if event == 'call':
+			info = self._info(frame.f_code)
+
+			if info is not None:
+				self._active[info] = self._active.get(info, 0) + 1
+				self._calls.append(
+					[info, frame, self.timer(), 0.0, sys.getallocatedblocks()])
+
+		elif event == 'return':
+			calls = self._calls
+
+			if not calls or calls[-1][1] is not frame:
+				return
+
+			blocks = sys.getallocatedblocks()
+			end = self.timer()
+			info, _, start, children, start_blocks = calls.pop()
+
+			elapsed = end - start
+			exclusive = elapsed - children
+
+			stats = self.stats.get(info)
+
+			if stats is None:
+				stats = self.stats[info] = FunctionStats()
+
+			stats.calls += 1
+			stats.exclusive += exclusive
+			stats.blocks += blocks - start_blocks
+			self._active[info] -= 1
+
+			if not self._active[info]:
+				stats.inclusive += elapsed
+
+			stack = tuple(call[0] for call in calls) + (info,)
+			self.stacks[stack] = self.stacks.get(stack, 0.0) + exclusive
+
+			if calls:
+				calls[-1][3] += elapsed
+				# the blocks of the callee are not counted twice
+				calls[-1][4] += blocks - start_blocks
+
+	def sorted_stats(self, key='exclusive'):
+		"""
+		Returns the (FunctionInfo, FunctionStats) pairs, in decreasing order
+		of the given counter.
+		"""
+
+		return sorted(self.stats.items(),
+					  key=lambda item: getattr(item[1], key), reverse=True)
+
+	def print_stats(self, file=None, sort='exclusive', limit=None):
+		"""
+		Prints a table of the profiled functions.
+		"""
+
+		file = file or sys.stdout
+		total = sum(stats.exclusive for stats in self.stats.values())
+
+		print('{:>9} {:>10} {:>10} {:>7} {:>9}  {}'.format(
+			'calls', 'inclusive', 'exclusive', '%', 'blocks', 'function'),
+			  file=file)
+
+		for info, stats in self.sorted_stats(sort)[:limit]:
+			print('{:>9} {:>10.6f} {:>10.6f} {:>6.1f}% {:>9}  {}'.format(
+				stats.calls, stats.inclusive, stats.exclusive,
+				100 * stats.exclusive / total if total else 0,
+				stats.blocks, _describe(info)), file=file)
+
+	def to_json(self):
+		"""
+		Returns the profile as a JSON-serializable list.
+		"""
+
+		return [
+			{
+				'name': info.name,
+				'path': info.path,
+				'line': info.span.start.line,
+				'column': info.span.start.column,
+				'calls': stats.calls,
+				'inclusive': stats.inclusive,
+				'exclusive': stats.exclusive,
+				'blocks': stats.blocks,
+			}
+			for info, stats in self.sorted_stats()
+		]
+
+	def dump_json(self, file):
+		json.dump(self.to_json(), file, indent=2)
+
+	def dump_collapsed(self, file):
+		"""
+		Writes the collapsed stacks of the profile, one line per stack with
+		its exclusive time in microseconds, as read by `flamegraph.pl`.
+		"""
+
+		for stack, elapsed in sorted(self.stacks.items(),
+									 key=lambda item: _stack_key(item[0])):
+			frames = ';'.join(
+				'{}:{}'.format(info.name, info.span.start.line)
+				for info in stack)
+			print(frames, round(elapsed * 1e6), file=file)
+
+
+def _describe(info):
+	return '{} ({}:{}:{})'.format(info.name, info.path or '<string>',
+								  info.span.start.line, info.span.start.column)
+
+
+def _stack_key(stack):
+	return [(info.name, info.span.start.line) for info in stack]
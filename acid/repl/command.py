@@ -59,13 +59,11 @@ class EvalExpr(REPLCommand):
         self.expr = expr
 
     def execute(self, repl):
-        stmt = Declaration(name='_', value=self.expr)
-        module = Program(instructions=[stmt])
-        compiler = Compiler(module)
-
-        compiler.load(repl.environment)
+        code = repl.compile_expr(self.expr)
+        value = eval(code, repl.environment)
 
-        return repl.environment.get('_', None)
+        repl.environment['_'] = value
+        return value
 
 
 class Command(REPLCommand):
@@ -79,14 +77,22 @@ class Command(REPLCommand):
 
     def execute(self, repl):
         try:
+            command = repl.get_command(self.name)
+        except KeyError:
+            print('Unknown command {!r}, please type :help to see the list of \
+commands'.format(self.name))
+            return
+
+        name = repl.aliases.get(self.name, self.name)
+
+        if name in repl.quoted:
+            args = self.args
+        else:
             args = []
             for arg in self.args:
                 args.append(EvalExpr(arg).execute(repl))
 
-            return repl.get_command(self.name)(repl, *args)
-        except KeyError:
-            print('Unknown command {!r}, please type :help to see the list of \
-commands'.format(self.name))
+        return command(repl, *args)
 
 
 class OSCommand(REPLCommand):
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the background jobs of the REPL. A job evaluates an expression in a
+forked worker process, which starts with a copy of the REPL environment, so
+that the prompt stays responsive and the job can be killed at any time.
+
+On platforms without `fork`, jobs run in a thread sharing the environment, and
+cannot be cancelled.
+
+Contributors: myrma
+"""
+
+__all__ = ['Job']
+
+import time
+import pickle
+import threading
+import multiprocessing
+
+
+RUNNING, DONE, FAILED, CANCELLED = 'running', 'done', 'failed', 'cancelled'
+
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context('fork')
+    except ValueError:
+        return None
+
+
+def _evaluate(code, env, conn):
+    # runs in the worker process: the result is sent back pickled, or as its
+    # representation if it cannot be pickled (functions, lazy sequences...)
+    try:
+        result = eval(code, env)
+    except BaseException as exc:
+        conn.send((FAILED, '{}: {}'.format(type(exc).__name__, exc)))
+        return
+
+    try:
+        conn.send((DONE, pickle.dumps(result)))
+    except Exception:
+        conn.send((DONE, pickle.dumps(_Repr(repr(result)))))
+
+
+class _Repr:
+    """
+    Stands for a result which could not be sent back, and prints like it.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+
+class Job:
+    """
+    Evaluation of a compiled expression in the background.
+    """
+
+    def __init__(self, id, description, code, env):
+        self.id = id
+        self.description = description
+        self.state = RUNNING
+        self.result = None
+        self.error = None
+        self.start = time.time()
+        self.end = None
+
+        context = _fork_context()
+
+        if context is not None:
+            self.conn, child_conn = context.Pipe(duplex=False)
+            self.worker = context.Process(target=_evaluate,
+                                          args=(code, env, child_conn),
+                                          daemon=True)
+            self.worker.start()
+            child_conn.close()
+        else:
+            self.conn = None
+            self.worker = threading.Thread(target=self._evaluate_in_thread,
+                                           args=(code, env), daemon=True)
+            self.worker.start()
+
+    @property
+    def cancellable(self):
+        return self.conn is not None
+
+    def _evaluate_in_thread(self, code, env):
+        try:
+            self._finish(DONE, result=eval(code, env))
+        except Exception as exc:
+            self._finish(FAILED, error='{}: {}'.format(type(exc).__name__, exc))
+
+    def _finish(self, state, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.end = time.time()
+        self.state = state
+
+    def poll(self, timeout=0):
+        """
+        Updates the state of the job, waiting at most `timeout` seconds (or
+        forever if None) for it to finish. Returns True if it is finished.
+        """
+
+        if self.state != RUNNING:
+            return True
+
+        if self.conn is None:
+            self.worker.join(timeout)
+            return self.state != RUNNING
+
+        if not self.conn.poll(timeout):
+            if self.worker.is_alive():
+                return False
+
+            # died without sending anything (killed, or crashed)
+            self._finish(FAILED, error='worker exited with code {}'.format(
+                self.worker.exitcode))
+        else:
+            try:
+                state, payload = self.conn.recv()
+            except EOFError:
+                state, payload = FAILED, 'worker exited without a result'
+
+            if state == DONE:
+                self._finish(DONE, result=pickle.loads(payload))
+            else:
+                self._finish(FAILED, error=payload)
+
+            self.worker.join()
+
+        self.conn.close()
+        return True
+
+    def wait(self):
+        """
+        Waits for the job to finish. Can be interrupted with Ctrl-C, without
+        affecting the job.
+        """
+
+        # short timeouts keep the main thread responsive to KeyboardInterrupt
+        while not self.poll(0.1):
+            pass
+
+    def cancel(self):
+        """
+        Kills the worker of the job. Returns False if the job runs in a thread,
+        which cannot be killed.
+        """
+
+        if self.state != RUNNING:
+            return True
+
+        if not self.cancellable:
+            return False
+
+        # killed rather than terminated, to stop it even inside C code
+        getattr(self.worker, 'kill', self.worker.terminate)()
+        self.worker.join()
+        self.conn.close()
+        self._finish(CANCELLED)
+        return True
+
+    @property
+    def elapsed(self):
+        return (self.end or time.time()) - self.start
+
+    def __str__(self):
+        return '[{}] {:<9} {:>8.2f}s  {}'.format(
+            self.id, self.state, self.elapsed, self.description)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the incremental loading of Acid files in the REPL.
+
+A loaded file is split into its top-level forms, which are hashed. When the
+file is reloaded, only the forms whose text changed are parsed, compiled and
+evaluated again, along with the forms depending on the names they define; the
+rest of the environment is kept.
+
+Contributors: myrma
+"""
+
+__all__ = ['LoadedModule', 'free_names']
+
+import hashlib
+from collections import namedtuple
+
+from acid.parser import Declaration, Lambda, Variable
+from acid.parser.forms import split_forms, parse_form
+from acid.compiler import Compiler
+
+
+# `names` are the names defined by the form, `free` the global names it uses
+LoadedForm = namedtuple('LoadedForm', 'digest program names free')
+
+
+def free_names(node, bound=frozenset()):
+    """
+    Returns the names used by an AST node which are not bound by its lambdas.
+    """
+
+    if isinstance(node, Variable):
+        return set() if node.name in bound else {node.name}
+
+    if isinstance(node, Lambda):
+        bound = bound | set(node.params)
+
+    names = set()
+
+    for child in node.children():
+        names |= free_names(child, bound)
+
+    return names
+
+
+def _load_form(form, digest, path):
+    program = parse_form(form, path)
+    names, free = set(), set()
+
+    for instr in program.instructions:
+        if isinstance(instr, Declaration):
+            names.add(instr.name)
+
+        free |= free_names(instr)
+
+    return LoadedForm(digest, program, names, free)
+
+
+class LoadedModule:
+    """
+    An Acid file loaded in an environment, which can be reloaded
+    incrementally.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.forms = []
+
+        # set when a reload failed half-way: the environment no longer
+        # matches the forms
+        self.stale = False
+
+    def reload(self, env, prelude):
+        """
+        Updates the environment from the file. Returns the number of forms
+        which were evaluated.
+        """
+
+        with open(self.path) as file:
+            code = file.read()
+
+        # the unchanged forms are looked up by their digest
+        old_forms = {}
+
+        for loaded in self.forms:
+            old_forms.setdefault(loaded.digest, []).append(loaded)
+
+        forms, dirty = [], set()
+
+        for index, form in enumerate(split_forms(code)):
+            digest = hashlib.sha1(form.text.encode()).hexdigest()
+            candidates = old_forms.get(digest)
+
+            if candidates:
+                forms.append(candidates.pop(0))
+            else:
+                forms.append(_load_form(form, digest, self.path))
+                dirty.add(index)
+
+        # names defined by the removed forms only
+        removed = set().union(*(
+            loaded.names for candidates in old_forms.values()
+            for loaded in candidates
+        ))
+        removed.difference_update(*(loaded.names for loaded in forms))
+
+        changed = removed.union(*(forms[index].names for index in dirty))
+        _propagate(forms, dirty, changed)
+
+        self.stale = True
+
+        for name in removed:
+            if name in prelude:
+                env[name] = prelude[name]
+            else:
+                env.pop(name, None)
+
+        for index in sorted(dirty):
+            Compiler(forms[index].program, self.path).load(env)
+
+        self.forms = forms
+        self.stale = False
+
+        return len(dirty)
+
+
+def _propagate(forms, dirty, changed):
+    """
+    Marks as dirty the forms which use or redefine a changed name, until no
+    more form is affected.
+    """
+
+    updated = True
+
+    while updated:
+        updated = False
+
+        for index, loaded in enumerate(forms):
+            if index not in dirty and (loaded.free | loaded.names) & changed:
+                dirty.add(index)
+                changed |= loaded.names
+                updated = True
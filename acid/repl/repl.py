@@ -10,16 +10,30 @@ Contributors: myrma
 import os
 import sys
 import inspect
+import timeit
+import threading
 import traceback
+import statistics
 from collections import OrderedDict
 
 from acid.repl.command import REPLCommand
 from acid.repl.syntax import parse_repl_line
+from acid.repl.reload import LoadedModule
+from acid.repl.jobs import Job, RUNNING, DONE
 from acid.compiler import Compiler
+from acid.compiler.compiler import redefined_names
 from acid.parser import Parser
 from acid.prelude import default_env
+from acid.profiler import Profiler
 from acid.exception import ParseError
 
+# number of compiled expressions kept by the REPL
+DEFAULT_CACHE_SIZE = 256
+
+# number of timed batches of `:time`, and of functions shown by `:profile`
+TIME_REPEAT = 5
+PROFILE_LIMIT = 10
+
 DEFAULT_REPL_HEADER = """
 
        ____,──┬───────._
@@ -39,6 +53,33 @@ Un projet de la communauté ZesteDeSavoir
 """
 
 
+class LRUCache:
+    """
+    Mapping keeping only its `size` most recently used entries.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+
+        if value is not None:
+            self.entries.move_to_end(key)
+
+        return value
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+
+        self.entries[key] = value
+
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
 class REPL:
     """
     A read-eval-print loop that interactively runs Acid code.
@@ -47,7 +88,11 @@ class REPL:
     aliases = {}
     commands = OrderedDict()
 
-    def __init__(self, path=None, prelude=default_env):
+    # names of the commands receiving their arguments unevaluated
+    quoted = set()
+
+    def __init__(self, path=None, prelude=default_env,
+                 cache_size=DEFAULT_CACHE_SIZE):
         self.path = path
         self.default_env = default_env.copy()
         self.environment = default_env.copy()
@@ -56,6 +101,24 @@ class REPL:
         self.header = DEFAULT_REPL_HEADER
         self.running = False
 
+        # LRU caches of the commands parsed from input lines, and of the
+        # compiled expressions (see `compile_expr`)
+        self.command_cache = LRUCache(cache_size)
+        self.code_cache = LRUCache(cache_size)
+
+        # the loaded file, and the thread reloading it when it is modified
+        self.module = None
+        self.watcher = None
+
+        # held while a command runs, so that the watcher does not reload the
+        # environment at the same time
+        self.lock = threading.RLock()
+
+        # background jobs, by id
+        self.jobs = OrderedDict()
+        self.job_count = 0
+        self.line = ''
+
     @classmethod
     def get_command(cls, name):
         """
@@ -69,14 +132,18 @@ class REPL:
             return cls.commands[realname]
 
     @classmethod
-    def register(cls, name, *aliases):
+    def register(cls, name, *aliases, quote=False):
         """
-        Binds a function to a command by name.
+        Binds a function to a command by name. If `quote` is true, the
+        function receives the ASTs of its arguments instead of their values.
         """
 
         def _decorator_wrapper(fn):
             cls.commands[name] = fn
 
+            if quote:
+                cls.quoted.add(name)
+
             for alias in aliases:
                 cls.aliases[alias] = name
 
@@ -84,6 +151,38 @@ class REPL:
 
         return _decorator_wrapper
 
+    def compile_expr(self, expr):
+        """
+        Returns the code object evaluating an expression in the current
+        environment, compiling it only if it is not in the cache.
+        """
+
+        # the code depends on the builtins that optimizations may assume
+        redefined = frozenset(redefined_names(expr, self.environment))
+
+        key = (repr(expr), redefined)
+        code = self.code_cache.get(key)
+
+        if code is None:
+            code = Compiler(expr).compile_expr(self.environment)
+            self.code_cache.put(key, code)
+
+        return code
+
+    def parse_line(self, line):
+        """
+        Parses a REPL line, reusing the command parsed from an identical line.
+        """
+
+        self.line = line
+        cmd = self.command_cache.get(line)
+
+        if cmd is None:
+            cmd = parse_repl_line(line)
+            self.command_cache.put(line, cmd)
+
+        return cmd
+
     def load(self, path):
         """
         Loads a path into the current environment.
@@ -92,20 +191,80 @@ class REPL:
         print('Loading file "{}"'.format(path))
 
         self.environment = self.default_env.copy()
-
-        with open(path) as load_file:
-            compiler = Compiler.from_file(path)
-            compiler.load(self.environment)
-            self.path = path
+        self.module = LoadedModule(path)
+        self.module.reload(self.environment, self.default_env)
+        self.path = path
 
     def reload(self):
         """
-        Reloads the current path into the environment.
+        Reloads the changed definitions of the current path into the
+        environment.
         """
-        if self.path is not None:
-            self.load(self.path)
+
+        if self.module is None:
+            print('Error: No module loaded. Type `:load [file]` to load one.')
+        elif self.module.stale:
+            # the last reload failed: start again from a fresh environment
+            self.load(self.module.path)
         else:
+            count = self.module.reload(self.environment, self.default_env)
+            print('Reloaded {} form(s) of "{}"'.format(count, self.path))
+
+    def report_jobs(self):
+        """
+        Prints the background jobs which finished since the last report.
+        """
+
+        for job in list(self.jobs.values()):
+            if job.state == RUNNING and job.poll():
+                print(job)
+
+    def watch(self, interval=0.5):
+        """
+        Reloads the current path whenever it is modified.
+        """
+
+        if self.module is None:
             print('Error: No module loaded. Type `:load [file]` to load one.')
+            return
+
+        self.unwatch()
+
+        stop = threading.Event()
+        self.watcher = stop
+        path = self.module.path
+        thread = threading.Thread(target=self._watch_loop,
+                                  args=(path, _stamp(path), interval, stop),
+                                  daemon=True)
+        thread.start()
+
+    def unwatch(self):
+        """
+        Stops watching the current path.
+        """
+
+        if self.watcher is not None:
+            self.watcher.set()
+            self.watcher = None
+
+    def _watch_loop(self, path, stamp, interval, stop):
+        while not stop.wait(interval):
+            try:
+                new_stamp = _stamp(path)
+            except OSError:
+                continue
+
+            if new_stamp == stamp:
+                continue
+
+            stamp = new_stamp
+
+            with self.lock:
+                try:
+                    self.reload()
+                except Exception as exc:
+                    print('Failed to reload "{}":'.format(path))
+                    print('{}: {}'.format(type(exc).__name__, exc))
 
     def read_command(self):
         """
@@ -118,7 +277,7 @@ class REPL:
             print('')
             inp = ''
 
-        cmd = parse_repl_line(inp)
+        cmd = self.parse_line(inp)
 
         return cmd
 
@@ -142,8 +301,11 @@ class REPL:
 
         while self.running:
             try:
+                self.report_jobs()
                 cmd = self.read_command()
-                res = cmd.execute(self)
+
+                with self.lock:
+                    res = cmd.execute(self)
             except KeyboardInterrupt:
                 print('Interrupted.')
             except Exception as exc:
@@ -168,6 +330,8 @@ class REPL:
 REPL.register('load', 'l')(REPL.load)
 REPL.register('reload', 'r')(REPL.reload)
 REPL.register('quit', 'q')(REPL.quit)
+REPL.register('watch', 'w')(REPL.watch)
+REPL.register('unwatch')(REPL.unwatch)
 
 
 @REPL.register('prompt')
@@ -216,6 +380,147 @@ def help(self, command=None):
             print('Aliases:', ', '.join(map(repr, aliases)))
 
 
+@REPL.register('time', 't', quote=True)
+def time_expr(self, expr, number=None):
+    """
+    Times the evaluation of an expression, repeated `number` times.
+    """
+
+    code = self.compile_expr(expr)
+    env = self.environment
+    timer = timeit.Timer(lambda: eval(code, env))
+
+    if number is None:
+        # as many loops as needed to run for at least 0.2 seconds
+        number, _ = timer.autorange()
+    else:
+        number = eval(self.compile_expr(number), env)
+
+    times = [total / number for total in timer.repeat(TIME_REPEAT, number)]
+
+    print('{} loops, best of {}: min {}, median {}, stddev {}'.format(
+        number, TIME_REPEAT, _format_time(min(times)),
+        _format_time(statistics.median(times)),
+        _format_time(statistics.stdev(times))))
+
+
+@REPL.register('bg', quote=True)
+def background(self, expr):
+    """
+    Evaluates an expression in the background, in a copy of the environment.
+    """
+
+    code = self.compile_expr(expr)
+    self.job_count += 1
+
+    description = self.line.split(None, 1)[-1].strip()
+    job = Job(self.job_count, description, code, self.environment)
+    self.jobs[job.id] = job
+
+    print('[{}] started'.format(job.id))
+
+
+@REPL.register('jobs')
+def list_jobs(self):
+    """
+    Lists the background jobs.
+    """
+
+    for job in self.jobs.values():
+        job.poll()
+        print(job)
+
+
+@REPL.register('wait')
+def wait_job(self, id=None):
+    """
+    Waits for a background job (or all of them), and returns its result.
+    """
+
+    jobs = list(self.jobs.values()) if id is None else [_get_job(self, id)]
+
+    for job in jobs:
+        job.wait()
+
+    if id is not None:
+        return _job_result(self, jobs[0])
+
+
+@REPL.register('result')
+def job_result(self, id):
+    """
+    Returns the result of a finished background job.
+    """
+
+    job = _get_job(self, id)
+
+    if not job.poll():
+        print('Job {} is still running.'.format(id))
+    else:
+        return _job_result(self, job)
+
+
+@REPL.register('cancel')
+def cancel_job(self, id):
+    """
+    Kills a background job.
+    """
+
+    job = _get_job(self, id)
+
+    if job.cancel():
+        print(job)
+    else:
+        print('Job {} runs in a thread, and cannot be cancelled.'.format(id))
+
+
+def _get_job(repl, id):
+    try:
+        return repl.jobs[id]
+    except KeyError:
+        raise ValueError('No job with id {!r}'.format(id)) from None
+
+
+def _job_result(repl, job):
+    if job.state != DONE:
+        print(job)
+        if job.error is not None:
+            print(job.error)
+        return None
+
+    repl.environment['_'] = job.result
+    return job.result
+
+
+@REPL.register('profile', quote=True)
+def profile_expr(self, expr):
+    """
+    Evaluates an expression, and shows the Acid functions it spent most time in.
+    """
+
+    code = self.compile_expr(expr)
+    profiler = Profiler()
+
+    result = profiler.run(eval, code, self.environment)
+    profiler.print_stats(limit=PROFILE_LIMIT)
+
+    return result
+
+
+def _format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3f} {}'.format(seconds / scale, unit)
+
+    return '{:.0f} ns'.format(seconds * 1e9)
+
+
+def _stamp(path):
+    # the size catches the writes made within the mtime resolution
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
 def _get_command_desc(name):
     try:
         fn = REPL.get_command(name)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+This module runs untrusted Acid code in a forked worker process, metered (see
+`acid.compiler.metering`) and with resource limits set by the `resource`
+module: its address space is capped by `memory`, and its CPU time by `time`,
+which stops even the builtins looping in C. The limit exceptions raised in the
+worker are raised again in the caller.
+
+ex:
+	limits = Limits(steps=10 ** 7, time=2.0, memory=256 * 2 ** 20)
+	execute_sandboxed(code, path, limits)
+
+On platforms without `fork` or `resource`, the code is only metered, in the
+current process.
+
+Contributors: myrma
+"""
+
+__all__ = ['Limits', 'execute_sandboxed']
+
+import sys
+import math
+import signal
+import traceback
+import multiprocessing
+from collections import namedtuple
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.compiler.metering import Meter
+from acid.prelude import default_env
+from acid.exception import (ResourceLimitError, TimeLimitExceeded,
+							MemoryLimitExceeded)
+
+
+# `steps` is a number of steps, `time` in seconds, `memory` in bytes and
+# `allocation` a number of elements; None is no limit
+Limits = namedtuple('Limits', 'steps time memory allocation')
+Limits.__new__.__defaults__ = (None,) * len(Limits._fields)
+
+
+# seconds given to the worker after its time limit, before it is killed
+GRACE_PERIOD = 1.0
+
+
+def _fork_context():
+	try:
+		return multiprocessing.get_context('fork')
+	except ValueError:
+		return None
+
+
+def _meter(limits):
+	return Meter(max_steps=limits.steps, max_time=limits.time,
+				 max_allocation=limits.allocation)
+
+
+def _set_resource_limits(limits):
+	if limits.memory is not None:
+		resource.setrlimit(resource.RLIMIT_AS, (limits.memory, limits.memory))
+
+	if limits.time is not None:
+		# the CPU time of the compilation and of the prelude is not counted
+		used = resource.getrusage(resource.RUSAGE_SELF).ru_utime
+		seconds = math.ceil(used + limits.time + GRACE_PERIOD)
+		resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+
+def _run_worker(code, limits, prelude, conn):
+	# runs in the worker process: the outcome is sent back as a pair
+	try:
+		_set_resource_limits(limits)
+		_meter(limits).execute_code(code, prelude)
+	except ResourceLimitError as err:
+		conn.send(('limit', err))
+	except MemoryError:
+		conn.send(('limit', MemoryLimitExceeded(
+			'memory limit of {} bytes exceeded'.format(limits.memory))))
+	except BaseException:
+		conn.send(('error', traceback.format_exc()))
+	else:
+		conn.send(('done', None))
+	finally:
+		# the worker exits without flushing its buffers
+		sys.stdout.flush()
+		sys.stderr.flush()
+
+
+def execute_sandboxed(code, path=None, limits=Limits(), prelude=default_env):
+	"""
+	Executes Acid code and its main function within the limits. Raises a
+	ResourceLimitError subclass when one of them is exceeded, and a
+	RuntimeError if the code fails.
+	"""
+
+	compiler = Compiler(Parser(code, path).run(), path)
+	compiler.metered = True
+	code_object = compiler.compile()
+
+	context = _fork_context()
+
+	if context is None or resource is None:
+		_meter(limits).execute_code(code_object, prelude)
+		return
+
+	conn, child_conn = context.Pipe(duplex=False)
+	worker = context.Process(target=_run_worker,
+							 args=(code_object, limits, prelude, child_conn),
+							 daemon=True)
+
+	sys.stdout.flush()
+	worker.start()
+	child_conn.close()
+
+	timeout = None if limits.time is None else limits.time + 2 * GRACE_PERIOD
+
+	try:
+		if not conn.poll(timeout):
+			# stuck in C code, or blocked: the CPU limit does not count
+			# the time spent waiting
+			worker.kill()
+			worker.join()
+			raise TimeLimitExceeded(
+				'time limit of {}s exceeded'.format(limits.time))
+
+		try:
+			state, payload = conn.recv()
+		except EOFError:
+			worker.join()
+			raise _worker_death(worker.exitcode, limits) from None
+
+		worker.join()
+	finally:
+		conn.close()
+
+	if state == 'limit':
+		raise payload
+	elif state == 'error':
+		raise RuntimeError('Sandboxed code failed:\n' + payload)
+
+
+def _worker_death(exitcode, limits):
+	if exitcode == -signal.SIGXCPU:
+		return TimeLimitExceeded(
+			'CPU time limit of {}s exceeded'.format(limits.time))
+
+	if exitcode == -signal.SIGKILL and limits.memory is not None:
+		return MemoryLimitExceeded(
+			'worker killed, probably out of memory (limit of {} bytes)'.format(
+				limits.memory))
+
+	return RuntimeError('Sandbox worker exited with code {}'.format(exitcode))
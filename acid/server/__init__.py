@@ -0,0 +1,5 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+from acid.server.server import *
+from acid.server.client import *
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Thin client of the Acid execution server. This module only depends on the
+standard library, so it can also be run as a standalone script:
+
+	python3.4 client.py SOCKET PATH [ARG ...]
+
+Messages are exchanged as frames made of a kind byte, a payload length and the
+payload itself.
+
+Contributors: myrma
+"""
+
+__all__ = [
+	'DEFAULT_SOCKET_PATH', 'default_socket_path', 'run_remote', 'send_frame',
+	'recv_frame'
+]
+
+import os
+import sys
+import json
+import stat
+import socket
+import struct
+import tempfile
+
+
+def default_socket_path():
+	"""
+	Returns the socket path of the server of the current user, in a private
+	directory of its runtime directory (or of the temporary directory).
+	"""
+
+	runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+
+	if runtime_dir:
+		directory = os.path.join(runtime_dir, 'acid')
+	else:
+		directory = os.path.join(
+			tempfile.gettempdir(), 'acid-{}'.format(os.getuid()))
+
+	return os.path.join(directory, 'server.sock')
+
+
+DEFAULT_SOCKET_PATH = default_socket_path()
+
+# frame kinds
+REQUEST, OUTPUT, ERROR, EXIT = b'r', b'o', b'e', b'x'
+
+_HEADER = struct.Struct('!cI')
+
+
+def _make_private_dir(path):
+	"""
+	Creates a directory only accessible to the current user. Raises a
+	PermissionError if it already exists and other users could write to it,
+	since they could then replace the files it holds.
+	"""
+
+	os.makedirs(path, mode=0o700, exist_ok=True)
+	info = os.lstat(path)
+
+	if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+			or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+		raise PermissionError(
+			'Directory {} must be owned by the current user and not '
+			'writable by others'.format(path))
+
+
+def send_frame(sock, kind, payload):
+	"""
+	Sends a frame of the given kind through a socket.
+	"""
+
+	sock.sendall(_HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_frame(file):
+	"""
+	Reads a frame from a socket file. Returns a (kind, payload) pair, or
+	(None, b'') if the connection was closed.
+	"""
+
+	header = file.read(_HEADER.size)
+
+	if len(header) < _HEADER.size:
+		return None, b''
+
+	kind, length = _HEADER.unpack(header)
+	return kind, file.read(length)
+
+
+def run_remote(socket_path, path, argv=None, stdout=None, stderr=None):
+	"""
+	Runs an Acid file on the server listening on `socket_path`, forwards its
+	output, and returns its exit status.
+	"""
+
+	stdout = stdout or sys.stdout
+	stderr = stderr or sys.stderr
+
+	with open(path) as file:
+		source = file.read()
+
+	request = {
+		'path': os.path.abspath(path),
+		'source': source,
+		'argv': argv or [path],
+		'cwd': os.getcwd(),
+	}
+
+	if socket_path == DEFAULT_SOCKET_PATH:
+		# the program is only sent to a server of the current user
+		_make_private_dir(os.path.dirname(socket_path))
+
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.connect(socket_path)
+
+	with sock, sock.makefile('rb') as conn:
+		send_frame(sock, REQUEST, json.dumps(request).encode())
+
+		while True:
+			kind, payload = recv_frame(conn)
+
+			if kind == OUTPUT:
+				stdout.write(payload.decode())
+			elif kind == ERROR:
+				stderr.write(payload.decode())
+			elif kind == EXIT:
+				stdout.flush()
+				return int(payload)
+			else:
+				raise ConnectionError('Connection closed by the server')
+
+
+if __name__ == '__main__':
+	if len(sys.argv) < 3:
+		print('usage: client.py SOCKET PATH [ARG ...]', file=sys.stderr)
+		sys.exit(2)
+
+	sys.exit(run_remote(sys.argv[1], sys.argv[2], sys.argv[2:]))
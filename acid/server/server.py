@@ -0,0 +1,280 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines a long-lived Acid execution server, which removes the interpreter
+startup, import and compilation costs from each run.
+
+The server listens on a Unix socket, and forks a pool of worker processes that
+accept the connections themselves. Compiled code objects are cached in memory
+and on disk, in a private directory of the user, keyed by a hash of the program
+source and of the runtime.
+
+Contributors: myrma
+"""
+
+__all__ = ['Server']
+
+import io
+import os
+import sys
+import errno
+import json
+import stat
+import socket
+import signal
+import marshal
+import hashlib
+import tempfile
+import traceback
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.compiler.snapshot import runtime_fingerprint
+from acid.prelude import default_env
+from acid.server.client import (
+	DEFAULT_SOCKET_PATH, REQUEST, OUTPUT, ERROR, EXIT, send_frame, recv_frame,
+	_make_private_dir
+)
+
+
+class _FrameWriter(io.RawIOBase):
+	"""
+	Raw stream sending the data written to it as frames of a given kind.
+	"""
+
+	def __init__(self, sock, kind):
+		self.sock = sock
+		self.kind = kind
+
+	def writable(self):
+		return True
+
+	def write(self, data):
+		send_frame(self.sock, self.kind, bytes(data))
+		return len(data)
+
+
+def _text_stream(sock, kind):
+	return io.TextIOWrapper(io.BufferedWriter(_FrameWriter(sock, kind)),
+							encoding='utf-8')
+
+
+def default_cache_dir():
+	"""
+	Returns the directory of the on-disk cache of the current user, following
+	the XDG base directory specification.
+	"""
+
+	base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+		os.path.expanduser('~'), '.cache')
+
+	return os.path.join(base, 'acid')
+
+
+def _remove_stale_socket(path):
+	"""
+	Removes the socket left at the given path by a server which did not exit
+	cleanly. Raises an OSError if the path is not a socket, or if a server
+	still listens on it.
+	"""
+
+	try:
+		info = os.lstat(path)
+	except FileNotFoundError:
+		return
+
+	if not stat.S_ISSOCK(info.st_mode):
+		raise FileExistsError(
+			errno.EEXIST, 'Not a socket, refusing to remove it', path)
+
+	with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+		try:
+			probe.connect(path)
+		except ConnectionRefusedError:
+			os.unlink(path)
+			return
+
+	raise OSError(errno.EADDRINUSE, 'A server is already listening', path)
+
+
+class Server:
+	"""
+	Pre-forking Acid execution server.
+	"""
+
+	def __init__(self, socket_path=DEFAULT_SOCKET_PATH, workers=None,
+				 cache_dir=None, prelude=default_env):
+		self.socket_path = socket_path
+		self.worker_count = workers or os.cpu_count() or 1
+		self.prelude = prelude
+		self.workers = set()
+		self.listener = None
+
+		# shared by all the workers
+		self.cache_dir = cache_dir or default_cache_dir()
+		_make_private_dir(self.cache_dir)
+
+		# per-worker in-memory cache: key -> code object
+		self.code_cache = {}
+
+	def serve_forever(self):
+		"""
+		Binds the socket, forks the workers and restarts them when they exit,
+		until the server is interrupted.
+		"""
+
+		if self.socket_path == DEFAULT_SOCKET_PATH:
+			_make_private_dir(os.path.dirname(self.socket_path))
+
+		_remove_stale_socket(self.socket_path)
+
+		self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.listener.bind(self.socket_path)
+		self.listener.listen(128)
+
+		signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+		print('Acid server listening on {} with {} workers'.format(
+			self.socket_path, self.worker_count))
+
+		try:
+			while True:
+				while len(self.workers) < self.worker_count:
+					self._spawn()
+
+				pid, _ = os.wait()
+				self.workers.discard(pid)
+		except (KeyboardInterrupt, SystemExit):
+			pass
+		finally:
+			self.shutdown()
+
+	def shutdown(self):
+		"""
+		Stops the workers and removes the socket.
+		"""
+
+		for pid in self.workers:
+			try:
+				os.kill(pid, signal.SIGTERM)
+			except ProcessLookupError:
+				pass
+
+		self.workers.clear()
+
+		if self.listener is not None:
+			self.listener.close()
+			self.listener = None
+
+			if os.path.exists(self.socket_path):
+				os.unlink(self.socket_path)
+
+	def _spawn(self):
+		pid = os.fork()
+
+		if pid == 0:
+			status = 0
+
+			try:
+				signal.signal(signal.SIGTERM, signal.SIG_DFL)
+				signal.signal(signal.SIGINT, signal.SIG_IGN)
+				self._worker_loop()
+			except BaseException:
+				traceback.print_exc()
+				status = 1
+			finally:
+				os._exit(status)
+
+		self.workers.add(pid)
+
+	def _worker_loop(self):
+		while True:
+			conn, _ = self.listener.accept()
+
+			with conn:
+				self.handle(conn)
+
+	def handle(self, conn):
+		"""
+		Serves a single request on an accepted connection.
+		"""
+
+		with conn.makefile('rb') as conn_file:
+			kind, payload = recv_frame(conn_file)
+
+		if kind != REQUEST:
+			return
+
+		request = json.loads(payload.decode())
+		status = self.run(request, conn)
+
+		send_frame(conn, EXIT, str(status).encode())
+
+	def run(self, request, conn):
+		"""
+		Runs the requested program in a fresh environment, forwarding its
+		output to the connection. Returns the exit status.
+		"""
+
+		stdout, stderr = _text_stream(conn, OUTPUT), _text_stream(conn, ERROR)
+		saved = sys.stdout, sys.stderr, sys.argv, os.getcwd()
+
+		sys.stdout, sys.stderr = stdout, stderr
+		sys.argv = request['argv']
+		status = 0
+
+		try:
+			os.chdir(request['cwd'])
+			code = self.get_code(request['source'], request['path'])
+			Compiler.execute_code(code, self.prelude)
+		except SystemExit as exc:
+			status = exc.code if isinstance(exc.code, int) else 1
+		except Exception:
+			traceback.print_exc()
+			status = 1
+		finally:
+			stdout.flush()
+			stderr.flush()
+			sys.stdout, sys.stderr, sys.argv = saved[:3]
+			os.chdir(saved[3])
+
+		return status
+
+	def get_code(self, source, path):
+		"""
+		Returns the code object of a program, compiling it only if it is not
+		found in the in-memory or on-disk caches.
+		"""
+
+		# the code compiled by another version of the compiler is not reused
+		digest = hashlib.sha256(runtime_fingerprint().encode())
+		digest.update(path.encode())
+		digest.update(b'\0')
+		digest.update(source.encode())
+		key = digest.hexdigest()
+
+		code = self.code_cache.get(key)
+
+		if code is not None:
+			return code
+
+		cache_path = os.path.join(self.cache_dir, key + '.acidc')
+
+		try:
+			with open(cache_path, 'rb') as cache_file:
+				code = marshal.load(cache_file)
+		except (OSError, EOFError, ValueError, TypeError):
+			ast = Parser(source, path).run()
+			code = Compiler(ast, path).compile()
+
+			# written to a temporary file first, as other workers may read it
+			fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+
+			with os.fdopen(fd, 'wb') as tmp_file:
+				marshal.dump(code, tmp_file)
+
+			os.replace(tmp_path, cache_path)
+
+		self.code_cache[key] = code
+		return code
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Defines the instrumentation of the phases of the Acid pipeline: tokenizing,
+parsing, translating to a Python AST, compiling to a code object, executing the
+module and running `main`, and optionally each top-level form in the parsing
+and translation phases.
+
+The phases are reported to listeners, which are called with a `PhaseEvent` at
+the end of each phase. When no listener is registered, `phase` returns a shared
+no-op context manager, so the instrumentation costs nothing more than a
+function call per phase.
+
+ex:
+	with Timings() as timings:
+		Compiler.from_file('examples/test.acid').execute()
+
+	timings.print_summary()
+
+Contributors: myrma
+"""
+
+__all__ = ['PhaseEvent', 'phase', 'add_listener', 'remove_listener', 'Timings']
+
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from collections import namedtuple, OrderedDict
+
+
+# `start` and `end` are in seconds, as given by `time.perf_counter`;
+# `peak_memory` is the peak of memory allocated during the phase, in bytes, or
+# None if tracemalloc was not tracing
+PhaseEvent = namedtuple(
+	'PhaseEvent', 'name start end depth thread args peak_memory')
+
+
+_listeners = []
+
+# number of listeners interested in the top-level forms
+_detailed = 0
+
+_local = threading.local()
+
+
+class _NoPhase:
+	"""
+	Context manager of the phases which are not recorded.
+	"""
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class _Phase:
+	"""
+	Context manager measuring a recorded phase.
+	"""
+
+	__slots__ = ('name', 'form', 'args', 'start', 'depth', 'base_memory',
+				 'peak')
+
+	def __init__(self, name, form, args):
+		self.name = name
+		self.form = form
+		self.args = args
+
+	def __enter__(self):
+		stack = _phase_stack()
+		self.depth = len(stack)
+		self.base_memory = self.peak = None
+
+		if tracemalloc.is_tracing():
+			current, peak = tracemalloc.get_traced_memory()
+			self.base_memory = current
+
+			if stack:
+				# the peak of the enclosing phase so far, before it is reset
+				parent = stack[-1]
+				parent.peak = max(parent.peak or 0, peak)
+
+			_reset_peak()
+
+		stack.append(self)
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc_info):
+		end = time.perf_counter()
+		stack = _phase_stack()
+		stack.pop()
+
+		peak_memory = None
+
+		if self.base_memory is not None and tracemalloc.is_tracing():
+			peak = max(self.peak or 0, tracemalloc.get_traced_memory()[1])
+			peak_memory = max(peak - self.base_memory, 0)
+
+			if stack:
+				stack[-1].peak = max(stack[-1].peak or 0, peak)
+
+		event = PhaseEvent(self.name, self.start, end, self.depth,
+						   threading.get_ident(), self.args, peak_memory)
+
+		for listener in list(_listeners):
+			if not self.form or getattr(listener, 'forms', False):
+				listener(event)
+
+		return False
+
+
+def _phase_stack():
+	try:
+		return _local.stack
+	except AttributeError:
+		_local.stack = []
+		return _local.stack
+
+
+def _reset_peak():
+	# only available since Python 3.9: the peaks of nested phases are then
+	# measured from the start of the program
+	reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+	if reset_peak is not None:
+		reset_peak()
+
+
+def phase(name, form=False, **args):
+	"""
+	Returns a context manager measuring a phase of the pipeline. `form` tells
+	whether the phase concerns a single top-level form, which is measured only
+	if a listener asks for it.
+	"""
+
+	if not _listeners or form and not _detailed:
+		return _NO_PHASE
+
+	return _Phase(name, form, args)
+
+
+def add_listener(listener):
+	"""
+	Registers a callable called with the `PhaseEvent` of every phase ending.
+	If its `forms` attribute is true, it also receives the phases of the
+	top-level forms.
+	"""
+
+	global _detailed
+
+	_listeners.append(listener)
+
+	if getattr(listener, 'forms', False):
+		_detailed += 1
+
+
+def remove_listener(listener):
+	global _detailed
+
+	_listeners.remove(listener)
+
+	if getattr(listener, 'forms', False):
+		_detailed -= 1
+
+
+class Timings:
+	"""
+	Listener collecting the phases of the pipeline, which can be printed as a
+	summary or written as a Chrome trace (to be opened with `chrome://tracing`
+	or Perfetto).
+	"""
+
+	def __init__(self, forms=False, memory=False):
+		self.forms = forms
+		self.memory = memory
+		self.events = []
+		self._started_tracing = False
+
+	def __call__(self, event):
+		self.events.append(event)
+
+	def __enter__(self):
+		if self.memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+			self._started_tracing = True
+
+		add_listener(self)
+		return self
+
+	def __exit__(self, *exc_info):
+		remove_listener(self)
+
+		if self._started_tracing:
+			tracemalloc.stop()
+			self._started_tracing = False
+
+	def summary(self):
+		"""
+		Returns an ordered mapping from each phase name to its depth, its
+		number of occurrences, its total duration and its highest memory peak.
+		"""
+
+		phases = OrderedDict()
+
+		for event in sorted(self.events, key=lambda event: event.start):
+			depth, count, total, peak = phases.get(
+				event.name, (event.depth, 0, 0.0, None))
+
+			if event.peak_memory is not None:
+				peak = max(peak or 0, event.peak_memory)
+
+			phases[event.name] = (depth, count + 1,
+								  total + event.end - event.start, peak)
+
+		return phases
+
+	def print_summary(self, file=None):
+		file = file or sys.stderr
+		summary = self.summary()
+		total = sum(total for depth, _, total, _ in summary.values()
+					if depth == 0)
+
+		print('{:<24} {:>7} {:>11} {:>7} {:>12}'.format(
+			'phase', 'count', 'time', '%', 'peak memory'), file=file)
+
+		for name, (depth, count, elapsed, peak) in summary.items():
+			print('{:<24} {:>7} {:>10.6f}s {:>6.1f}% {:>12}'.format(
+				'  ' * depth + name, count, elapsed,
+				100 * elapsed / total if total else 0,
+				'-' if peak is None else _format_size(peak)), file=file)
+
+	def chrome_trace(self):
+		"""
+		Returns the phases as a Chrome trace-event object.
+		"""
+
+		pid = os.getpid()
+		events = []
+
+		for event in self.events:
+			args = dict(event.args)
+
+			if event.peak_memory is not None:
+				args['peak_memory'] = event.peak_memory
+
+			events.append({
+				'name': event.name,
+				'cat': 'acid',
+				'ph': 'X',
+				'ts': event.start * 1e6,
+				'dur': (event.end - event.start) * 1e6,
+				'pid': pid,
+				'tid': event.thread,
+				'args': args,
+			})
+
+		return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+	def dump_chrome_trace(self, file):
+		json.dump(self.chrome_trace(), file)
+
+
+def _format_size(size):
+	for unit in ('B', 'KiB', 'MiB'):
+		if size < 1024:
+			return '{:.1f} {}'.format(size, unit)
+
+		size /= 1024
+
+	return '{:.1f} GiB'.format(size)
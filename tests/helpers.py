@@ -0,0 +1,30 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Helpers shared by the tests.
+
+Contributors: myrma
+"""
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.prelude import default_env
+
+
+def evaluate(code, prelude=default_env):
+	"""
+	Runs Acid code in a copy of the prelude, and returns the environment.
+	"""
+
+	env = prelude.copy()
+	Compiler(Parser(code).run()).load(env)
+	return env
+
+
+def evaluate_expr(code, prelude=default_env):
+	"""
+	Returns the value of an Acid expression.
+	"""
+
+	return evaluate('(define result {})'.format(code), prelude)['result']
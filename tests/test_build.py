@@ -0,0 +1,63 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the compilation of many Acid files at once.
+
+Contributors: myrma
+"""
+
+import io
+import os
+import stat
+import tempfile
+import unittest
+
+from acid.compiler.build import build, compiled_path
+
+
+class TestBuild(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+		self.umask = os.umask(0o022)
+		self.addCleanup(os.umask, self.umask)
+
+	def write(self, name, code):
+		path = os.path.join(self.tmp.name, name)
+
+		with open(path, 'w') as file:
+			file.write(code)
+
+		return path
+
+	def test_output_permissions(self):
+		source = self.write('a.acid', '(define a 1)')
+		build([source], jobs=1, file=io.StringIO())
+
+		mode = stat.S_IMODE(os.stat(compiled_path(source)).st_mode)
+		self.assertEqual(mode, 0o644)
+
+	def test_summary(self):
+		self.write('a.acid', '(define a 1)')
+		self.write('b.acid', '(define b')
+		output = io.StringIO()
+
+		errors = build([self.tmp.name], jobs=1, file=output)
+
+		self.assertEqual(len(errors), 1)
+		self.assertIn('1 file(s) compiled, 0 up to date, 1 failed',
+					  output.getvalue())
+
+		# only the failed file is compiled again
+		output = io.StringIO()
+		build([self.tmp.name], jobs=1, file=output)
+
+		self.assertIn('0 file(s) compiled, 1 up to date, 1 failed',
+					  output.getvalue())
+
+
+if __name__ == '__main__':
+	unittest.main()
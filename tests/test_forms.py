@@ -0,0 +1,61 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the split of code into top-level forms, which must report the same
+errors as parsing the whole code.
+
+Contributors: myrma
+"""
+
+import io
+import unittest
+
+from acid.parser import Parser
+from acid.parser.forms import split_forms, read_forms
+from acid.parser.incremental import ParsedSource
+from acid.compiler import Compiler
+from acid.compiler.parallel import translate_parallel
+from acid.exception import ParseError
+
+
+STRAY = '(define a 1)\n  "stray\n  string" \'c\'\n(define b "x)")\n'
+
+
+class TestForms(unittest.TestCase):
+
+	def test_literals_in_forms(self):
+		forms = split_forms('(define s "(")\n// )\n(define c \')\')')
+		self.assertEqual([form.text for form in forms],
+						 ['(define s "(")', "(define c ')')"])
+
+	def test_stray_literals_are_forms(self):
+		forms = split_forms(STRAY)
+		self.assertEqual([form.text for form in forms][1:3],
+						 ['"stray\n  string"', "'c'"])
+
+	def test_stream_reads_stray_literals(self):
+		forms = list(read_forms(io.StringIO(STRAY)))
+		self.assertEqual([form.text for form in forms],
+						 [form.text for form in split_forms(STRAY)])
+
+	def test_same_error(self):
+		with self.assertRaises(ParseError) as expected:
+			Parser(STRAY).run()
+
+		parses = [
+			lambda: translate_parallel(STRAY, None, 1),
+			lambda: Compiler.execute_stream(io.StringIO(STRAY)),
+			lambda: ParsedSource.parse(STRAY),
+		]
+
+		for parse in parses:
+			with self.assertRaises(ParseError) as error:
+				parse()
+
+			self.assertEqual(str(error.exception.pos), str(expected.exception.pos))
+			self.assertEqual(error.exception.msg, expected.exception.msg)
+
+
+if __name__ == '__main__':
+	unittest.main()
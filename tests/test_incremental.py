@@ -0,0 +1,101 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the incremental parsing of edited code, which must give the same
+tokens and nodes, at the same positions, as parsing the edited code again.
+
+Contributors: myrma
+"""
+
+import unittest
+
+from acid.parser.incremental import ParsedSource
+from acid.exception import ParseError
+
+
+CODE = '''(define a 1)
+(define f (lambda (x)
+  (+ x a)))
+
+(define b (f 2)) (define c "text")
+// comment
+(define d (f b))
+'''
+
+
+def describe(source):
+	"""
+	Returns the tokens and the nodes of a parsed source, with their positions.
+	"""
+
+	nodes = []
+	pending = [source.program]
+
+	while pending:
+		node = pending.pop()
+		nodes.append((repr(node), repr(node.span)))
+		pending.extend(node.children())
+
+	return repr(source.tokens), nodes
+
+
+class TestEdit(unittest.TestCase):
+
+	def assertEditParses(self, code, old, new, count=1):
+		offset = code.index(old)
+		edited = code[:offset] + new + code[offset + len(old):]
+
+		source = ParsedSource.parse(code).edit(offset, len(old), new)
+
+		self.assertEqual(source.code, edited)
+		self.assertEqual(describe(source), describe(ParsedSource.parse(edited)))
+
+	def test_edits(self):
+		edits = [
+			# inside a form, on the same line
+			('(+ x a)', '(* x a)'),
+			# longer on the same line, shifting the next form on the line
+			('(f 2)', '(f 20000)'),
+			# adds lines, shifting the line numbers of the later forms
+			('(+ x a)', '(+ x\n\n     a)'),
+			# removes lines
+			('(lambda (x)\n  (+ x a))', '(lambda (x) x)'),
+			# new forms between existing ones
+			('\n\n', '\n(define e 5)\n(define g\n  6)\n'),
+			# merges two forms
+			(') (define c', ')\n(define c'),
+			# at the very start and end of the code
+			('(define a 1)', '(define a\n 1)'),
+			('(define d (f b))\n', '(define d (f b))\n(define h 0)\n'),
+			# comments
+			('comment', 'longer comment'),
+			('// comment', '/* a\nlonger\ncomment */'),
+		]
+
+		for old, new in edits:
+			with self.subTest(old=old, new=new):
+				self.assertEditParses(CODE, old, new)
+
+	def test_invalid_edit(self):
+		source = ParsedSource.parse(CODE)
+		offset = CODE.index('(f 2))')
+
+		# the unterminated form swallows the following ones, and fails
+		with self.assertRaises(ParseError):
+			source.edit(offset, len('(f 2))'), '(f 2)')
+
+		self.assertEqual(describe(source), describe(ParsedSource.parse(CODE)))
+
+	def test_successive_edits(self):
+		source = ParsedSource.parse(CODE)
+
+		for old, new in [('(f 2)', '(f\n2)'), ('a 1', 'a\n\n1'), ('"text"', '0')]:
+			offset = source.code.index(old)
+			source = source.edit(offset, len(old), new)
+
+		self.assertEqual(describe(source), describe(ParsedSource.parse(source.code)))
+
+
+if __name__ == '__main__':
+	unittest.main()
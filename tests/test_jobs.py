@@ -0,0 +1,71 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the background jobs of the REPL.
+
+Contributors: myrma
+"""
+
+import time
+import unittest
+
+from acid.parser import Parser, Expr
+from acid.compiler import Compiler
+from acid.prelude import default_env
+from acid.repl.jobs import Job, DONE, FAILED, CANCELLED
+
+
+def start(code):
+	env = default_env.copy()
+	env['nap'] = time.sleep
+	compiled = Compiler(Parser(code).parse(Expr)).compile_expr(env)
+	return Job(1, code, compiled, env)
+
+
+class TestJob(unittest.TestCase):
+
+	def test_result(self):
+		job = start('(+ 1 2)')
+		job.wait()
+
+		self.assertTrue(job.poll())
+		self.assertEqual(job.state, DONE)
+		self.assertEqual(job.result, 3)
+
+	def test_unpicklable_result(self):
+		job = start('(lambda (x) x)')
+		job.wait()
+
+		self.assertEqual(job.state, DONE)
+		self.assertIn('function', repr(job.result))
+
+	def test_error(self):
+		job = start('(/ 1 0)')
+		job.wait()
+
+		self.assertEqual(job.state, FAILED)
+		self.assertIn('ZeroDivisionError', job.error)
+
+	def test_poll_running(self):
+		job = start('(nap 60)')
+		self.addCleanup(job.cancel)
+
+		self.assertFalse(job.poll())
+		self.assertFalse(job.poll(0.1))
+
+	def test_cancel(self):
+		job = start('(nap 60)')
+
+		self.assertTrue(job.cancel())
+		self.assertEqual(job.state, CANCELLED)
+		self.assertFalse(job.worker.is_alive())
+		self.assertTrue(job.poll())
+
+		# cancelling a finished job does nothing
+		self.assertTrue(job.cancel())
+		self.assertEqual(job.state, CANCELLED)
+
+
+if __name__ == '__main__':
+	unittest.main()
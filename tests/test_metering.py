@@ -0,0 +1,94 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the metered execution of untrusted code.
+
+Contributors: myrma
+"""
+
+import unittest
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.compiler.metering import Meter
+from acid.sandbox import execute_sandboxed
+from acid.prelude import default_env
+from acid.exception import CompileError, StepLimitExceeded
+
+
+LOOP = '''
+(define main (lambda ()
+	(foldl + (map (lambda (x) x) (range 0 100000)))))
+'''
+
+
+def run_metered(code, max_steps=1000):
+	env = default_env.copy()
+	Meter(max_steps=max_steps, check_interval=100).install(env)
+
+	compiler = Compiler(Parser(code).run())
+	compiler.metered = True
+	compiler.load(env)
+
+	return env['main']()
+
+
+class TestMetering(unittest.TestCase):
+
+	def test_step_limit(self):
+		with self.assertRaises(StepLimitExceeded):
+			run_metered(LOOP)
+
+	def test_rebinding_fuel_is_rejected(self):
+		with self.assertRaises(CompileError):
+			run_metered('(define __acid_fuel__ (iter (list 1 2 3))) ' + LOOP)
+
+	def test_rebinding_refuel_is_rejected(self):
+		with self.assertRaises(CompileError):
+			run_metered('(define __acid_refuel__ (lambda () 1)) ' + LOOP)
+
+	def test_shadowing_fuel_is_rejected(self):
+		code = '''
+		(define main (lambda ()
+			((lambda (__acid_fuel__ __acid_next__) (main)) 0 0)))
+		'''
+
+		with self.assertRaises(CompileError):
+			run_metered(code)
+
+	def test_rebinding_builtins_is_rejected(self):
+		with self.assertRaises(CompileError):
+			run_metered('(define __builtins__ (dict)) ' + LOOP)
+
+	def test_python_builtins_are_restricted(self):
+		code = '(define main (lambda () ((getattr (__import__ "os") "getcwd"))))'
+
+		with self.assertRaises(NameError):
+			run_metered(code)
+
+	def test_safe_builtins(self):
+		code = '(define main (lambda () (abs (- 0 (len (str 123))))))'
+		self.assertEqual(run_metered(code), 3)
+
+	def test_io_builtins_are_removed(self):
+		for name in ('write-file', 'tcp-request'):
+			code = '(define main (lambda () {}))'.format(name)
+
+			with self.subTest(name=name):
+				with self.assertRaises(NameError):
+					run_metered(code)
+
+				with self.assertRaises(RuntimeError) as error:
+					execute_sandboxed(code)
+
+				self.assertIn('NameError', str(error.exception))
+
+	def test_unmetered_code_can_bind_reserved_names(self):
+		env = default_env.copy()
+		Compiler(Parser('(define __acid_fuel__ 1)').run()).load(env)
+		self.assertEqual(env['__acid_fuel__'], 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the shipping of Acid functions to the worker processes of `pmap`.
+
+Contributors: myrma
+"""
+
+import os
+import pickle
+import unittest
+
+from acid.prelude import parallel
+from acid.prelude.parallel import _ship, _unship
+from tests.helpers import evaluate, evaluate_expr
+
+
+CODE = '''
+(define unused (print "loaded"))
+
+(define scale 3)
+(define even? (lambda (n) (if (== n 0) 1 (odd? (- n 1)))))
+(define odd? (lambda (n) (if (== n 0) 0 (even? (- n 1)))))
+(define f (lambda (x) (if (== (even? x) 1) (* x scale) x)))
+'''
+
+
+def fail():
+	raise ValueError('failed')
+
+
+def nested_pids():
+	return parallel.par(os.getpid, os.getpid)
+
+
+def roundtrip(func):
+	return _unship(pickle.loads(pickle.dumps(_ship(func))))
+
+
+class TestShipping(unittest.TestCase):
+
+	def test_mutual_recursion(self):
+		env = evaluate(CODE)
+		func = roundtrip(env['f'])
+
+		self.assertEqual([func(x) for x in range(5)], [0, 1, 6, 3, 12])
+
+	def test_only_used_globals_are_shipped(self):
+		env = evaluate(CODE)
+		func = roundtrip(env['f'])
+		func(2)
+
+		# only the globals used by f are shipped, the print is not run again
+		self.assertNotIn('unused', func.__globals__)
+		self.assertEqual(func.__globals__['scale'], 3)
+
+	def test_anonymous_lambda(self):
+		func = roundtrip(evaluate_expr('(lambda (x) (+ x 1))'))
+		self.assertEqual(func(1), 2)
+
+	def test_closure(self):
+		env = evaluate('(define adder (lambda (n) (lambda (x) (+ x n))))')
+		func = roundtrip(env['adder'](5))
+		self.assertEqual(func(1), 6)
+
+	def test_pmap(self):
+		parallel.configure(workers=2, chunk_size=2)
+
+		try:
+			env = evaluate(CODE + '(define result (pmap f (range 0 6)))')
+		finally:
+			parallel.configure()
+
+		self.assertEqual(env['result'], [0, 1, 6, 3, 12, 5])
+
+
+class TestPar(unittest.TestCase):
+
+	def tearDown(self):
+		parallel.configure()
+
+	def test_results(self):
+		parallel.configure(workers=2)
+		env = evaluate(CODE + '(define result (par (f 2) (f 3) (f 4)))')
+		self.assertEqual(env['result'], [6, 3, 12])
+
+	def test_forks(self):
+		parallel.configure(workers=2)
+		first, second = parallel.par(os.getpid, os.getpid)
+
+		self.assertEqual(first, os.getpid())
+		self.assertNotEqual(second, os.getpid())
+
+	def test_single_worker_is_sequential(self):
+		parallel.configure(workers=1)
+		self.assertEqual(parallel.par(os.getpid, os.getpid), [os.getpid()] * 2)
+
+	def test_deep_calls_are_sequential(self):
+		parallel.configure(workers=2, max_depth=1)
+		outer, inner = parallel.par(nested_pids, os.getpid)
+
+		self.assertEqual(outer, [os.getpid()] * 2)
+		self.assertNotEqual(inner, os.getpid())
+
+	def test_errors_are_raised(self):
+		parallel.configure(workers=2)
+
+		for thunks in [(fail, os.getpid), (os.getpid, fail)]:
+			with self.subTest(thunks=thunks):
+				with self.assertRaises(ValueError):
+					parallel.par(*thunks)
+
+		# the nesting depth is restored after an error
+		self.assertNotEqual(parallel.par(os.getpid, os.getpid)[1], os.getpid())
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the parsing of the special forms whose keyword is a valid name.
+
+Contributors: myrma
+"""
+
+import unittest
+
+from acid.parser import Parser, Par, Await
+from tests.helpers import evaluate
+
+
+class TestKeywords(unittest.TestCase):
+
+	def test_par_form(self):
+		program = Parser('(define x (par 1 2))').run()
+		self.assertIsInstance(program.instructions[0].value, Par)
+
+	def test_par_as_name(self):
+		env = evaluate('(define par 3) (define x (+ par 1))')
+		self.assertEqual(env['x'], 4)
+
+	def test_par_as_parameter(self):
+		env = evaluate('(define f (lambda (par) (* par 2))) (define x (f 5))')
+		self.assertEqual(env['x'], 10)
+
+	def test_par_form_with_rebound_name(self):
+		env = evaluate('(define par 3) (define x (par (+ par 1) 5))')
+		self.assertEqual(env['x'], [4, 5])
+
+	def test_await_form(self):
+		program = Parser('(define f (lambda () (await (g))))').run()
+		self.assertIsInstance(program.instructions[0].value.body, Await)
+
+	def test_await_as_name(self):
+		env = evaluate('(define await 3) (define f (lambda (await) await)) '
+					   '(define x (+ await (f 1)))')
+		self.assertEqual(env['x'], 4)
+
+
+if __name__ == '__main__':
+	unittest.main()
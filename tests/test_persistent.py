@@ -0,0 +1,77 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the concatenation of the persistent sequences.
+
+Contributors: myrma
+"""
+
+import unittest
+
+from acid.prelude.persistent import Cons, PVector, cons_list
+from acid.prelude.sequence import Seq
+from tests.helpers import evaluate_expr
+
+
+class TestConcat(unittest.TestCase):
+
+	def test_concat_cons(self):
+		result = evaluate_expr('(+ (append 1 (list 2)) (list 3) (append 4 (list)))')
+
+		self.assertIsInstance(result, Cons)
+		self.assertEqual(list(result), [1, 2, 3, 4])
+
+	def test_concat_shares_last_list(self):
+		left, right = cons_list([1, 2]), cons_list([3, 4])
+		result = left + right
+
+		self.assertEqual(list(result), [1, 2, 3, 4])
+		self.assertIs(result.tail.tail, right)
+		self.assertEqual(list(left), [1, 2])
+
+	def test_list_plus_cons(self):
+		result = evaluate_expr('(+ (list 0) (append 1 (list 2)))')
+
+		self.assertIsInstance(result, Cons)
+		self.assertEqual(list(result), [0, 1, 2])
+
+	def test_concat_pvector(self):
+		result = evaluate_expr('(+ (pvector 1 2) (list 3) (pvector 4))')
+
+		self.assertIsInstance(result, PVector)
+		self.assertEqual(list(result), [1, 2, 3, 4])
+		self.assertEqual(result[3], 4)
+
+	def test_list_plus_pvector(self):
+		result = evaluate_expr('(+ (list 0) (pvector 1 2))')
+
+		self.assertIsInstance(result, PVector)
+		self.assertEqual(list(result), [0, 1, 2])
+
+	def test_concat_lazy_sequence(self):
+		result = evaluate_expr('(+ (append 0 (list)) (range 1 3) (pvector 3))')
+
+		self.assertIsInstance(result, Seq)
+		self.assertEqual(list(result), [0, 1, 2, 3])
+
+
+class TestSlices(unittest.TestCase):
+
+	def test_cons_slices(self):
+		xs = list(range(6))
+		cons = cons_list(xs)
+
+		slices = [slice(None, None, -1), slice(-2, None), slice(None, -2),
+				  slice(1, 5, 2), slice(5, 0, -2), slice(-10, 10), slice(2, 2)]
+
+		for index in slices:
+			with self.subTest(index=index):
+				result = cons[index]
+				self.assertIsInstance(result, Cons)
+				self.assertEqual(list(result), xs[index])
+				self.assertEqual(list(result), list(PVector.from_iterable(xs)[index]))
+
+
+if __name__ == '__main__':
+	unittest.main()
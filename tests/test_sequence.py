@@ -0,0 +1,49 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the lazy sequences returned by the sequence builtins, which must keep
+behaving like the lists they replaced.
+
+Contributors: myrma
+"""
+
+import unittest
+
+from acid.prelude.sequence import Seq
+from tests.helpers import evaluate_expr
+
+
+class TestSequence(unittest.TestCase):
+
+	def test_concat_maps(self):
+		result = evaluate_expr(
+			'(+ (map (lambda (x) (* x 2)) (range 0 3))'
+			'   (map (lambda (x) (+ x 1)) (list 5 6)))')
+
+		self.assertEqual(list(result), [0, 2, 4, 6, 7])
+
+	def test_concat_is_lazy(self):
+		result = evaluate_expr(
+			'(+ (range 0 2) (filter (lambda (x) (> x 3)) (range 0 6)) (list 9))')
+
+		self.assertIsInstance(result, Seq)
+		self.assertEqual(result, [0, 1, 4, 5, 9])
+		# a lazy sequence can be traversed more than once
+		self.assertEqual(list(result), list(result))
+
+	def test_concat_list_and_seq(self):
+		result = evaluate_expr('(+ (list 1 2) (take 2 (range 5 10)))')
+		self.assertEqual(result, [1, 2, 5, 6])
+
+	def test_list_operations(self):
+		result = evaluate_expr('(zip (range 0 3) (list "a" "b" "c"))')
+
+		self.assertEqual(len(result), 3)
+		self.assertEqual(result[1], (1, 'b'))
+		self.assertEqual(result[-1], (2, 'c'))
+		self.assertEqual(list(result[1:]), [(1, 'b'), (2, 'c')])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the on-disk code cache of the execution server.
+
+Contributors: myrma
+"""
+
+import os
+import stat
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+from acid.server import server
+from acid.server.client import default_socket_path
+from acid.server.server import Server, default_cache_dir, _remove_stale_socket
+
+
+SOURCE = '(define main (lambda () (print 1)))'
+
+
+class TestCache(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+	def test_default_cache_dir(self):
+		with mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.tmp.name}):
+			self.assertEqual(default_cache_dir(),
+							 os.path.join(self.tmp.name, 'acid'))
+
+	def test_private_dir(self):
+		path = os.path.join(self.tmp.name, 'cache')
+		Server(cache_dir=path)
+
+		self.assertEqual(stat.S_IMODE(os.stat(path).st_mode) & 0o077, 0)
+
+	def test_shared_dir_is_refused(self):
+		path = os.path.join(self.tmp.name, 'cache')
+		os.mkdir(path)
+		os.chmod(path, 0o777)
+
+		with self.assertRaises(PermissionError):
+			Server(cache_dir=path)
+
+	def test_key_includes_runtime(self):
+		cache_server = Server(cache_dir=self.tmp.name)
+		cache_server.get_code(SOURCE, 'a.acid')
+
+		with mock.patch.object(server, 'runtime_fingerprint',
+							   return_value='other compiler'):
+			cache_server.get_code(SOURCE, 'a.acid')
+
+		self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+
+
+class TestSocket(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.path = os.path.join(self.tmp.name, 'server.sock')
+
+	def bind(self):
+		sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.addCleanup(sock.close)
+		sock.bind(self.path)
+		return sock
+
+	def test_default_socket_path(self):
+		with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tmp.name}):
+			self.assertEqual(default_socket_path(),
+							 os.path.join(self.tmp.name, 'acid', 'server.sock'))
+
+	def test_stale_socket_is_removed(self):
+		self.bind().close()
+		_remove_stale_socket(self.path)
+
+		self.assertFalse(os.path.exists(self.path))
+
+	def test_listening_socket_is_kept(self):
+		self.bind().listen(1)
+
+		with self.assertRaises(OSError):
+			_remove_stale_socket(self.path)
+
+		self.assertTrue(os.path.exists(self.path))
+
+	def test_other_files_are_kept(self):
+		with open(self.path, 'w') as file:
+			file.write('data')
+
+		with self.assertRaises(FileExistsError):
+			_remove_stale_socket(self.path)
+
+		self.assertTrue(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the snapshots of evaluated environments.
+
+Contributors: myrma
+"""
+
+import os
+import tempfile
+import unittest
+
+from acid.compiler.snapshot import save_snapshot, load_snapshot
+from tests.helpers import evaluate
+
+
+class TestSnapshot(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.path = os.path.join(self.tmp.name, 'program.acidsnap')
+
+	def test_roundtrip(self):
+		source = '(define double (lambda (x) (* x 2))) (define y (double 4))'
+		env = evaluate(source)
+
+		self.assertTrue(save_snapshot(env, self.path, source))
+
+		restored = load_snapshot(self.path, source)
+		self.assertEqual(restored['y'], 8)
+		self.assertEqual(restored['double'](5), 10)
+
+	def test_unpicklable_value(self):
+		data = os.path.join(self.tmp.name, 'data')
+
+		with open(data, 'wb') as file:
+			file.write(b'abcd')
+
+		source = '(define chunks (read-chunks "{}" 2))'.format(data)
+		env = evaluate(source)
+
+		self.assertFalse(save_snapshot(env, self.path, source))
+		self.assertFalse(os.path.exists(self.path))
+		self.assertIsNone(load_snapshot(self.path, source))
+
+	def test_builtins_are_not_saved(self):
+		source = '(define x 1)'
+		env = evaluate(source)
+		env['__builtins__'] = __builtins__
+
+		self.assertTrue(save_snapshot(env, self.path, source))
+		self.assertNotIn('__builtins__', load_snapshot(self.path, source))
+
+	def test_deep_value(self):
+		source = '(define x 1)'
+		env = evaluate(source)
+		deep = []
+
+		for _ in range(100000):
+			deep = [deep]
+
+		env['deep'] = deep
+
+		self.assertFalse(save_snapshot(env, self.path, source))
+		self.assertFalse(os.path.exists(self.path))
+
+	def test_corrupt_file(self):
+		source = '(define double (lambda (x) (* x 2))) (define y (double 4))'
+		self.assertTrue(save_snapshot(evaluate(source), self.path, source))
+
+		with open(self.path, 'rb') as file:
+			data = file.read()
+
+		for corrupt in [b'', data[:len(data) // 2], b'garbage' * 10]:
+			with self.subTest(corrupt=corrupt):
+				with open(self.path, 'wb') as file:
+					file.write(corrupt)
+
+				self.assertIsNone(load_snapshot(self.path, source))
+
+
+if __name__ == '__main__':
+	unittest.main()
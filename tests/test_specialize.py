@@ -0,0 +1,102 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the specialization of hot functions in adaptive mode.
+
+Contributors: myrma
+"""
+
+import dis
+import types
+import unittest
+
+from acid.parser import Parser
+from acid.compiler import Compiler, Specializer
+from acid.compiler.specialize import ADAPTIVE
+from acid.exception import CompileError
+
+
+CODE = '''
+(define fib (lambda (n)
+	(if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+
+(define poly (lambda (x y)
+	(+ (* x x) (* 2 y) 1)))
+
+(define shadow (lambda (x)
+	(foldl (lambda (x y) (+ x y)) (list x 1))))
+
+(define main (lambda ()
+	(print (fib 12)
+		(foldl + (map (lambda (i) (poly i 2)) (range 0 100)))
+		(foldl + (map shadow (range 0 100))))))
+'''
+
+
+def loaded_globals(code):
+	return {instr.argval for instr in dis.get_instructions(code)
+			if instr.opname in ('LOAD_GLOBAL', 'LOAD_NAME')}
+
+
+def opnames(code):
+	return {instr.opname for instr in dis.get_instructions(code)}
+
+
+def nested_codes(code):
+	return [const for const in code.co_consts
+			if isinstance(const, types.CodeType)]
+
+
+class TestSpecialize(unittest.TestCase):
+
+	def setUp(self):
+		specializer = Specializer(threshold=50)
+		specializer.execute(Compiler(Parser(CODE).run()))
+		self.records = {record.name: record
+						for record in specializer.stats()}
+
+	def specialized(self, name, signature):
+		record = self.records[name]
+
+		self.assertEqual(record.state, 'specialized')
+		self.assertEqual(record.signature, signature)
+		return record.target
+
+	def test_native_operators(self):
+		poly = self.specialized('poly', (int, int))
+
+		self.assertIn('BINARY_OP', opnames(poly.__code__))
+		self.assertFalse(loaded_globals(poly.__code__) & {'+', '*'})
+		self.assertEqual(poly(3, 4), 18)
+
+	def test_native_comparison(self):
+		fib = self.specialized('fib', (int,))
+
+		self.assertIn('COMPARE_OP', opnames(fib.__code__))
+		self.assertFalse(loaded_globals(fib.__code__) & {'<', '-'})
+		self.assertEqual(fib(10), 55)
+
+	def test_fallback(self):
+		self.assertEqual(self.specialized('poly', (int, int))(0.5, 1), 3.25)
+
+	def test_shadowed_parameter(self):
+		shadow = self.specialized('shadow', (int,))
+		nested, = nested_codes(shadow.__code__)
+
+		# the parameter x of the nested function is not the int x
+		self.assertIn('+', loaded_globals(nested))
+		self.assertEqual(shadow(2), 3)
+
+
+class TestReservedNames(unittest.TestCase):
+
+	def test_specializer_cannot_be_rebound(self):
+		code = '(define {} 1) (define main (lambda () 0))'.format(ADAPTIVE)
+
+		with self.assertRaises(CompileError):
+			Specializer().execute(Compiler(Parser(code).run()))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the streaming execution, which must not keep the forms it has run.
+
+Contributors: myrma
+"""
+
+import gc
+import io
+import unittest
+import tracemalloc
+
+from acid.compiler import Compiler
+from acid.prelude import default_env
+
+
+def stream(count):
+	forms = ''.join('(define x{} {})\n(define x {})\n'.format(i % 10, i, i)
+					for i in range(count))
+
+	return io.StringIO(forms + '(define main (lambda () x))\n')
+
+
+def retained_memory(count):
+	"""
+	Returns the memory still allocated once `count` forms have been streamed,
+	while their environment is alive.
+	"""
+
+	source, env = stream(count), default_env.copy()
+	gc.collect()
+	tracemalloc.start()
+
+	try:
+		Compiler.execute_stream(source, prelude=env, mute_env=True)
+		gc.collect()
+		return tracemalloc.get_traced_memory()[0]
+	finally:
+		tracemalloc.stop()
+
+
+class TestStream(unittest.TestCase):
+
+	def test_result(self):
+		env = default_env.copy()
+		Compiler.execute_stream(stream(100), prelude=env, mute_env=True)
+		self.assertEqual(env['x'], 99)
+
+	def test_forms_are_not_retained(self):
+		small, big = retained_memory(50), retained_memory(500)
+
+		# each form would retain at least its code object (hundreds of bytes)
+		self.assertLess(big - small, 64 * 1024)
+
+
+if __name__ == '__main__':
+	unittest.main()
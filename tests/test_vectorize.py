@@ -0,0 +1,93 @@
+#!/usr/bin/env python3.4
+# coding: utf-8
+
+"""
+Tests of the vectorization of `map` over a `vrange` in the vector prelude.
+
+Contributors: myrma
+"""
+
+import ast
+import unittest
+
+from acid.parser import Parser
+from acid.compiler import Compiler
+from acid.compiler.compiler import redefined_names
+from acid.prelude import default_env
+from tests.helpers import evaluate_expr
+
+try:
+	import numpy
+	from acid.prelude.vector import vector_env, _UFUNCS
+except ImportError:
+	numpy = None
+
+
+EXPR = '(map (lambda (x) (+ (* x x) 1)) (vrange 0 10))'
+CODE = '(define result {})'.format(EXPR)
+
+
+def translate(code, env):
+	program = Parser(code).run()
+	compiler = Compiler(program)
+	compiler.redefined = redefined_names(program, env)
+	return compiler.translate(program)
+
+
+def called_names(py_ast):
+	return {node.func.id for node in ast.walk(py_ast)
+			if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)}
+
+
+@unittest.skipIf(numpy is None, 'requires NumPy')
+class TestVectorize(unittest.TestCase):
+
+	def test_vector_prelude_is_not_redefined(self):
+		env = vector_env()
+		self.assertFalse(redefined_names(Parser(CODE).run(), env) & {'+', '*'})
+
+	def test_map_is_vectorized(self):
+		py_ast = translate(CODE, vector_env())
+
+		# the lambda is applied to the whole vector
+		self.assertNotIn('map', called_names(py_ast))
+		self.assertTrue(any(
+			isinstance(node, ast.Call) and isinstance(node.func, ast.Lambda)
+			for node in ast.walk(py_ast)))
+
+		result = evaluate_expr(EXPR, vector_env())
+		self.assertIsInstance(result, numpy.ndarray)
+		self.assertEqual(list(result), [x * x + 1 for x in range(10)])
+
+	def test_rebound_builtin_is_not_vectorized(self):
+		code = '(define * (lambda (x y) x)) ' + CODE
+		self.assertIn('map', called_names(translate(code, vector_env())))
+
+	def test_same_results_as_scalar_builtins(self):
+		env = vector_env()
+		xs = range(1, 9)
+
+		for name in _UFUNCS:
+			unary = name in ('not', 'negate', '~')
+			call = '({} x)' if unary else '({} x 3)'
+			expr = '(map (lambda (x) {}) (vrange 1 9))'.format(
+				call.format(name))
+
+			if unary:
+				expected = [default_env[name](x) for x in xs]
+			else:
+				expected = [default_env[name](x, 3) for x in xs]
+
+			with self.subTest(name=name):
+				result = evaluate_expr(expr, env)
+				self.assertIsInstance(result, numpy.ndarray)
+				self.assertEqual(result.tolist(), expected)
+
+	def test_other_prelude_is_redefined(self):
+		env = default_env.copy()
+		env['*'] = lambda *xs: 0
+		self.assertIn('*', redefined_names(Parser(CODE).run(), env))
+
+
+if __name__ == '__main__':
+	unittest.main()